@@ -0,0 +1,27 @@
+"""
+Parsed DOM cache benchmarks, cold parse against warm restore. Run from the repository root with:
+
+    python -m benchmarks.bench_dom_cache
+"""
+import tempfile
+
+from benchmarks.bench_parser import count_nodes, indented_documents, nested_documents, parse
+from benchmarks.bench_tokenizer import acid_test_documents, best_time
+from browser.utils.dom_cache import DOMCache
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as path:
+        cache = DOMCache(path)
+        for name, html in acid_test_documents() + indented_documents() + nested_documents():
+            cold = best_time(lambda: cache.store(html, parse(html, True), elide_whitespace=True), repeats=3)
+            warm = best_time(lambda: cache.load(html, elide_whitespace=True), repeats=3)
+            restored = cache.load(html, elide_whitespace=True)
+            assert restored is not None and count_nodes(restored) == count_nodes(parse(html, True))
+            print(f"{name}: {len(html)} chars, cold parse and store {cold * 1000:.2f} ms, "
+                  f"warm restore {warm * 1000:.2f} ms ({cold / warm:.1f}x)")
+        print(f"Cache size: {cache.size() / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
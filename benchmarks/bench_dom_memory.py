@@ -0,0 +1,64 @@
+"""
+DOM memory benchmarks. Run from the repository root with:
+
+    python -m benchmarks.bench_dom_memory
+"""
+import gc
+import tracemalloc
+from typing import Callable, List
+
+from benchmarks.bench_parser import count_nodes, parse
+from benchmarks.bench_tokenizer import best_time
+from web.css.CSSParser import CSSParser
+from web.css.utils import cascade_priority, style
+from web.dom.CompactDocument import CompactDocument
+from web.dom.Node import Node
+
+ARTICLES = 5000
+
+
+def large_page(articles: int = ARTICLES) -> str:
+    article = """
+        <article class="post">
+            <h2 id="title">Title</h2>
+            <p>Some <b>important</b> text with a <a href="/more">link</a>.</p>
+            <ul>
+                <li>First</li>
+                <li>Second</li>
+            </ul>
+        </article>"""
+    return f"<!DOCTYPE html><html><head><title>Blog</title></head><body><main>{article * articles}</main></body></html>"
+
+
+def report(name: str, build: Callable[[], Node], rules: List) -> None:
+    """
+    Reports memory retained by the built document, before and after styling it, and time to walk it.
+    """
+    tracemalloc.start()
+    documents = [build()]
+    gc.collect()
+    built = tracemalloc.get_traced_memory()[0]
+    style(documents[0], rules)
+    gc.collect()
+    styled = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    nodes = count_nodes(documents[0])
+    walk = best_time(lambda: count_nodes(documents[0]), repeats=3)
+    print(f"{name}: {nodes} nodes, {built / 2**20:.2f} MiB built ({built / nodes:.0f} bytes per node), "
+          f"{styled / 2**20:.2f} MiB styled ({styled / nodes:.0f} bytes per node), walked in {walk * 1000:.0f} ms")
+    document = documents[0].document
+    if isinstance(document, CompactDocument):
+        walk = best_time(lambda: sum(1 for _ in document.descendantIds()), repeats=3)
+        print(f"{name}: walked ids in {walk * 1000:.0f} ms")
+
+
+def main() -> None:
+    with open("./browser/styling/defaults/browser.css") as file:
+        rules = sorted(CSSParser(file.read()).parse(), key=cascade_priority)
+    html = large_page()
+    report("node objects", lambda: parse(html), rules)
+    report("compact document", lambda: CompactDocument.fromTree(parse(html)), rules)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Tree construction benchmarks. Run from the repository root with:
+
+    python -m benchmarks.bench_parser
+"""
+import contextlib
+import io
+import tracemalloc
+from typing import List, Tuple
+
+from benchmarks.bench_tokenizer import acid_test_documents, best_time
+from web.dom.Node import Node
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+NESTING_DEPTH = 1000
+
+
+def parse(html: str, elide_whitespace: bool = False) -> Node:
+    documents: List[Node] = []
+    # Tree builder logs every insertion mode switch.
+    with contextlib.redirect_stdout(io.StringIO()):
+        HTMLDocumentParser(html, elide_whitespace=elide_whitespace).run(documents.append)
+    return documents[0]
+
+
+def count_nodes(root: Node) -> int:
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
+
+
+def nested_documents(depth: int = NESTING_DEPTH) -> List[Tuple[str, str]]:
+    """
+    Documents with deeply nested elements, e.g. forum threads with quoted replies.
+    """
+    head = "<!DOCTYPE html><html><head></head><body>"
+    tail = "</body></html>"
+    return [
+        ("nested divs", head + "<div><p>reply</p>" * depth + "</div>" * depth + tail),
+        ("nested lists", head + "<ul><li><button>quote</button>" * depth + "</li></ul>" * depth + tail),
+        ("nested formatting", head + "<div><b><i>text</i></b>" * depth + "</div>" * depth + tail),
+    ]
+
+
+def indented_documents() -> List[Tuple[str, str]]:
+    """
+    Pretty-printed pages, like most of the hand written or templated ones.
+    """
+    article = """
+        <article>
+            <h2>Title</h2>
+            <p>Some <b>important</b> text with a <a href="/more">link</a>.</p>
+            <ul>
+                <li>First</li>
+                <li>Second</li>
+            </ul>
+        </article>"""
+    return [("indented articles", f"<!DOCTYPE html>\n<html>\n<head>\n    <title>Blog</title>\n</head>\n"
+                                  f"<body>\n    <main>{article * 200}\n    </main>\n</body>\n</html>\n")]
+
+
+def report_whitespace_elision(name: str, html: str) -> None:
+    results = []
+    for elide_whitespace in (False, True):
+        tracemalloc.start()
+        document = parse(html, elide_whitespace)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results.append((count_nodes(document), memory))
+    (nodes, memory), (elided_nodes, elided_memory) = results
+    print(f"{name}: {nodes} -> {elided_nodes} nodes ({1 - elided_nodes / nodes:.0%} fewer), "
+          f"{memory / 1024:.0f} -> {elided_memory / 1024:.0f} KiB ({1 - elided_memory / memory:.0%} less)")
+
+
+def main() -> None:
+    for name, html in acid_test_documents() + nested_documents():
+        elapsed = best_time(lambda: parse(html), repeats=3)
+        print(f"{name}: {len(html)} chars, {elapsed * 1000:.2f} ms")
+    print("Whitespace-only text node elision:")
+    for name, html in acid_test_documents() + indented_documents():
+        report_whitespace_elision(name, html)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Tokenizer benchmarks. Run from the repository root with:
+
+    python -m benchmarks.bench_tokenizer
+"""
+import glob
+import time
+from typing import Callable, List, Tuple
+
+from web.html.parser.HTMLTokenizerRefactored import HTMLTokenizer
+
+REPEATS = 5
+
+
+def tokenize(html: str, state: HTMLTokenizer.State = HTMLTokenizer.State.Data) -> int:
+    tokenizer = HTMLTokenizer(html)
+    tokenizer.switch_state_to(state)
+    token_count = 0
+    while tokenizer.next_token() is not None:
+        token_count += 1
+    return token_count
+
+
+def best_time(function: Callable[[], object], repeats: int = REPEATS) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def acid_test_documents() -> List[Tuple[str, str]]:
+    documents = []
+    for path in sorted(glob.glob("acid_tests/**/*.html", recursive=True)):
+        with open(path, encoding="utf-8") as file:
+            documents.append((path, file.read()))
+    return documents
+
+
+def synthetic_documents() -> List[Tuple[str, str, HTMLTokenizer.State]]:
+    """
+    Inputs dominated by long runs of characters handled by a single tokenizer state.
+    Contents of <script> and <style> start in the state the tree builder switches to.
+    """
+    script = "var total = 0; for (var i = 0; i < items.length; i++) { total += items[i] * 2; }\n" * 2000
+    style = "body > div.content p { margin: 0 auto; font-family: sans-serif; color: #333; }\n" * 2000
+    value = "/static/images/" + "a1b2c3d4" * 8000 + ".png"
+    comment = "Generated by the build system, do not edit by hand. " * 3000
+    return [
+        ("inline <script>", script, HTMLTokenizer.State.ScriptData),
+        ("inline <style>", style, HTMLTokenizer.State.RAWTEXT),
+        ("long attribute values", f'<img src="{value}" alt=\'{value}\' data-x={value}>', HTMLTokenizer.State.Data),
+        ("long comment", f"<!--{comment}-->", HTMLTokenizer.State.Data),
+    ]
+
+
+def run_benchmark(name: str, html: str, state: HTMLTokenizer.State = HTMLTokenizer.State.Data) -> None:
+    token_count = tokenize(html, state)
+    elapsed = best_time(lambda: tokenize(html, state))
+    print(f"{name}: {len(html)} chars, {token_count} tokens, {elapsed * 1000:.2f} ms")
+
+
+def main() -> None:
+    for name, html in acid_test_documents():
+        run_benchmark(name, html)
+    for name, html, state in synthetic_documents():
+        run_benchmark(name, html, state)
+
+
+if __name__ == "__main__":
+    main()
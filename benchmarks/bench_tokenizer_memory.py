@@ -0,0 +1,65 @@
+"""
+Tokenizer memory benchmarks. Run from the repository root with:
+
+    python -m benchmarks.bench_tokenizer_memory
+"""
+import tracemalloc
+from typing import Callable, List, Tuple
+
+from benchmarks.bench_tokenizer import acid_test_documents, best_time
+from web.html.parser.HTMLToken import HTMLToken
+from web.html.parser.HTMLTokenizerRefactored import HTMLTokenizer
+
+DOCUMENT_SIZE = 5 * 1024 * 1024
+
+
+def large_document(size: int = DOCUMENT_SIZE) -> str:
+    """
+    Builds a document of about the given size out of the acid test pages.
+    """
+    html = "".join(html for _, html in acid_test_documents())
+    return html * (size // len(html) + 1)
+
+
+def keep_tokens(html: str) -> List[HTMLToken]:
+    tokenizer = HTMLTokenizer(html)
+    tokens = []
+    token = tokenizer.next_token()
+    while token is not None:
+        tokens.append(token)
+        token = tokenizer.next_token()
+    return tokens
+
+
+def discard_tokens(html: str, reuse_tokens: bool = False) -> None:
+    tokenizer = HTMLTokenizer(html, reuse_tokens=reuse_tokens)
+    while tokenizer.next_token() is not None:
+        pass
+
+
+def measure(function: Callable[[], object]) -> Tuple[int, int]:
+    """
+    Returns memory still allocated after the function returned and the peak, in bytes.
+    Allocations of the returned value are counted as still allocated.
+    """
+    tracemalloc.start()
+    result = function()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current, peak
+
+
+def main() -> None:
+    html = large_document()
+    print(f"Document: {len(html)} chars")
+    current, peak = measure(lambda: keep_tokens(html))
+    print(f"keeping tokens: {current / 2**20:.2f} MiB retained, {peak / 2**20:.2f} MiB peak")
+    for reuse_tokens in (False, True):
+        current, peak = measure(lambda: discard_tokens(html, reuse_tokens))
+        elapsed = best_time(lambda: discard_tokens(html, reuse_tokens), repeats=3)
+        print(f"discarding tokens, reuse_tokens={reuse_tokens}: {peak / 2**10:.2f} KiB peak, {elapsed:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
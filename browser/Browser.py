@@ -5,27 +5,40 @@ from browser.layouts.InlineLayout import DOMElement
 import tkinter
 from tkinter.constants import END
 from tkinter.font import Font
-from typing import List, Literal, Optional, Tuple, cast
+from typing import Dict, Iterator, List, Literal, Optional, Sequence, Tuple, cast
 from browser.layouts.Layout import Layout
-from browser.utils.networking import load_file, request, resolve_url
-from browser.utils.dom import tree_to_list
+from browser.utils.networking import cached_source, cancel_preloads, load_file, preload, request, resolve_url, stream
+from browser.utils.dom_cache import DOMCache
+from browser.utils.dom import is_inclusive_ancestor, pre_order
 from browser.utils import logging
 from web.dom.CharacterData import CharacterData
-from web.dom.Node import Node
+from web.dom.MutationObserver import MutationObserver
+from web.dom.Node import CHILD_LAYOUT_DIRTY, CHILD_STYLE_DIRTY, LAYOUT_DIRTY, PAINT_DIRTY, STYLE_DIRTY, Node
 from web.dom.elements.Element import Element
+from web.dom.events.Event import Event, EventInit
+from web.dom.events.EventTarget import EventTarget
+from web.dom.events.KeyboardEvent import KeyboardEvent, KeyboardEventInit
 from web.dom.elements.HTMLInputElement import HTMLInputElement
 from web.dom.DocumentType import DocumentType
 from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
-from web.dom.elements import HTMLBodyElement, HTMLStyleElement
+from web.html.serializer.HTMLSerializer import HTMLSerializer
+from web.dom.elements import HTMLBodyElement
 from browser.globals import EMOJIS_PATH, BrowserState
 from web.css.CSSParser import CSSParser
-from web.css.utils import style, cascade_priority
-from web.dom.elements import Text
+from web.css.utils import style, cascade_priority, update_style
+import functools
 import urllib
 
 
 SCROLL_STEP = 10
 SCROLLBAR_WIDTH = 15
+# Parsing is split into slices, so the window stays responsive while loading large pages.
+PARSE_SLICE_TOKENS = 2000
+PARSE_SLICE_TIME = 0.01
+WINDOW_TITLE = "theBrowser"
+# Partially parsed document is painted after this many seconds or characters of parsing.
+PARTIAL_RASTER_INTERVAL = 0.5
+PARTIAL_RASTER_CHARACTERS = 256 * 1024
 
 @dataclass
 class FocusObject:
@@ -35,6 +48,8 @@ class FocusObject:
 class Browser:
     def __init__(self) -> None:
         self.window = tkinter.Tk(className='theBrowser')
+        # Mutation records are delivered in one batch once the current event has been handled.
+        MutationObserver.setScheduler(lambda notify: self.window.after_idle(notify))
         self.window.rowconfigure(0, weight=1)
         self.window.columnconfigure(0, weight=1)
         self.window.rowconfigure(1, weight=1000)
@@ -59,6 +74,16 @@ class Browser:
         self.used_resources = []
         self.display_list = []
         self.re_draw_timeout: Optional[str] = None
+        self.parse_timeout: Optional[str] = None
+        # Rules parsed from linked stylesheets by URL and from style elements by their text,
+        # shared by partial rasters and the final one of the current page.
+        self.linked_style_rules: Dict[str, List] = {}
+        self.inline_style_rules: Dict[str, List] = {}
+        # Sorted rules the document was last styled with, dirty nodes are restyled with them.
+        self.style_rules: List = []
+        # Document last styled, partial rasters of a loading page style the same document again.
+        self.styled_dom: Optional[DocumentType] = None
+        self.dom_cache = DOMCache()
         self.supported_emojis = self.init_emojis()
         self.focus = FocusObject(None, None)
 
@@ -128,6 +153,7 @@ class Browser:
             self.re_draw_timeout = None
         BrowserState.set_window_size(event.width, event.height)
         self.document.height = event.height
+        self.document.node.markDirty(LAYOUT_DIRTY | PAINT_DIRTY)
         self.re_draw_timeout = self.window.after(10, self.redraw)
 
     def handle_key(self, e):
@@ -135,16 +161,13 @@ class Browser:
         if e.keysym != "BackSpace":
             if len(e.char) == 0: return
             if not (0x20 <= ord(e.char) < 0x7f): return
+        if self.focus.node is None: return
 
-        if isinstance(self.focus.node, HTMLInputElement):
-            if e.char == "" and e.keysym == "BackSpace":
-                self.focus.node.attributes["value"] = self.focus.node.attributes["value"][:-1]
-            else:
-                self.focus.node.attributes["value"] += e.char
-            self.redraw()
+        key = "Backspace" if e.keysym == "BackSpace" else e.char
+        self.focus.node.dispatch_event(KeyboardEvent("keydown", KeyboardEventInit(bubbles=True, cancelable=True, key=key)))
 
     def draw_cursor(self):
-       if not isinstance(self.focus.node, HTMLInputElement): return
+       if not isinstance(self.focus.node, HTMLInputElement) or self.focus.layout is None: return
        w = self.focus.layout.font.measure(self.focus.node.attributes["value"])
        self.canvas.create_line(self.focus.layout.x + w, self.focus.layout.y, self.focus.layout.x + w, self.focus.layout.y + self.focus.layout.font.cget("size"), fill="black")
 
@@ -153,16 +176,34 @@ class Browser:
         x, y = e.x, e.y
 
         y += self.scroll
-        objs = [obj for obj in tree_to_list(self.document, []) if obj.x <= x < obj.x + obj.width and obj.y <= y < obj.y + obj.height]
-        if not objs: return
-        obj = objs[-1]
-        elt = obj.node
-
-        while elt:
+        # Last hit in tree order is the innermost, children are not always inside their parents.
+        obj = None
+        for candidate in pre_order(self.document):
+            if candidate.x <= x < candidate.x + candidate.width and candidate.y <= y < candidate.y + candidate.height:
+                obj = candidate
+        if obj is None: return
+
+        obj.node.dispatch_event(Event("click", EventInit(bubbles=True, cancelable=True)))
+        # Cursor of a focused input is drawn at the layout which got clicked.
+        if self.focus.node is obj.node and self.focus.layout is None:
+            self.focus.layout = obj
+
+    def add_default_listeners(self, dom: DocumentType) -> None:
+        """
+        Default actions of clicks and keys are run by listeners on the root, after the listeners
+        of the target and its ancestors, which can cancel them.
+        """
+        dom.add_event_listener("click", self.handle_click)
+        dom.add_event_listener("keydown", self.handle_keydown)
+
+    def handle_click(self, event: Event) -> None:
+        if event.default_prevented: return
+        path = event.composed_path()
+        for index, elt in enumerate(path):
+            if not isinstance(elt, Element):
+                continue
             logging.log("Element: ", elt.name)
-            if isinstance(elt, Text):
-                pass
-            elif elt.name == "a" and "href" in elt.attributes:
+            if elt.name == "a" and "href" in elt.attributes:
                 url = resolve_url(elt.attributes["href"], BrowserState.get_current_url())
                 self.search_bar.delete(1.0, END)
                 self.search_bar.insert(END, url)
@@ -170,35 +211,42 @@ class Browser:
             elif elt.name == "input":
                 type = elt.attributes.get("type", "input")
                 if type == "submit":
-                    while elt:
-                        if elt.name == "form" and "action" in elt.attributes:
-                            return self.submit_form(elt)
-                        elt = elt.parentNode
+                    return self.submit_form_of(path[index:])
                 elif type == "radio" or type == "checkbox":
                     current_value = elt.attributes.get("value", "off")
                     if current_value == "off":
-                        elt.attributes["value"] = "on"
+                        elt.setAttribute("value", "on")
                     elif current_value == "on" and type != "radio":
-                        elt.attributes["value"] = "off"
+                        elt.setAttribute("value", "off")
                     self.redraw()
                     return
                 else:
                     if not elt.attributes.get("value"):
-                        elt.attributes["value"] = ""
-                    self.focus = FocusObject(node=elt, layout=obj)
+                        elt.setAttribute("value", "")
+                    self.focus = FocusObject(node=elt, layout=None)
                     return
             elif elt.name == "button":
-                while elt:
-                    if elt.name == "form" and "action" in elt.attributes:
-                        return self.submit_form(elt)
-                    elt = elt.parentNode
-            elt = elt.parentNode
+                return self.submit_form_of(path[index:])
+
+    def handle_keydown(self, event: KeyboardEvent) -> None:
+        if event.default_prevented: return
+        input = event.target
+        if isinstance(input, HTMLInputElement):
+            if event.key == "Backspace":
+                input.setAttribute("value", input.attributes["value"][:-1])
+            else:
+                input.setAttribute("value", input.attributes["value"] + event.key)
+            self.redraw()
+
+    def submit_form_of(self, path: Sequence[EventTarget]) -> None:
+        for elt in path:
+            if isinstance(elt, Element) and elt.name == "form" and "action" in elt.attributes:
+                return self.submit_form(elt)
 
     def submit_form(self, elt):
-        inputs = [node for node in tree_to_list(elt, [])
-                  if isinstance(node, Element)
-                  and node.name == "input"
-                  and "name" in node.attributes]
+        inputs = [node for node in elt.document.getElementsByTagName("input")
+                  if "name" in node.attributes
+                  and is_inclusive_ancestor(elt, node)]
 
         body = ""
         for input in inputs:
@@ -214,64 +262,183 @@ class Browser:
         self.load(url)
 
     def redraw(self) -> None:
+        """
+        Brings style, layout and paint up to date with the dirty nodes of the document. Layout of a box
+        depends on the boxes before it, so any layout dirty node lays out the whole document again,
+        but changes only read by paint, like values of text inputs, skip layout.
+        """
         self.re_draw_timeout = None
         if self.document:
-            self.document.layout(BrowserState.get_window_size()[0] - SCROLLBAR_WIDTH)
+            dom = self.document.node
+            if dom.dirtyFlags & (STYLE_DIRTY | CHILD_STYLE_DIRTY):
+                update_style(dom, self.style_rules)
+            if dom.dirtyFlags & (LAYOUT_DIRTY | CHILD_LAYOUT_DIRTY):
+                self.document.layout(BrowserState.get_window_size()[0] - SCROLLBAR_WIDTH)
             self.display_list = []
             self.document.paint(self.display_list)
+            dom.clearDirty()
         self.used_resources = []
         self.draw()
         self.draw_cursor()
 
     def load(self, url: str, body=None):
+        self.cancel_parse()
+        cancel_preloads()
         self.scroll = 0
         BrowserState.set_current_url(url)
+        # Node ids are only unique within a document, so selected ids would select nodes of the new page.
+        BrowserState.set_selected_elements(())
         [inspector.update_url(url) for inspector in BrowserState.get_inspectors()]
         [inspector.clear_network_requests() for inspector in BrowserState.get_inspectors()]
-        if url.startswith("file://"):
-            response = load_file(url)
+        self.linked_style_rules = {}
+        self.inline_style_rules = {}
+        self.styled_dom = None
+        # Whole source is known up front for local files and already fetched pages, so their DOM
+        # can be restored from cache. Other pages are streamed, and cached once the stream ends.
+        source: Optional[str] = load_file(url) if url.startswith("file://") else cached_source(url)
+        if source is not None:
+            dom = self.dom_cache.load(source, elide_whitespace=True)
+            if dom is not None:
+                self.raster(dom)
+                return
+        parser = HTMLDocumentParser(
+            cb=functools.partial(self.cache_streamed_and_raster, url) if source is None
+            else functools.partial(self.cache_and_raster, source),
+            preload_cb=self.preload_subresource,
+            progress_cb=self.raster_partial,
+            progress_interval=PARTIAL_RASTER_INTERVAL,
+            progress_characters=PARTIAL_RASTER_CHARACTERS,
+            elide_whitespace=True)
+        if source is not None:
+            chunks: Iterator[str] = iter([source])
         else:
-            response = request(url).text
-        parser = HTMLDocumentParser(response)
-        parser.run(self.raster)
+            chunks = stream(url)
+        self.parse_in_slices(parser, chunks)
+
+    def parse_in_slices(self, parser: HTMLDocumentParser, chunks: Iterator[str]) -> None:
+        """
+        Parses a slice of the document, reads next chunk of input once the parser needs it
+        and schedules the next slice until the document is finished.
+        """
+        self.parse_timeout = None
+        if not parser.parse_slice(PARSE_SLICE_TOKENS, PARSE_SLICE_TIME) and not parser.finished:
+            chunk = next(chunks, None)
+            if chunk is None:
+                parser.close_input()
+            else:
+                parser.append_input(chunk)
+        if parser.finished:
+            self.window.title(WINDOW_TITLE)
+            return
+        self.window.title(f"{WINDOW_TITLE} - loading {parser.progress:.0%}")
+        self.parse_timeout = self.window.after(1, self.parse_in_slices, parser, chunks)
+
+    def cancel_parse(self) -> None:
+        if self.parse_timeout is not None:
+            self.window.after_cancel(self.parse_timeout)
+            self.parse_timeout = None
+            self.window.title(WINDOW_TITLE)
+
+    def preload_subresource(self, url: str, destination: str) -> None:
+        if destination == "script":
+            # Scripts are not executed yet, so nothing would use the response.
+            return
+        try:
+            preload(resolve_url(url, BrowserState.get_current_url()))
+        except Exception as e:
+            logging.log("Could not preload", url, e)
 
     def load_webpage(self) -> None:
         url = self.search_bar.get("1.0", END)
         self.load(url.strip())
 
-    def raster(self, dom: DocumentType):
+    def collect_style_rules(self, dom: DocumentType) -> List:
+        """
+        Collects rules of the default, linked and inline stylesheets. Stylesheets are parsed
+        only once per page, so repeated rasters of a growing document reuse them.
+        """
         rules = self.default_style_sheet.copy()
         stylesheet_links = [node.attributes["href"]
-             for node in tree_to_list(dom, [])
-             if isinstance(node, Element)
-             and node.name == "link"
-             and "href" in node.attributes
+             for node in dom.document.getElementsByTagName("link")
+             if "href" in node.attributes
              and node.attributes.get("rel") == "stylesheet"]
         for link in stylesheet_links:
-            try:
-                response = request(resolve_url(link, BrowserState.get_current_url()))
-            except Exception as e:
-                continue
-            rules.extend(CSSParser(response.text).parse())
-        style_elements = [node for node in tree_to_list(dom, []) if isinstance(node, HTMLStyleElement)]
+            url = resolve_url(link, BrowserState.get_current_url())
+            if url not in self.linked_style_rules:
+                try:
+                    response = request(url)
+                except Exception as e:
+                    continue
+                self.linked_style_rules[url] = CSSParser(response.text).parse()
+            rules.extend(self.linked_style_rules[url])
+        style_elements = dom.document.getElementsByTagName("style")
         for style_element in style_elements:
             for child in style_element.children:
                 child = cast(CharacterData, child)
-                rules.extend(CSSParser(child.data).parse())
+                if child.data not in self.inline_style_rules:
+                    self.inline_style_rules[child.data] = CSSParser(child.data).parse()
+                rules.extend(self.inline_style_rules[child.data])
+        return rules
+
+    def raster_partial(self, dom: DocumentType) -> None:
+        """
+        Paints the document parsed so far, the final raster() replaces it once parsing is finished.
+        """
+        try:
+            self.style_document(dom, self.collect_style_rules(dom))
+            self.add_default_listeners(dom)
+            self.paint_document(dom)
+        except Exception as e:
+            # Partially parsed document may not be complete enough to be laid out yet.
+            logging.log("Could not paint partial document", e)
+
+    def cache_and_raster(self, source: str, dom: DocumentType) -> None:
+        self.dom_cache.store(source, dom, elide_whitespace=True)
+        self.raster(dom)
+
+    def cache_streamed_and_raster(self, url: str, dom: DocumentType) -> None:
+        # The stream has ended when the parser finishes, so its source has been kept.
+        source = cached_source(url)
+        if source is None:
+            self.raster(dom)
+        else:
+            self.cache_and_raster(source, dom)
 
+    def raster(self, dom: DocumentType):
+        rules = self.collect_style_rules(dom)
         with open("rules.txt", "w") as f:
             for rule in rules:
                 f.write(str(rule.__dict__) + "\n")
-        style(dom, sorted(rules, key=cascade_priority))
+        self.style_document(dom, rules)
         with open("document.html", "w") as f:
-            f.write(str(dom))
-        self.document = DocumentLayout(dom)
+            HTMLSerializer(f).serialize(dom)
         [inspector.update_dom(dom) for inspector in BrowserState.get_inspectors()]
+        self.add_default_listeners(dom)
+        self.paint_document(dom)
+
+    def style_document(self, dom: DocumentType, rules: List) -> None:
+        """
+        Styles the document. When earlier rasters of the same document used the same rules, only the
+        nodes added or changed since then are styled. Layout is not reused, it is always built again.
+        """
+        rules = sorted(rules, key=cascade_priority)
+        same_rules = len(rules) == len(self.style_rules) and all(
+            rule is previous for rule, previous in zip(rules, self.style_rules))
+        if dom is self.styled_dom and same_rules:
+            update_style(dom, rules)
+        else:
+            style(dom, rules)
+        self.style_rules = rules
+        self.styled_dom = dom
+
+    def paint_document(self, dom: DocumentType) -> None:
+        self.document = DocumentLayout(dom)
         self.document.height = BrowserState.get_window_size()[1]
         self.document.layout(BrowserState.get_window_size()[0] - SCROLLBAR_WIDTH)
         self.scrollbar.set((self.scroll/self.document.content_height), ((self.scroll + BrowserState.get_window_size()[1])/self.document.content_height))
         self.display_list = []
         self.document.paint(self.display_list)
+        dom.clearDirty()
 
         self.draw()
 
@@ -1,12 +1,14 @@
 from dataclasses import dataclass
 import tkinter
 from tkinter import ttk
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Union
 from tkinter.messagebox import showinfo
 from web.dom.CharacterData import CharacterData
 from web.dom.DocumentType import DocumentType
-from web.dom.Node import Node
+from web.dom.MutationObserver import MutationObserver, MutationObserverInit, MutationRecord
+from web.dom.Node import PAINT_DIRTY, Node
 from browser.utils import logging
+from browser.utils.dom import pre_order
 
 @dataclass
 class NetworkRequest:
@@ -21,6 +23,8 @@ class Inspector:
         self.url = url
         self.browser = browser
         self.dom: Optional[DocumentType] = dom
+        # Keeps the elements view in sync with the DOM without rebuilding it.
+        self.dom_observer = MutationObserver(self.__dom_mutated)
         self.network_requests: List[NetworkRequest] = []
         self.inspector_window = tkinter.Tk(className=f'Inspector | {self.url}')
         self.inspector_window.rowconfigure(0, weight=1)
@@ -44,6 +48,7 @@ class Inspector:
             logging.log("On close")
             from browser.globals import BrowserState
             BrowserState.remove_inspector(self)
+            self.dom_observer.disconnect()
             self.inspector_window.destroy()
         self.inspector_window.protocol("WM_DELETE_WINDOW", on_closing)
         network_columns = ('url', 'request_type', 'response_code', "response_size")
@@ -76,7 +81,13 @@ class Inspector:
 
         def element_item_selected(event) -> None:
             from browser.globals import BrowserState
-            BrowserState.set_selected_elements(self.elements_treeview.selection())
+            selected = {int(item) for item in self.elements_treeview.selection()}
+            # Only nodes which got selected or unselected are painted again.
+            for node_id in selected ^ BrowserState.get_selected_elements():
+                node = self.dom.document.getNodeById(node_id) if self.dom else None
+                if node is not None:
+                    node.markDirty(PAINT_DIRTY)
+            BrowserState.set_selected_elements(selected)
             self.browser.redraw()
 
         self.elements_treeview.bind('<<TreeviewSelect>>', element_item_selected)
@@ -101,27 +112,67 @@ class Inspector:
         for request in self.network_requests:
             self.network_treeview.insert('', tkinter.END, values=(request.url, request.request_type, request.response_code, request.response_size))
 
-    def __add_node_to_elements_view(self, node: Node, id: str, parent_id: Optional[str]) -> None:
+    def __add_node_to_elements_view(self, node: Node, id: str, parent_id: Optional[str],
+                                    index: Union[int, str] = tkinter.END) -> None:
         if parent_id:
             if isinstance(node, CharacterData):
                 # TODO: Update html tokenizer/parser to remove 'empty' CharacterData elements.
                 if not node.data.isspace():
-                    self.elements_treeview.insert(str(parent_id), tkinter.END, text=f"{node.data.strip()}", iid=id, open=False)
+                    self.elements_treeview.insert(str(parent_id), index, text=f"{node.data.strip()}", iid=id, open=False)
             else:
-                self.elements_treeview.insert(str(parent_id), tkinter.END, text=f"<{node.name}>", iid=id, open=False)
+                self.elements_treeview.insert(str(parent_id), index, text=f"<{node.name}>", iid=id, open=False)
             #parent_child_count = len(self.elements_treeview.get_children(str(parent_id)))
             #log("Child", parent_child_count)
             #self.elements_treeview.move(str(id), str(parent_id), parent_child_count)
         else:
-           self.elements_treeview.insert('', tkinter.END, text=f"<{node.name}>", iid=id, open=False)
-
-        for child in node.children:
-            self.__add_node_to_elements_view(child, str(child.id), id)
+           self.elements_treeview.insert('', index, text=f"<{node.name}>", iid=id, open=False)
 
     def update_elements_view(self) -> None:
         if not self.dom: return
         for child in self.dom.children:
-            self.__add_node_to_elements_view(child, str(child.id), None)
+            # Parents are added before their children.
+            for node in pre_order(child):
+                parent_id = None if node is child else str(node.parentNode.id)
+                self.__add_node_to_elements_view(node, str(node.id), parent_id)
+
+    def __insert_subtree(self, node: Node) -> None:
+        """
+        Adds the node and its descendants to the elements view after the nearest previous sibling
+        which is shown.
+        """
+        parent = node.parentNode
+        parent_id = None if parent is self.dom else str(parent.id)
+        if parent_id and not self.elements_treeview.exists(parent_id):
+            return
+        sibling = node.previousSibling
+        while sibling is not None and not self.elements_treeview.exists(str(sibling.id)):
+            sibling = sibling.previousSibling
+        index = 0 if sibling is None else self.elements_treeview.index(str(sibling.id)) + 1
+        for descendant in pre_order(node):
+            if descendant is node:
+                self.__add_node_to_elements_view(node, str(node.id), parent_id, index)
+            else:
+                self.__add_node_to_elements_view(descendant, str(descendant.id), str(descendant.parentNode.id))
+
+    def __dom_mutated(self, records: List[MutationRecord], observer: MutationObserver) -> None:
+        for record in records:
+            if record.type == "characterData":
+                id = str(record.target.id)
+                if self.elements_treeview.exists(id):
+                    if record.target.data.isspace():
+                        self.elements_treeview.delete(id)
+                    else:
+                        self.elements_treeview.item(id, text=record.target.data.strip())
+                elif record.target.parentNode is not None:
+                    self.__insert_subtree(record.target)
+                continue
+            for node in record.removedNodes:
+                if self.elements_treeview.exists(str(node.id)):
+                    self.elements_treeview.delete(str(node.id))
+            for node in record.addedNodes:
+                # Nodes moved again later in the batch are added by their last record.
+                if node.parentNode is record.target and not self.elements_treeview.exists(str(node.id)):
+                    self.__insert_subtree(node)
 
     def clear_elements_view(self) -> None:
         if not self.dom: return
@@ -132,10 +183,16 @@ class Inspector:
         self.inspector_window.title(url)
 
     def update_dom(self, dom: DocumentType) -> None:
+        from browser.globals import BrowserState
         if self.dom:
             self.clear_elements_view()
+        # Selected ids belong to the previous document.
+        if self.dom is not dom:
+            BrowserState.set_selected_elements(())
+        self.dom_observer.disconnect()
         self.dom = dom
         self.update_elements_view()
+        self.dom_observer.observe(dom, MutationObserverInit(childList=True, characterData=True, subtree=True))
 
 
     def add_network_request(self, request: NetworkRequest) -> None:
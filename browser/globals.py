@@ -1,5 +1,4 @@
-from typing import List, Tuple
-from uuid import UUID
+from typing import Iterable, List, Set, Tuple
 from browser.utils import logging
 
 from browser.Inspector import Inspector
@@ -12,20 +11,21 @@ EMOJIS_PATH = "resources/emojis/"
 class BrowserState():
     __current_url: str = ""
     __inspectors: List[Inspector] = []
-    __selected_elements: List[UUID] = []
+    # Ids of nodes selected in the inspector, checked for every painted node.
+    __selected_elements: Set[int] = set()
     __window_size: Tuple[int, int] = (800, 600)
 
     @staticmethod
-    def set_selected_elements(element_ids: List[UUID]) -> None:
-        BrowserState.__selected_elements = element_ids
+    def set_selected_elements(element_ids: Iterable[int]) -> None:
+        BrowserState.__selected_elements = set(element_ids)
         logging.log("Selected items:", BrowserState.__selected_elements)
 
     @staticmethod
-    def remove_selected_element(element_id: UUID) -> None:
-        BrowserState.__selected_elements.remove(element_id)
+    def remove_selected_element(element_id: int) -> None:
+        BrowserState.__selected_elements.discard(element_id)
 
     @staticmethod
-    def get_selected_elements() -> List[UUID]:
+    def get_selected_elements() -> Set[int]:
         return BrowserState.__selected_elements
 
     @staticmethod
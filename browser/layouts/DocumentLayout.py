@@ -1,4 +1,4 @@
-from typing import TypeVar, cast
+from typing import Type, TypeVar, cast
 from browser.elements.elements import Border, DrawRect
 from browser.styling.color import transform_color
 from web.dom.elements import HTMLBodyElement
@@ -6,7 +6,6 @@ from web.dom.DocumentType import DocumentType
 from browser.layouts.Layout import Layout, Margin, Padding
 from browser.layouts.BlockLayout import BlockLayout
 import browser.globals as globals
-from web.dom.elements.Element import Element
 from web.dom.elements.HTMLElement import HTMLElement
 from browser.utils.logging import log
 
@@ -24,14 +23,13 @@ class DocumentLayout(Layout):
         self.parent = None
         self.previous = None
         self.children = []
-        self.body = self.__get_element(node, HTMLBodyElement)
-        self.html = self.__get_element(node, HTMLElement)
+        self.body = self.__get_element(node, "body", HTMLBodyElement)
+        self.html = self.__get_element(node, "html", HTMLElement)
         self.content_height = 0
 
     def layout(self, screen_width):
         super().layout()
         self.children = []
-        self.html.__children = [self.body]
         log("Node:", self.body.name)
         self.x = globals.HSTEP
         self.y = globals.VSTEP
@@ -44,13 +42,9 @@ class DocumentLayout(Layout):
         self.x = 0
         self.y = 0
 
-    def __get_element(self, dom: DocumentType, type: T) -> T:
-        for child in dom.children:
-            if isinstance(child, cast(Element, type)):
-                    return child
-            for element in child.children:
-                if isinstance(element, cast(Element, type)):
-                    return element
+    def __get_element(self, dom: DocumentType, tag_name: str, type: Type[T]) -> T:
+        elements = dom.document.getElementsByTagName(tag_name)
+        return cast(T, elements[0] if elements else None)
 
     def paint(self, display_list: list):
         bgcolor = self.html.style.get("background-color",
@@ -65,4 +59,4 @@ class DocumentLayout(Layout):
             x2, y2 = self.x + self.width, self.y + max(self.content_height, self.height)
             rect = DrawRect(self.x, self.y, x2, y2, transform_color(bgcolor))
             display_list.append(rect)
-        self.children[0].paint(display_list)
+        self.children[0].paint_tree(display_list)
@@ -46,7 +46,9 @@ class ImageLayout(Layout):
             src = resolve_url(image_src, self.current_url)
             log("image:", src, image_src, self.current_url)
             if src.endswith(".svg"):
-                return svg2png(url=src)
+                # Network responses go through request() to pick up preloaded images.
+                response = request(src)
+                return svg2png(bytestring=response.content) if response is not None else svg2png(url=src)
             else:
                 try:
                     response = request(src)
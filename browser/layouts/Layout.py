@@ -1,9 +1,9 @@
-from typing import List, Literal, Optional
+from typing import List, Literal, Optional, Tuple
 from browser.elements.elements import Border, BorderProperties, DrawBorder, DrawRect
 from browser.globals import BrowserState
 from browser.styling.color import CSS_COLORS, transform_color
 from browser.styling.font.utils import CSS_FONTS_SIZE, convert_absolute_size_to_pixels
-from web.dom.Node import Node
+from web.dom.Node import CHILD_PAINT_DIRTY, PAINT_DIRTY, Node
 from web.dom.elements.Text import Text
 from web.dom.elements.Element import Element
 
@@ -91,6 +91,8 @@ class Layout:
         # TODO: Rename this to something more sensible.
         self.internal_padding: int = 0
         self.display_list = None
+        # Display list this layout was last painted to, with the range of its commands in it.
+        self.painted: Optional[Tuple[list, int, int]] = None
         self.should_recalculate_size = False
         self.margin = Margin()
         self.border = Border()
@@ -466,7 +468,7 @@ class Layout:
                 bgcolor = transform_color(bgcolor)
                 display_list.append(DrawRect(x, y, x2, y2, bgcolor))
 
-            if str(self.node.id) in BrowserState.get_selected_elements():
+            if self.node.id in BrowserState.get_selected_elements():
                 display_list.append(DrawRect(x, y, x2, y2, transform_color(""), ))
                 border = Border()
                 for side in ["top", "right", "bottom", "left"]:
@@ -476,4 +478,19 @@ class Layout:
                 display_list.append(DrawBorder(x, y, x2, y2, self.border))
 
         for child in self.children:
-            child.paint(display_list)
+            child.paint_tree(display_list)
+
+    def paint_tree(self, display_list: list) -> None:
+        """
+        Paints the layout and its children. If none of the nodes painted by them is paint dirty, the
+        commands painted last time are copied instead. Laying out again creates new layouts, so copied
+        commands always have current positions.
+        """
+        if self.painted is not None and not self.node.dirtyFlags & (PAINT_DIRTY | CHILD_PAINT_DIRTY):
+            painted, start, end = self.painted
+            self.painted = (display_list, len(display_list), len(display_list) + end - start)
+            display_list.extend(painted[start:end])
+            return
+        start = len(display_list)
+        self.paint(display_list)
+        self.painted = (display_list, start, len(display_list))
@@ -46,4 +46,4 @@ class LineLayout(Layout):
 
     def paint(self, display_list: list):
         for child in self.children:
-            child.paint(display_list)
+            child.paint_tree(display_list)
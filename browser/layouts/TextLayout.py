@@ -50,7 +50,7 @@ class TextLayout(Layout):
         color = self.node.style["color"]
         display_list.append(DrawText(self.x, self.y, self.word, self.font, color))
 
-        if str(self.node.id) in BrowserState.get_selected_elements():
+        if self.node.id in BrowserState.get_selected_elements():
             x2, y2 = self.x + self.width, self.y + self.height
             rect = DrawRect(self.x, self.y, x2, y2, "", BorderProperties(transform_color("red"), 10))
             display_list.append(rect)
@@ -1,8 +1,75 @@
-from typing import List
+from typing import Callable, Iterator, Optional, Type, TypeVar
 from web.dom.Node import Node
 
-def tree_to_list(node: Node, list: List) -> List[Node]:
-    list.append(node)
-    for child in node.children:
-        tree_to_list(child, list)
-    return list
+# Results of node filters, same as the values of DOM NodeFilter.
+FILTER_ACCEPT = 1
+# Skips the node and its descendants.
+FILTER_REJECT = 2
+# Skips the node but not its descendants.
+FILTER_SKIP = 3
+
+# Walkers work on anything with children, e.g. nodes and layouts.
+T = TypeVar("T")
+NodeFilter = Callable[[T], int]
+
+
+def pre_order(root: T, node_filter: Optional[NodeFilter] = None) -> Iterator[T]:
+    """
+    Yields root and its descendants in tree order, parents before their children. Unlike recursion
+    it works on trees of any depth, and children appended to nodes not visited yet are visited too.
+    """
+    result = FILTER_ACCEPT if node_filter is None else node_filter(root)
+    if result == FILTER_ACCEPT:
+        yield root
+    if result == FILTER_REJECT:
+        return
+    stack = [iter(root.children)]  # type: ignore
+    while stack:
+        node = next(stack[-1], None)
+        if node is None:
+            stack.pop()
+            continue
+        result = FILTER_ACCEPT if node_filter is None else node_filter(node)
+        if result == FILTER_ACCEPT:
+            yield node
+        if result != FILTER_REJECT:
+            children = node.children
+            if children:
+                stack.append(iter(children))
+
+
+def post_order(root: T, node_filter: Optional[NodeFilter] = None) -> Iterator[T]:
+    """
+    Yields descendants of root and root itself, children before their parents.
+    """
+    result = FILTER_ACCEPT if node_filter is None else node_filter(root)
+    if result == FILTER_REJECT:
+        return
+    stack = [(root, result, iter(root.children))]  # type: ignore
+    while stack:
+        node, result, children = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            if result == FILTER_ACCEPT:
+                yield node
+            continue
+        child_result = FILTER_ACCEPT if node_filter is None else node_filter(child)
+        if child_result != FILTER_REJECT:
+            stack.append((child, child_result, iter(child.children)))
+
+
+def nodes_of_type(root: T, type: Type[T], predicate: Optional[Callable[[T], bool]] = None) -> Iterator[T]:
+    """
+    Yields root and its descendants which are instances of type and match the predicate, in tree order.
+    """
+    return pre_order(root, lambda node: FILTER_ACCEPT
+                     if isinstance(node, type) and (predicate is None or predicate(node)) else FILTER_SKIP)
+
+
+def is_inclusive_ancestor(ancestor: Node, node: Optional[Node]) -> bool:
+    while node is not None:
+        if node is ancestor:
+            return True
+        node = node.parentNode
+    return False
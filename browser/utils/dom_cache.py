@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import zlib
+from typing import List, Optional, Tuple, cast
+from browser.utils import logging
+from web.dom.CharacterData import CharacterData
+from web.dom.CompactDocument import CompactDocument
+from web.dom.Document import Document
+from web.dom.DocumentType import DocumentType
+from web.dom.ElementFactory import ElementFactory
+from web.dom.Node import Node
+from web.dom.elements.Comment import Comment
+from web.dom.elements.Element import Element
+from web.dom.elements.Text import Text
+from web.html.parser.HTMLDocumentParser import PARSER_VERSION
+from web.html.parser.HTMLToken import HTMLDoctype, HTMLTag, HTMLToken
+
+DOM_CACHE_PATH = ".cache/dom/"
+DOM_CACHE_SIZE = 64 * 1024 * 1024
+# Bump whenever the serialized layout below changes.
+FORMAT_VERSION = 2
+
+ELEMENT, TEXT, COMMENT = range(3)
+
+
+def serialize(dom: DocumentType) -> bytes:
+    """
+    Flattens the tree into records in document order. Element records carry their child count,
+    so the tree can be rebuilt without recursion. Records hold only strings, numbers and attribute
+    dicts and are stored as JSON, so reading an entry never runs code from it.
+    """
+    records: List[Tuple] = []
+    stack: List[Node] = list(reversed(dom.children))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, Element):
+            records.append((ELEMENT, node.name, node.attributes, len(node.children)))
+            stack.extend(reversed(node.children))
+        elif isinstance(node, Comment):
+            records.append((COMMENT, cast(CharacterData, node).data))
+        else:
+            records.append((TEXT, cast(CharacterData, node).data))
+    doctype = (dom.name, dom.publicId, dom.systemId, len(dom.children))
+    return zlib.compress(json.dumps((doctype, records), separators=(",", ":")).encode("ascii"))
+
+
+def deserialize(data: bytes, compact: bool = False) -> DocumentType:
+    """
+    Rebuilds the tree, as a CompactDocument if compact is True.
+    """
+    (name, public_id, system_id, child_count), records = json.loads(zlib.decompress(data))
+    if compact:
+        return _deserialize_compact(name, public_id, system_id, child_count, records)
+    document = Document()
+    token = HTMLDoctype()
+    token.name, token.publicIdentifier, token.systemPublicIdentidier = name, public_id, system_id
+    dom = DocumentType(token, document)
+    # Parents with the number of children still to be rebuilt.
+    parents: List[List] = [[dom, child_count]]
+    for record in records:
+        while parents[-1][1] == 0:
+            parents.pop()
+        parent = parents[-1]
+        parent[1] -= 1
+        node: Node
+        if record[0] == ELEMENT:
+            tag = HTMLTag(HTMLToken.TokenType.StartTag)
+            tag.name, tag.attributes = record[1], record[2]
+            node = cast(Element, ElementFactory.create_element(tag, parent[0], document))
+            if record[3]:
+                parents.append([node, record[3]])
+        elif record[0] == COMMENT:
+            node = Comment(record[1], parent[0], document)
+        else:
+            node = Text(document, parent[0], record[1])
+        parent[0].appendChild(node)
+    return dom
+
+
+def _deserialize_compact(name: str, public_id: str, system_id: str, child_count: int, records: List[Tuple]) -> DocumentType:
+    document = CompactDocument(name, public_id, system_id)
+    # Parent ids with the number of children still to be rebuilt.
+    parents: List[List[int]] = [[0, child_count]]
+    for record in records:
+        while parents[-1][1] == 0:
+            parents.pop()
+        parent = parents[-1]
+        parent[1] -= 1
+        if record[0] == ELEMENT:
+            node_id = document.appendElement(parent[0], record[1], record[2])
+            if record[3]:
+                parents.append([node_id, record[3]])
+        elif record[0] == COMMENT:
+            document.appendComment(parent[0], record[1])
+        else:
+            document.appendText(parent[0], record[1])
+    return cast(DocumentType, document.documentType)
+
+
+class DOMCache:
+    """
+    Keeps serialized DOMs of parsed documents on disk, keyed by hash of the source, so parsing
+    an unchanged document again can be skipped. Least recently used entries are removed once
+    the cache grows over max_size bytes.
+    """
+
+    def __init__(self, path: str = DOM_CACHE_PATH, max_size: int = DOM_CACHE_SIZE) -> None:
+        self.__path = path
+        self.__max_size = max_size
+
+    def __entry_path(self, html: str, elide_whitespace: bool) -> str:
+        key = hashlib.sha256(f"{PARSER_VERSION}:{FORMAT_VERSION}:{elide_whitespace}:".encode())
+        key.update(html.encode("UTF-8", "surrogatepass"))
+        return os.path.join(self.__path, key.hexdigest())
+
+    def load(self, html: str, elide_whitespace: bool = False, compact: bool = False) -> Optional[DocumentType]:
+        """
+        Returns the DOM stored for html, or None if there is none. With compact the DOM is
+        restored into a CompactDocument.
+        """
+        path = self.__entry_path(html, elide_whitespace)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            # Modification time tells when the entry was last used.
+            os.utime(path)
+        except OSError:
+            return None
+        try:
+            return deserialize(data, compact)
+        except Exception as e:
+            logging.log("Removing corrupted DOM cache entry", path, e)
+            self.__remove(path)
+            return None
+
+    def store(self, html: str, dom: DocumentType, elide_whitespace: bool = False) -> None:
+        path = self.__entry_path(html, elide_whitespace)
+        try:
+            os.makedirs(self.__path, exist_ok=True)
+            # Written next to the entry and renamed, so readers never see half of it.
+            with open(path + ".tmp", "wb") as file:
+                file.write(serialize(dom))
+            os.replace(path + ".tmp", path)
+            self.__evict()
+        except OSError as e:
+            logging.log("Could not store DOM cache entry", path, e)
+
+    def size(self) -> int:
+        return sum(size for _, _, size in self.__entries())
+
+    def __entries(self) -> List[Tuple[int, str, int]]:
+        entries: List[Tuple[int, str, int]] = []
+        if not os.path.isdir(self.__path):
+            return entries
+        for name in os.listdir(self.__path):
+            path = os.path.join(self.__path, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, path, stat.st_size))
+        return entries
+
+    def __evict(self) -> None:
+        entries = sorted(self.__entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.__max_size:
+                break
+            self.__remove(path)
+            total -= size
+
+    @staticmethod
+    def __remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,4 +1,5 @@
-def log(*args, **kwargs):
-    print(*args, **kwargs)
+from typing import Any
 
 
+def log(*args: Any, **kwargs: Any) -> None:
+    print(*args, **kwargs)
@@ -1,4 +1,5 @@
-from typing import Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, Optional, cast
 import requests
 from requests.models import Response
 import json
@@ -8,6 +9,16 @@ from urllib.parse import urlparse
 from browser.globals import BrowserState
 
 REQUEST_CACHE: Dict[str, Response] = {}
+# Sources of documents which were streamed to the end, by URL, least recently stored first.
+# Sources over the limit in characters are dropped, their pages are streamed again.
+DOCUMENT_SOURCES: Dict[str, str] = {}
+DOCUMENT_SOURCES_SIZE = 32 * 1024 * 1024
+# Responses being fetched in background, request() waits for them instead of fetching again.
+PRELOADS: Dict[str, "Future[Response]"] = {}
+PRELOAD_EXECUTOR = ThreadPoolExecutor(max_workers=6, thread_name_prefix="preload")
+HEADERS = {
+    "User-Agent": "theBrowser/0.4-alpha"
+}
 
 def parse_host(url: str) -> str:
     parsed_uri = urlparse(url)
@@ -34,26 +45,94 @@ def resolve_url(url: str, current: str) -> str:
             dir, _ = dir.rsplit("/", 1)
         return dir + "/" + url
 
+def _get(url: str) -> Response:
+    response = requests.get(url, headers=HEADERS)
+    response.encoding = "UTF-8"
+    # Reading content here keeps the body download in the calling thread.
+    response.content
+    return response
+
+
+def preload(url: str) -> None:
+    """
+    Starts fetching url in background. Inspectors are notified about the request
+    once request() picks up the response.
+    """
+    if not (url.startswith("http://") or url.startswith("https://")):
+        return
+    if url in REQUEST_CACHE or url in PRELOADS:
+        return
+    PRELOADS[url] = PRELOAD_EXECUTOR.submit(_get, url)
+
+
+def cancel_preloads() -> None:
+    """
+    Drops preloads nothing has requested yet, e.g. when navigating away from the page which started them.
+    Fetches which have not started are cancelled, running ones finish but their responses are not kept.
+    """
+    for pending in PRELOADS.values():
+        pending.cancel()
+    PRELOADS.clear()
+
+
 def request(url: str, payload: Optional[dict]=None) -> Response:
     inspectors = BrowserState.get_inspectors()
     if url.startswith("http://") or url.startswith("https://"):
         if REQUEST_CACHE.get(url) and not payload:
             return REQUEST_CACHE.get(url)
-        headers = {
-                "User-Agent": "theBrowser/0.4-alpha"
-            }
         if payload:
-            response = requests.post(url, json=json.dumps(payload), headers=headers)
+            response = requests.post(url, json=json.dumps(payload), headers=HEADERS)
             response.encoding = "UTF-8"
             [inspector.add_network_request(NetworkRequest(url, "POST", response.status_code, len(response.content))) for inspector in inspectors]
         else:
-            response = requests.get(url, headers=headers)
-            response.encoding = "UTF-8"
+            pending = PRELOADS.pop(url, None)
+            response = pending.result() if pending is not None else _get(url)
             [inspector.add_network_request(NetworkRequest(url, "GET", response.status_code, len(response.content))) for inspector in inspectors]
         if not payload:
             REQUEST_CACHE[url] = response
         return response
 
+def stream(url: str, chunk_size: int = 8192) -> Iterator[str]:
+    """
+    Yields decoded chunks of the response body as they arrive from the network. Once the whole
+    body of a successful response is read, its source is kept for cached_source().
+    """
+    source = cached_source(url)
+    if source is not None:
+        yield source
+        return
+    response = requests.get(url, headers=HEADERS, stream=True)
+    response.encoding = "UTF-8"
+    size = 0
+    chunks = []
+    for chunk in response.iter_content(chunk_size=chunk_size, decode_unicode=True):
+        size += len(chunk.encode("UTF-8"))
+        chunks.append(chunk)
+        yield chunk
+    if response.ok:
+        _keep_source(url, "".join(chunks))
+    [inspector.add_network_request(NetworkRequest(url, "GET", response.status_code, size)) for inspector in BrowserState.get_inspectors()]
+
+
+def _keep_source(url: str, source: str) -> None:
+    DOCUMENT_SOURCES.pop(url, None)
+    DOCUMENT_SOURCES[url] = source
+    size = sum(len(kept) for kept in DOCUMENT_SOURCES.values())
+    while size > DOCUMENT_SOURCES_SIZE:
+        oldest = next(iter(DOCUMENT_SOURCES))
+        size -= len(DOCUMENT_SOURCES.pop(oldest))
+
+
+def cached_source(url: str) -> Optional[str]:
+    """
+    Source of the document at url if it has already been fetched, e.g. for reloads and history navigation.
+    """
+    if url in DOCUMENT_SOURCES:
+        return DOCUMENT_SOURCES[url]
+    if REQUEST_CACHE.get(url):
+        return cast(str, REQUEST_CACHE[url].text)
+    return None
+
 
 def load_file(path: str) -> str:
     path = path.split("file://")[-1]
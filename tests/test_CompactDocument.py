@@ -0,0 +1,95 @@
+import contextlib
+import io
+import tempfile
+from unittest import TestCase
+from browser.utils.dom import pre_order
+from browser.utils.dom_cache import DOMCache
+from web.dom.CompactDocument import CompactDocument
+from web.dom.elements import HTMLPElement, Text
+from web.dom.elements.Element import Element
+from web.dom.exceptions.ReadOnlyError import ReadOnlyError
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+HTML = "<!DOCTYPE html><html><head><title>Compact</title></head>" \
+       "<body><!-- note --><p class=\"a\">Hello <b>world</b></p><ul><li>1</li><li>2</li></ul></body></html>"
+
+
+class TestCompactDocument(TestCase):
+
+    def setUp(self):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(HTML).run(documents.append)
+        self.dom = documents[0]
+        self.compact = CompactDocument.fromTree(self.dom)
+
+    def test_from_tree_keeps_structure(self):
+        self.assertEqual(str(self.compact), str(self.dom))
+        self.assertEqual(self.compact.name, "html")
+        self.assertEqual(self.compact.document.nodeCount, len(list(pre_order(self.dom))))
+
+        body = self.compact.children[0].children[1]
+        p = body.children[1]
+        self.assertIsInstance(p, HTMLPElement)
+        self.assertEqual(p.attributes, {"class": "a"})
+        self.assertEqual(body.children[0].data, " note ")
+        self.assertIsInstance(p.children[0], Text)
+        self.assertEqual(p.children[0].data, "Hello ")
+        self.assertEqual(p.children[0].length, 6)
+        self.assertEqual(p.parentNode, body)
+        self.assertIs(self.compact.document.getNodeById(p.id).document, self.compact.document)
+        self.assertIsNone(self.compact.parentNode)
+
+    def test_sibling_links(self):
+        ul = self.compact.children[0].children[1].children[2]
+        first, last = ul.children
+        self.assertEqual(ul.firstChild, first)
+        self.assertEqual(ul.lastChild, last)
+        self.assertEqual(first.nextSibling, last)
+        self.assertEqual(last.previousSibling, first)
+        self.assertIsNone(first.previousSibling)
+        self.assertIsNone(last.nextSibling)
+        self.assertIsNone(first.firstChild.firstChild)
+        self.assertIsNone(self.compact.previousSibling)
+
+    def test_style_is_kept_per_node(self):
+        for node in pre_order(self.compact):
+            node.style = {"color": node.name or "text"}
+        for node in pre_order(self.compact):
+            self.assertEqual(node.style, {"color": node.name or "text"})
+
+    def test_is_read_only(self):
+        body = self.compact.children[0].children[1]
+        with self.assertRaises(ReadOnlyError):
+            body.appendChild(body.children[0])
+        with self.assertRaises(ReadOnlyError):
+            body.children[1].children[0].appendData("a")
+        with self.assertRaises(ReadOnlyError):
+            self.compact.name = "svg"
+        with self.assertRaises(TypeError):
+            body.attributes["id"] = "body"
+
+    def test_descendant_ids(self):
+        nodes = list(pre_order(self.compact))
+        self.assertEqual(list(self.compact.document.descendantIds()), [node.id for node in nodes])
+        ul = [node for node in nodes if node.name == "ul"][0]
+        self.assertEqual([self.compact.document.getNodeById(node_id).name
+                          for node_id in self.compact.document.descendantIds(ul.id)], ["ul", "li", None, "li", None])
+
+    def test_element_lookups(self):
+        document = self.compact.document
+        self.assertEqual([element.name for element in document.getElementsByTagName("li")], ["li", "li"])
+        self.assertEqual(document.getElementsByClassName("a")[0].name, "p")
+        self.assertIsNone(document.getElementById("missing"))
+        self.assertTrue(document.getElementsByTagName("p")[0].isConnected)
+
+    def test_restores_from_dom_cache(self):
+        with tempfile.TemporaryDirectory() as path:
+            cache = DOMCache(path)
+            cache.store(HTML, self.dom)
+            restored = cache.load(HTML, compact=True)
+
+        self.assertIsInstance(restored.document, CompactDocument)
+        self.assertEqual(str(restored), str(self.dom))
+        self.assertTrue(all(isinstance(node, Element) for node in list(pre_order(restored))[1:]
+                            if node.name is not None))
@@ -0,0 +1,100 @@
+import contextlib
+import io
+import os
+import pickle
+import tempfile
+import zlib
+from unittest import TestCase
+from browser.utils.dom_cache import DOMCache
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+HTML = "<!DOCTYPE html><html><head><title>Cached</title></head>" \
+       "<body><!-- note --><p class=\"a\">Hello <b>world</b></p><ul><li>1</li><li>2</li></ul></body></html>"
+
+
+class TestDOMCache(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def _parse(html):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(html).run(documents.append)
+        return documents[0]
+
+    def test_restores_stored_dom(self):
+        cache = DOMCache(self.path)
+        self.assertIsNone(cache.load(HTML))
+
+        dom = self._parse(HTML)
+        cache.store(HTML, dom)
+        restored = cache.load(HTML)
+
+        self.assertIsNotNone(restored)
+        self.assertEqual(str(restored), str(dom))
+        self.assertEqual(restored.name, "html")
+        body = restored.children[0].children[1]
+        self.assertEqual(body.name, "body")
+        self.assertIs(body.parentNode, restored.children[0])
+        self.assertEqual(body.children[1].attributes, {"class": "a"})
+
+    def test_changed_source_misses(self):
+        cache = DOMCache(self.path)
+        cache.store(HTML, self._parse(HTML))
+
+        self.assertIsNone(cache.load(HTML.replace("Hello", "Bye")))
+        self.assertIsNone(cache.load(HTML, elide_whitespace=True))
+
+    def test_evicts_least_recently_used(self):
+        documents = [HTML.replace("Hello", f"Hello {i}") for i in range(3)]
+        cache = DOMCache(self.path)
+        cache.store(documents[0], self._parse(documents[0]))
+        entry_size = cache.size()
+
+        cache = DOMCache(self.path, max_size=entry_size * 2 + entry_size // 2)
+        cache.store(documents[1], self._parse(documents[1]))
+        for path, mtime in zip(sorted(os.scandir(self.path), key=lambda entry: entry.stat().st_mtime_ns), (1, 2)):
+            os.utime(path.path, ns=(mtime, mtime))
+        # Using the oldest entry makes the other one least recently used.
+        self.assertIsNotNone(cache.load(documents[0]))
+        cache.store(documents[2], self._parse(documents[2]))
+
+        self.assertLessEqual(cache.size(), entry_size * 2 + entry_size // 2)
+        self.assertIsNotNone(cache.load(documents[0]))
+        self.assertIsNone(cache.load(documents[1]))
+        self.assertIsNotNone(cache.load(documents[2]))
+
+    def test_corrupted_entry_is_removed(self):
+        cache = DOMCache(self.path)
+        cache.store(HTML, self._parse(HTML))
+        for entry in os.scandir(self.path):
+            with open(entry.path, "wb") as file:
+                file.write(b"garbage")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(cache.load(HTML))
+        self.assertEqual(cache.size(), 0)
+
+    def test_entries_are_not_unpickled(self):
+        cache = DOMCache(self.path)
+        cache.store(HTML, self._parse(HTML))
+        for entry in os.scandir(self.path):
+            with open(entry.path, "wb") as file:
+                file.write(zlib.compress(pickle.dumps((os.system, ("exit 1",)))))
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertIsNone(cache.load(HTML))
+        self.assertEqual(cache.size(), 0)
+
+    def test_restores_text_with_lone_surrogates(self):
+        html = HTML.replace("Hello", "Hello \ud800")
+        cache = DOMCache(self.path)
+        dom = self._parse(html)
+        cache.store(html, dom)
+        self.assertEqual(str(cache.load(html)), str(dom))
@@ -0,0 +1,190 @@
+import contextlib
+import gc
+import io
+from unittest import TestCase
+from browser.utils.dom import pre_order
+from web.dom.Document import Document
+from web.dom.ElementFactory import ElementFactory
+from web.dom.elements.Text import Text
+from web.html.parser.HTMLToken import HTMLTag, HTMLToken
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+
+class TestDocument(TestCase):
+
+    @staticmethod
+    def _parse(html):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(html).run(documents.append)
+        return documents[0]
+
+    def test_node_ids_are_unique_within_document(self):
+        dom = self._parse("<!DOCTYPE html><html><head></head><body><p>a <b>b</b></p><!-- c --></body></html>")
+        nodes = list(pre_order(dom))
+        ids = [node.id for node in nodes]
+
+        self.assertTrue(all(isinstance(node_id, int) for node_id in ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        for node in nodes:
+            self.assertIs(dom.document.getNodeById(node.id), node)
+
+    def test_removed_node_is_dropped_from_id_map(self):
+        document = Document()
+        text = Text(document, None, "a")
+        text_id = text.id
+        self.assertIs(document.getNodeById(text_id), text)
+
+        del text
+        gc.collect()
+        self.assertIsNone(document.getNodeById(text_id))
+        self.assertNotEqual(Text(document, None, "b").id, text_id)
+
+    @staticmethod
+    def _create_element(document, parent, name, attributes=None):
+        token = HTMLTag(HTMLToken.TokenType.StartTag)
+        token.name = name
+        token.attributes = attributes or {}
+        element = ElementFactory.create_element(token, parent, document)
+        if parent is not None:
+            parent.appendChild(element)
+        return element
+
+    def test_indexes_parsed_elements(self):
+        dom = self._parse("<!DOCTYPE html><html><head><link rel=stylesheet href=a.css></head><body>"
+                          "<p id=first class=\"a b\">1</p><div><p class=b>2</p></div><p id=first>3</p></body></html>")
+        document = dom.document
+
+        self.assertEqual(document.getElementById("first").children[0].data, "1")
+        self.assertIsNone(document.getElementById("missing"))
+        self.assertEqual([p.children[0].data for p in document.getElementsByTagName("P")], ["1", "2", "3"])
+        self.assertEqual([p.children[0].data for p in document.getElementsByClassName("b")], ["1", "2"])
+        self.assertEqual([p.children[0].data for p in document.getElementsByClassName("b a")], ["1"])
+        self.assertEqual(len(document.getElementsByTagName("link")), 1)
+        self.assertEqual([element.name for element in document.getElementsByTagName("*")][:4],
+                         ["html", "head", "link", "body"])
+
+    def test_indexes_follow_mutations(self):
+        dom = self._parse("<!DOCTYPE html><html><head></head><body><div id=a></div><div id=b></div></body></html>")
+        document = dom.document
+        body = document.getElementsByTagName("body")[0]
+        first, second = body.children
+
+        # Inserted before existing elements, lookups still return tree order.
+        span = self._create_element(document, None, "span", {"class": "x"})
+        span.parentNode = second
+        second.appendChild(span)
+        inner = self._create_element(document, first, "span", {"class": "x"})
+        self.assertEqual(document.getElementsByClassName("x"), [inner, span])
+
+        body.removeChild(first)
+        first.parentNode = None
+        self.assertIsNone(document.getElementById("a"))
+        self.assertEqual(document.getElementsByTagName("span"), [span])
+
+        second.setAttribute("id", "c")
+        self.assertIsNone(document.getElementById("b"))
+        self.assertIs(document.getElementById("c"), second)
+        span.setAttribute("class", "y")
+        self.assertEqual(document.getElementsByClassName("x"), [])
+        self.assertEqual(document.getElementsByClassName("y"), [span])
+        span.removeAttribute("class")
+        self.assertEqual(document.getElementsByClassName("y"), [])
+
+        body.replaceChildren(first)
+        self.assertIs(document.getElementById("a"), first)
+        self.assertIsNone(document.getElementById("c"))
+
+    def test_disconnected_elements_are_not_indexed(self):
+        dom = self._parse("<!DOCTYPE html><html><head></head><body><div></div></body></html>")
+        document = dom.document
+        div = document.getElementsByTagName("div")[0]
+
+        nodes = HTMLDocumentParser.parse_fragment(div, "<p id=fragment>text</p>")
+        self.assertIsNone(document.getElementById("fragment"))
+        self.assertFalse(nodes[0].isConnected)
+
+        div.replaceChildren(*nodes)
+        self.assertTrue(nodes[0].isConnected)
+        self.assertIs(document.getElementById("fragment"), nodes[0])
+
+    def test_inserted_subtree_is_indexed_in_tree_order(self):
+        dom = self._parse("<!DOCTYPE html><html><head></head><body><div></div></body></html>")
+        document = dom.document
+        div = document.getElementsByTagName("div")[0]
+
+        div.replaceChildren(*HTMLDocumentParser.parse_fragment(div, "<p><b class=x id=1></b><i class=x id=2></i></p>"))
+        self.assertEqual([element.name for element in document.getElementsByClassName("x")], ["b", "i"])
+        self.assertEqual([element.name for element in document.getElementsByTagName("*")][3:], ["div", "p", "b", "i"])
+
+    def test_sibling_links_follow_mutations(self):
+        document = Document()
+        parent = self._create_element(document, None, "ul")
+        a, c = self._create_element(document, parent, "li"), self._create_element(document, parent, "li")
+        b = self._create_element(document, None, "li")
+        b.parentNode = parent
+        parent.appendChildBeforeElement(b, c)
+        self.assertEqual(parent.children, [a, b, c])
+        self.assertIs(parent.firstChild, a)
+        self.assertIs(b.previousSibling, a)
+        self.assertIs(b.nextSibling, c)
+
+        parent.removeChild(b)
+        self.assertEqual(parent.children, [a, c])
+        self.assertIs(a.nextSibling, c)
+        self.assertIs(c.previousSibling, a)
+        self.assertIsNone(b.previousSibling)
+        with self.assertRaises(ValueError):
+            parent.removeChild(b)
+
+        other = self._create_element(document, None, "ul")
+        self._create_element(document, other, "li")
+        middle = self._create_element(document, other, "li")
+        self._create_element(document, other, "li")
+        with self.assertRaises(ValueError):
+            parent.removeChild(middle)
+        with self.assertRaises(ValueError):
+            parent.appendChildBeforeElement(b, middle)
+        self.assertEqual(len(other.children), 3)
+        self.assertIs(middle.parentNode, other)
+
+        parent.removeChild(a)
+        parent.removeChild(c)
+        self.assertEqual(parent.children, [])
+        self.assertIsNone(parent.firstChild)
+        self.assertIsNone(parent.lastChild)
+        self.assertIsNone(a.parentNode)
+
+    def test_appending_a_child_moves_it(self):
+        document = Document()
+        p, q = self._create_element(document, None, "ul"), self._create_element(document, None, "ul")
+        a, b, c = (self._create_element(document, p, "li") for _ in range(3))
+        d = self._create_element(document, q, "li")
+        q.appendChild(b)
+        self.assertEqual(p.children, [a, c])
+        self.assertIs(a.nextSibling, c)
+        self.assertEqual(q.children, [d, b])
+        self.assertIs(b.parentNode, q)
+
+        q.appendChildBeforeElement(c, d)
+        self.assertEqual(p.children, [a])
+        self.assertEqual(q.children, [c, d, b])
+        self.assertIs(p.lastChild, a)
+
+    def test_reappending_a_child_moves_it_to_the_end(self):
+        document = Document()
+        parent = self._create_element(document, None, "ul")
+        a, b, c = (self._create_element(document, parent, "li") for _ in range(3))
+        parent.appendChild(a)
+        self.assertEqual(parent.children, [b, c, a])
+        parent.appendChild(a)
+        self.assertEqual(parent.children, [b, c, a])
+        parent.appendChildBeforeElement(a, b)
+        self.assertEqual(parent.children, [a, b, c])
+        parent.appendChildBeforeElement(c, b)
+        self.assertEqual(parent.children, [a, c, b])
+        parent.appendChildBeforeElement(c, c)
+        self.assertEqual(parent.children, [a, c, b])
+        self.assertIs(parent.firstChild, a)
+        self.assertIs(parent.lastChild, b)
+        self.assertIs(b.previousSibling, c)
@@ -0,0 +1,134 @@
+import contextlib
+import gc
+import io
+import weakref
+from unittest import TestCase
+from web.dom.CompactDocument import CompactDocument
+from web.dom.Document import Document
+from web.dom.ElementFactory import ElementFactory
+from web.dom.events.Event import Event, EventInit
+from web.dom.events.EventListener import EventListener
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+from web.html.parser.HTMLToken import HTMLTag, HTMLToken
+
+
+class TestEventTarget(TestCase):
+
+    def setUp(self):
+        self.document = Document()
+        self.root = self._create_element(None, "div")
+        self.parent = self._create_element(self.root, "p")
+        self.target = self._create_element(self.parent, "b")
+        self.calls = []
+
+    def _create_element(self, parent, name):
+        token = HTMLTag(HTMLToken.TokenType.StartTag)
+        token.name = name
+        token.attributes = {}
+        element = ElementFactory.create_element(token, parent, self.document)
+        if parent is not None:
+            parent.appendChild(element)
+        return element
+
+    def _listen(self, node, capture=False, action=None):
+        def listener(event):
+            self.calls.append((node.name, event.event_phase))
+            if action is not None:
+                action(event)
+        node.add_event_listener("click", listener, capture)
+        return listener
+
+    def test_capture_target_and_bubble_phases(self):
+        for node in (self.root, self.parent, self.target):
+            self._listen(node)
+            self._listen(node, capture=True)
+
+        event = Event("click", EventInit(bubbles=True))
+        self.assertTrue(self.target.dispatch_event(event))
+        self.assertEqual(self.calls, [("div", Event.CAPTURING_PHASE), ("p", Event.CAPTURING_PHASE),
+                                      ("b", Event.AT_TARGET), ("b", Event.AT_TARGET),
+                                      ("p", Event.BUBBLING_PHASE), ("div", Event.BUBBLING_PHASE)])
+        self.assertIs(event.target, self.target)
+        self.assertEqual(event.event_phase, Event.NONE)
+        self.assertIsNone(event.current_target)
+
+        self.calls = []
+        self.target.dispatch_event(Event("click"))
+        self.assertEqual([name for name, _ in self.calls], ["div", "p", "b", "b"])
+
+    def test_stop_propagation_and_prevent_default(self):
+        self._listen(self.root)
+        self._listen(self.parent, action=lambda event: event.stop_immediate_propagation())
+        self._listen(self.parent, capture=False, action=lambda event: event.prevent_default())
+        self.parent.add_event_listener("click", lambda event: self.calls.append("second"))
+
+        self.assertTrue(self.target.dispatch_event(Event("click", EventInit(bubbles=True))))
+        self.assertEqual(self.calls, [("p", Event.BUBBLING_PHASE)])
+
+        self.calls = []
+        self._listen(self.target, action=lambda event: event.prevent_default())
+        self.assertFalse(self.target.dispatch_event(Event("click", EventInit(bubbles=True, cancelable=True))))
+        self.assertTrue(self.target.dispatch_event(Event("click", EventInit(bubbles=True))))
+
+    def test_adding_and_removing_listeners(self):
+        listener = self._listen(self.target)
+        self.target.add_event_listener("click", listener)
+        self.target.add_event_listener("click", lambda event: self.calls.append("once"), once=True)
+
+        class Listener(EventListener):
+            def handle_event(listener, event):
+                self.calls.append("object")
+                # Listeners added during a dispatch are called by the next one.
+                self.target.add_event_listener("click", lambda event: self.calls.append("added"))
+        self.target.add_event_listener("click", Listener())
+
+        self.target.dispatch_event(Event("click"))
+        self.assertEqual(self.calls, [("b", Event.AT_TARGET), "once", "object"])
+
+        self.calls = []
+        self.target.remove_event_listener("click", listener)
+        self.target.remove_event_listener("click", listener, capture=True)
+        self.target.dispatch_event(Event("click"))
+        self.assertEqual(self.calls, ["object", "added"])
+
+    def test_paths_follow_tree_mutations(self):
+        self.assertEqual(self.target.event_path(), (self.target, self.parent, self.root))
+        self.assertIs(self.target.event_path(), self.target.event_path())
+
+        self.root.removeChild(self.parent)
+        self.parent.parentNode = None
+        self.assertEqual(self.target.event_path(), (self.target, self.parent))
+
+        self._listen(self.root)
+        self.target.dispatch_event(Event("click", EventInit(bubbles=True)))
+        self.assertEqual(self.calls, [])
+        self.assertEqual(Event("click").composed_path(), ())
+
+    @staticmethod
+    def _parse(html):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(html).run(documents.append)
+        return documents[0]
+
+    def test_dispatching_does_not_keep_the_tree_alive(self):
+        dom = self._parse("<!DOCTYPE html><html><head></head><body><a href=x>link</a></body></html>")
+        link = dom.document.getElementsByTagName("a")[0]
+        link.add_event_listener("click", lambda event: self.calls.append(link.name))
+        link.children[0].dispatch_event(Event("click", EventInit(bubbles=True)))
+        self.assertEqual(self.calls, ["a"])
+
+        root = weakref.ref(dom)
+        del dom, link
+        gc.collect()
+        self.assertIsNone(root())
+
+    def test_listeners_of_compact_documents_are_kept_by_the_document(self):
+        dom = self._parse("<!DOCTYPE html><html><head></head><body><p>text</p></body></html>")
+        compact = CompactDocument.fromTree(dom)
+        compact.add_event_listener("click", lambda event: self.calls.append(event.current_target.name))
+
+        # Views are made on every access, the listener is found by the one on the event path.
+        paragraph = compact.document.getElementsByTagName("p")[0]
+        paragraph.children[0].dispatch_event(Event("click", EventInit(bubbles=True)))
+        self.assertEqual(self.calls, ["html"])
@@ -0,0 +1,116 @@
+from unittest import TestCase
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+
+class TestHTMLDocumentParser(TestCase):
+
+    def setUp(self):
+        self.documents = []
+
+    def test_parse_slice_stops_after_max_tokens(self):
+        parser = HTMLDocumentParser(cb=self.documents.append)
+        parser.append_input("<!DOCTYPE html><html><body>" + "<p>a</p>" * 100 + "</body></html>")
+        parser.close_input()
+
+        self.assertTrue(parser.parse_slice(max_tokens=10))
+        self.assertFalse(parser.finished)
+        self.assertGreater(parser.progress, 0)
+        self.assertLess(parser.progress, 1)
+        self.assertEqual(self.documents, [])
+
+        slices = 1
+        while parser.parse_slice(max_tokens=10):
+            slices += 1
+        self.assertGreater(slices, 10)
+        self.assertTrue(parser.finished)
+        self.assertEqual(parser.progress, 1)
+        self.assertEqual(len(self.documents), 1)
+
+    def test_parse_slice_waits_for_input(self):
+        parser = HTMLDocumentParser(cb=self.documents.append)
+        parser.append_input("<!DOCTYPE html><html><body><p>a")
+
+        self.assertFalse(parser.parse_slice(max_time=1))
+        self.assertFalse(parser.finished)
+
+        parser.append_input("</p></body></html>")
+        parser.close_input()
+        self.assertFalse(parser.parse_slice(max_time=1))
+        self.assertTrue(parser.finished)
+        self.assertEqual(len(self.documents), 1)
+
+    def test_progress_callback_after_parsed_characters(self):
+        partial_documents = []
+        parser = HTMLDocumentParser(
+            cb=self.documents.append,
+            progress_cb=partial_documents.append,
+            progress_characters=1000)
+        parser.feed("<!DOCTYPE html>")
+        for _ in range(10):
+            parser.feed("<p>" + "a" * 500 + "</p>")
+        self.assertGreaterEqual(len(partial_documents), 4)
+        self.assertEqual(self.documents, [])
+
+        parser.close()
+        self.assertEqual(len(self.documents), 1)
+        self.assertIs(partial_documents[0], self.documents[0])
+
+    def test_progress_callback_is_not_called_without_thresholds(self):
+        partial_documents = []
+        parser = HTMLDocumentParser("<!DOCTYPE html><p>a</p>", progress_cb=partial_documents.append)
+        parser.run(self.documents.append)
+        self.assertEqual(partial_documents, [])
+        self.assertEqual(len(self.documents), 1)
+
+    def test_text_is_merged_into_single_node(self):
+        parser = HTMLDocumentParser(
+            "<!DOCTYPE html><html><head></head><body><pre>" + "a &lt; b\n" * 1000 + "</pre></body></html>")
+        parser.run(self.documents.append)
+
+        html = self.documents[0].children[0]
+        pre = html.children[-1].children[0]
+        self.assertEqual(pre.name, "pre")
+        self.assertEqual(len(pre.children), 1)
+        self.assertEqual(pre.children[0].length, len("a < b\n") * 1000)
+        self.assertEqual(pre.children[0].data, "a < b\n" * 1000)
+
+    def test_elide_whitespace(self):
+        parser = HTMLDocumentParser(
+            "<!DOCTYPE html><html><head></head><body>\n  <div>\n    <span>a</span> <span>b</span>\n  </div>\n"
+            "  <pre>\n</pre>\n</body></html>",
+            elide_whitespace=True)
+        parser.run(self.documents.append)
+
+        body = self.documents[0].children[0].children[-1]
+        self.assertEqual([child.name for child in body.children], ["div", "pre"])
+        div, pre = body.children
+        self.assertEqual([child.name for child in div.children], ["span", None, "span", None])
+        self.assertEqual(div.children[1].data, " ")
+        self.assertEqual(len(pre.children), 1)
+
+    def test_parse_fragment(self):
+        parser = HTMLDocumentParser("<!DOCTYPE html><html><head></head><body><div><p>old</p></div></body></html>")
+        parser.run(self.documents.append)
+        div = self.documents[0].children[0].children[-1].children[0]
+        self.assertEqual(div.name, "div")
+
+        nodes = HTMLDocumentParser.parse_fragment(div, "<p>a</p>b<b>c")
+        self.assertEqual([node.name for node in nodes], ["p", None, "b"])
+        self.assertTrue(all(node.parentNode is None for node in nodes))
+        self.assertEqual(nodes[1].data, "b")
+        self.assertIs(nodes[0].document, div.document)
+
+        old_paragraph = div.children[0]
+        div.replaceChildren(*nodes)
+        self.assertEqual(div.children, nodes)
+        self.assertTrue(all(node.parentNode is div for node in nodes))
+        self.assertIsNone(old_paragraph.parentNode)
+
+    def test_parse_fragment_in_rcdata_context(self):
+        parser = HTMLDocumentParser("<!DOCTYPE html><html><head></head><body><textarea></textarea></body></html>")
+        parser.run(self.documents.append)
+        textarea = self.documents[0].children[0].children[-1].children[0]
+
+        nodes = HTMLDocumentParser.parse_fragment(textarea, "<b>a &amp; b</b>")
+        self.assertEqual(len(nodes), 1)
+        self.assertEqual(nodes[0].data, "<b>a & b</b>")
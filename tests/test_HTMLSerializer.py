@@ -0,0 +1,54 @@
+import contextlib
+import io
+from unittest import TestCase
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+from web.html.serializer.HTMLSerializer import HTMLSerializer
+
+
+class TestHTMLSerializer(TestCase):
+
+    @staticmethod
+    def _parse(html):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(html).run(documents.append)
+        return documents[0]
+
+    def test_serializes_document(self):
+        html = "<!DOCTYPE html><html><head><title>A</title></head>" \
+               "<body><p class=\"x\">Hello <b>world</b></p><!-- note --></body></html>"
+        stream = io.StringIO()
+        HTMLSerializer(stream).serialize(self._parse(html))
+        self.assertEqual(stream.getvalue(), html)
+
+    def test_escapes_text_and_attributes(self):
+        body = self._parse("<!DOCTYPE html><html><head></head><body>"
+                           "<p title='a \"&\" <b>'>1 &lt; 2 &amp;&nbsp;3</p></body></html>").children[0].children[1]
+        self.assertEqual(body.innerHTML, "<p title=\"a &quot;&amp;&quot; &lt;b&gt;\">1 &lt; 2 &amp;&nbsp;3</p>")
+
+    def test_raw_text_and_void_elements(self):
+        dom = self._parse("<!DOCTYPE html><html><head><style>a > b {}</style></head>"
+                          "<body><br><img src=a.png><script>if (a < b) {}</script></body></html>")
+        head, body = dom.children[0].children
+        self.assertEqual(head.outerHTML, "<head><style>a > b {}</style></head>")
+        self.assertEqual(body.innerHTML, "<br><img src=\"a.png\"><script>if (a < b) {}</script>")
+
+    def test_template_content(self):
+        dom = self._parse("<!DOCTYPE html><html><head><template><p>a</p></template></head><body></body></html>")
+        template = dom.children[0].children[0].children[0]
+        for node in HTMLDocumentParser.parse_fragment(dom.children[0].children[1], "<p>a</p>"):
+            template.content.appendChild(node)
+        self.assertEqual(template.children, [])
+        self.assertEqual(template.outerHTML, "<template><p>a</p></template>")
+
+    def test_deep_trees(self):
+        dom = self._parse("<!DOCTYPE html><html><head></head><body>" + "<div>" * 2000 + "</body></html>")
+        body = dom.children[0].children[1]
+        self.assertEqual(body.innerHTML, "<div>" * 2000 + "</div>" * 2000)
+        self.assertEqual(body.printTree().count("<div {}>"), 2000)
+
+    def test_debug_dumps(self):
+        p = self._parse("<!DOCTYPE html><html><head></head><body><p>a <b>b</b></p></body></html>") \
+            .children[0].children[1].children[0]
+        self.assertEqual(str(p), "<p {}>\n\t<TEXT>a </TEXT>\n\n\t<b {}>\n\t\t<TEXT>b</TEXT>\n\t</b>\n</p>\n")
+        self.assertEqual(p.get_contents(), "<p {}><TEXT>a</TEXT>\n<b {}><TEXT>b</TEXT>\n</b></p>")
@@ -137,10 +137,9 @@ class TestHTMLTokenizer(TestCase):
         self.assertEqual(token.name, "script")
         self.assertEqual(token.attributes, {})
 
-        for code_point in "var x = 1;":
-            token = tokenizer.next_token()
-            self.assertEqual(token.type, HTMLToken.TokenType.Character)
-            self.assertEqual(token.data, code_point)
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.Character)
+        self.assertEqual(token.data, "var x = 1;")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
@@ -164,11 +163,7 @@ class TestHTMLTokenizer(TestCase):
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "h")
-
-        token = tokenizer.next_token()
-        self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "i")
+        self.assertEqual(token.data, "hi")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
@@ -192,11 +187,7 @@ class TestHTMLTokenizer(TestCase):
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "h")
-
-        token = tokenizer.next_token()
-        self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "i")
+        self.assertEqual(token.data, "hi")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
@@ -220,11 +211,7 @@ class TestHTMLTokenizer(TestCase):
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "h")
-
-        token = tokenizer.next_token()
-        self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "i")
+        self.assertEqual(token.data, "hi")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
@@ -235,10 +222,9 @@ class TestHTMLTokenizer(TestCase):
         self.assertEqual(token.name, "div")
         self.assertEqual(token.attributes, {"class": "bar"})
 
-        for code_point in "bye":
-            token = tokenizer.next_token()
-            self.assertEqual(token.type, HTMLToken.TokenType.Character)
-            self.assertEqual(token.data, code_point)
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.Character)
+        self.assertEqual(token.data, "bye")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
@@ -262,11 +248,7 @@ class TestHTMLTokenizer(TestCase):
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "h")
-
-        token = tokenizer.next_token()
-        self.assertEqual(token.type, HTMLToken.TokenType.Character)
-        self.assertEqual(token.data, "i")
+        self.assertEqual(token.data, "hi")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
@@ -318,10 +300,9 @@ class TestHTMLTokenizer(TestCase):
         self.assertEqual(token.type, HTMLToken.TokenType.Comment)
         self.assertEqual(token.data, " <!-- nested ")
 
-        for code_point in " -->":
-            token = tokenizer.next_token()
-            self.assertEqual(token.type, HTMLToken.TokenType.Character)
-            self.assertEqual(token.data, code_point)
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.Character)
+        self.assertEqual(token.data, " -->")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EOF)
@@ -358,10 +339,9 @@ class TestHTMLTokenizer(TestCase):
         self.assertEqual(token.name, "script")
         self.assertEqual(token.attributes, {})
 
-        for code_point in "var x = 1;":
-            token = tokenizer.next_token()
-            self.assertEqual(token.type, HTMLToken.TokenType.Character)
-            self.assertEqual(token.data, code_point)
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.Character)
+        self.assertEqual(token.data, "var x = 1;")
 
         token = tokenizer.next_token()
         self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
@@ -376,4 +356,166 @@ class TestHTMLTokenizer(TestCase):
         self.assertEqual(tokenizer.state, HTMLTokenizer.State.Data)
 
         token = tokenizer.next_token()
-        self.assertEqual(token, None)
\ No newline at end of file
+        self.assertEqual(token, None)
+
+    def test_character_run_is_single_token(self):
+        tokenizer = HTMLTokenizer("Hello world!\n<br>")
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.Character)
+        self.assertEqual(token.data, "Hello world!\n")
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.StartTag)
+        self.assertEqual(token.name, "br")
+
+    def test_character_run_split_on_less_than_sign(self):
+        tokenizer = HTMLTokenizer("a<1b")
+
+        for data in ["a", "<", "1b"]:
+            token = tokenizer.next_token()
+            self.assertEqual(token.type, HTMLToken.TokenType.Character)
+            self.assertEqual(token.data, data)
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.EOF)
+
+    def test_rawtext_character_run(self):
+        tokenizer = HTMLTokenizer("p { color: red; } a < b</style>")
+        tokenizer.switch_state_to(tokenizer.State.RAWTEXT)
+        tokenizer._last_emitted_start_tag_name = "style"
+
+        for data in ["p { color: red; } a ", "<", " b"]:
+            token = tokenizer.next_token()
+            self.assertEqual(token.type, HTMLToken.TokenType.Character)
+            self.assertEqual(token.data, data)
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
+        self.assertEqual(token.name, "style")
+
+    def test_named_character_reference(self):
+        tokenizer = HTMLTokenizer("a &amp; b &sect;")
+
+        data = ""
+        token = tokenizer.next_token()
+        while token.type == HTMLToken.TokenType.Character:
+            data += token.data
+            token = tokenizer.next_token()
+
+        self.assertEqual(data, "a & b §")
+        self.assertEqual(token.type, HTMLToken.TokenType.EOF)
+
+    def test_named_character_reference_longest_match(self):
+        tokenizer = HTMLTokenizer("&notin; &notit;")
+
+        data = ""
+        token = tokenizer.next_token()
+        while token.type == HTMLToken.TokenType.Character:
+            data += token.data
+            token = tokenizer.next_token()
+
+        self.assertEqual(data, "∉ ¬it;")
+
+    def test_named_character_reference_is_case_sensitive(self):
+        tokenizer = HTMLTokenizer("&AMP;&aMp;")
+
+        data = ""
+        token = tokenizer.next_token()
+        while token.type == HTMLToken.TokenType.Character:
+            data += token.data
+            token = tokenizer.next_token()
+
+        self.assertEqual(data, "&&aMp;")
+
+    def test_named_character_reference_in_attribute_value(self):
+        tokenizer = HTMLTokenizer("<a href=\"?a=1&amp;b=2&copy=3&not\">")
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.StartTag)
+        self.assertEqual(token.attributes, {"href": "?a=1&b=2&copy=3¬"})
+
+
+    def test_duplicate_attribute_is_dropped(self):
+        tokenizer = HTMLTokenizer("<div id=a class=\"b\" ID=\"c&amp;\" class>")
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.StartTag)
+        self.assertEqual(token.attributes, {"id": "a", "class": "b"})
+
+    def test_attribute_without_value(self):
+        tokenizer = HTMLTokenizer("<input disabled checked=\"\">")
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.attributes, {"disabled": "", "checked": ""})
+
+    def test_feed_chunk_boundary_inside_tag(self):
+        tokenizer = HTMLTokenizer(incremental=True)
+        tokenizer.feed("<di")
+        self.assertIsNone(tokenizer.next_token())
+        tokenizer.feed("v class=\"a")
+        self.assertIsNone(tokenizer.next_token())
+        tokenizer.feed("b\">")
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.StartTag)
+        self.assertEqual(token.name, "div")
+        self.assertEqual(token.attributes, {"class": "ab"})
+
+        tokenizer.close()
+        self.assertEqual(tokenizer.next_token().type, HTMLToken.TokenType.EOF)
+
+    def test_feed_chunk_boundary_inside_entity(self):
+        tokenizer = HTMLTokenizer(incremental=True)
+        tokenizer.feed("&no")
+        self.assertIsNone(tokenizer.next_token())
+        tokenizer.feed("t")
+        self.assertIsNone(tokenizer.next_token())
+        tokenizer.feed("in;")
+        tokenizer.close()
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.Character)
+        self.assertEqual(token.data, "∉")
+        self.assertEqual(tokenizer.next_token().type, HTMLToken.TokenType.EOF)
+
+    def test_feed_chunk_boundary_inside_script_end_tag(self):
+        tokenizer = HTMLTokenizer(incremental=True)
+        tokenizer.feed("var x = 1;</scr")
+        tokenizer.switch_state_to(HTMLTokenizer.State.ScriptData)
+        tokenizer._last_emitted_start_tag_name = "script"
+
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.Character)
+        self.assertEqual(token.data, "var x = 1;")
+        self.assertIsNone(tokenizer.next_token())
+
+        tokenizer.feed("ipt>")
+        token = tokenizer.next_token()
+        self.assertEqual(token.type, HTMLToken.TokenType.EndTag)
+        self.assertEqual(token.name, "script")
+
+    def test_feed_after_close(self):
+        tokenizer = HTMLTokenizer(incremental=True)
+        tokenizer.close()
+        with self.assertRaises(ValueError):
+            tokenizer.feed("a")
+
+    def test_reuse_tokens(self):
+        tokenizer = HTMLTokenizer("a<!--b--><br>c<!---->", reuse_tokens=True)
+
+        tokens = []
+        token = tokenizer.next_token()
+        while token.type != HTMLToken.TokenType.EOF:
+            tokens.append((token, token.type, getattr(token, "data", None)))
+            token = tokenizer.next_token()
+
+        self.assertEqual([(token_type, data) for _, token_type, data in tokens], [
+            (HTMLToken.TokenType.Character, "a"),
+            (HTMLToken.TokenType.Comment, "b"),
+            (HTMLToken.TokenType.StartTag, None),
+            (HTMLToken.TokenType.Character, "c"),
+            (HTMLToken.TokenType.Comment, None),
+        ])
+        self.assertIs(tokens[0][0], tokens[3][0])
+        self.assertIs(tokens[1][0], tokens[4][0])
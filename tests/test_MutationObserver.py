@@ -0,0 +1,119 @@
+from unittest import TestCase
+from unittest.mock import PropertyMock, patch
+from web.dom.CharacterData import CharacterData
+from web.dom.Document import Document
+from web.dom.ElementFactory import ElementFactory
+from web.dom.MutationObserver import MutationObserver, MutationObserverInit
+from web.dom.elements.Text import Text
+from web.html.parser.HTMLToken import HTMLTag, HTMLToken
+
+
+class TestMutationObserver(TestCase):
+
+    def setUp(self):
+        self.document = Document()
+        self.root = self._create_element(None, "div")
+        self.batches = []
+        self.observer = MutationObserver(lambda records, observer: self.batches.append(records))
+
+    def tearDown(self):
+        self.observer.disconnect()
+        MutationObserver.setScheduler(None)
+
+    def _create_element(self, parent, name, attributes=None):
+        token = HTMLTag(HTMLToken.TokenType.StartTag)
+        token.name = name
+        token.attributes = attributes or {}
+        element = ElementFactory.create_element(token, parent, self.document)
+        if parent is not None:
+            parent.appendChild(element)
+        return element
+
+    def test_records_are_delivered_in_one_batch(self):
+        self.observer.observe(self.root, MutationObserverInit(childList=True))
+        first = self._create_element(self.root, "p")
+        second = self._create_element(self.root, "p")
+        self.root.removeChild(first)
+        self.assertEqual(self.batches, [])
+
+        MutationObserver.notify()
+        self.assertEqual(len(self.batches), 1)
+        added, added_second, removed = self.batches[0]
+        self.assertEqual(added.type, "childList")
+        self.assertEqual(added.addedNodes, [first])
+        self.assertEqual(added_second.previousSibling, first)
+        self.assertEqual(removed.removedNodes, [first])
+        self.assertIsNone(removed.previousSibling)
+        self.assertIs(removed.nextSibling, second)
+
+        MutationObserver.notify()
+        self.assertEqual(len(self.batches), 1)
+
+    def test_subtree_observes_descendants(self):
+        child = self._create_element(self.root, "p")
+        self.observer.observe(self.root, MutationObserverInit(childList=True))
+        self._create_element(child, "b")
+        MutationObserver.notify()
+        self.assertEqual(self.batches, [])
+
+        self.observer.observe(self.root, MutationObserverInit(childList=True, subtree=True))
+        self._create_element(child, "b")
+        MutationObserver.notify()
+        self.assertEqual([record.target for record in self.batches[0]], [child])
+
+    def test_attributes_and_character_data(self):
+        text = Text(self.document, self.root, "a")
+        self.root.appendChild(text)
+        self.observer.observe(self.root, MutationObserverInit(attributeOldValue=True, attributeFilter=["id"],
+                                                              characterDataOldValue=True, subtree=True))
+        self.root.setAttribute("id", "x")
+        self.root.setAttribute("class", "y")
+        self.root.setAttribute("id", "z")
+        self.root.removeAttribute("missing")
+        text.appendData("b")
+        MutationObserver.notify()
+
+        records = self.batches[0]
+        self.assertEqual([(record.type, record.attributeName, record.oldValue) for record in records],
+                         [("attributes", "id", None), ("attributes", "id", "x"), ("characterData", None, "a")])
+
+    def test_character_data_is_only_read_for_old_values(self):
+        text = Text(self.document, self.root, "a")
+        self.root.appendChild(text)
+        self.observer.observe(self.root, MutationObserverInit(characterData=True, subtree=True))
+        with patch.object(CharacterData, "data", new_callable=PropertyMock, return_value="a") as data:
+            text.appendData("b")
+            text.appendData("c")
+            self.assertFalse(data.called)
+        self.assertEqual(text.data, "abc")
+        self.assertEqual([record.oldValue for record in self.observer.takeRecords()], [None, None])
+
+    def test_take_records_and_disconnect(self):
+        self.observer.observe(self.root, MutationObserverInit(childList=True))
+        self._create_element(self.root, "p")
+        self.assertEqual(len(self.observer.takeRecords()), 1)
+        self._create_element(self.root, "p")
+        self.observer.disconnect()
+        self.assertFalse(MutationObserver.hasObservers())
+        self._create_element(self.root, "p")
+        MutationObserver.notify()
+        self.assertEqual(self.batches, [])
+
+    def test_scheduler_is_called_once_per_batch(self):
+        scheduled = []
+        MutationObserver.setScheduler(scheduled.append)
+        self.observer.observe(self.root, MutationObserverInit(childList=True))
+        self._create_element(self.root, "p")
+        self._create_element(self.root, "p")
+        self.assertEqual(len(scheduled), 1)
+
+        scheduled[0]()
+        self.assertEqual(len(self.batches[0]), 2)
+        self._create_element(self.root, "p")
+        self.assertEqual(len(scheduled), 2)
+
+    def test_observe_needs_a_mutation_type(self):
+        with self.assertRaises(TypeError):
+            self.observer.observe(self.root)
+        with self.assertRaises(TypeError):
+            self.observer.observe(self.root, MutationObserverInit(attributes=False, attributeOldValue=True))
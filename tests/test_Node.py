@@ -0,0 +1,81 @@
+import contextlib
+import io
+from unittest import TestCase
+from web.css.CSSParser import CSSParser
+from web.css.utils import cascade_priority, style, update_style
+from web.dom.Node import CHILD_LAYOUT_DIRTY, CHILD_PAINT_DIRTY, CHILD_STYLE_DIRTY, DIRTY, LAYOUT_DIRTY, \
+    PAINT_DIRTY, STYLE_DIRTY
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+HTML = "<!DOCTYPE html><html><head></head><body><div class=a><p>a</p></div><div><input value=b></div></body></html>"
+RULES = sorted(CSSParser(".a { color: red; } .b { color: blue; }").parse(), key=cascade_priority)
+
+
+class TestNodeDirtyFlags(TestCase):
+
+    def setUp(self):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(HTML).run(documents.append)
+        self.dom = documents[0]
+        style(self.dom, RULES)
+        self.dom.clearDirty()
+        self.first, self.second = self.dom.document.getElementsByTagName("div")
+
+    def test_new_nodes_are_dirty(self):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(HTML).run(documents.append)
+        self.assertEqual(documents[0].document.getElementsByTagName("p")[0].dirtyFlags & DIRTY, DIRTY)
+        self.assertEqual(self.dom.dirtyFlags, 0)
+
+    def test_marks_propagate_to_ancestors(self):
+        text = self.first.children[0].children[0]
+        text.appendData("b")
+        self.assertEqual(text.dirtyFlags, LAYOUT_DIRTY | PAINT_DIRTY)
+        self.assertEqual(self.first.dirtyFlags, CHILD_LAYOUT_DIRTY | CHILD_PAINT_DIRTY)
+        self.assertEqual(self.dom.dirtyFlags, CHILD_LAYOUT_DIRTY | CHILD_PAINT_DIRTY)
+        self.assertEqual(self.second.dirtyFlags, 0)
+
+        self.dom.clearDirty(PAINT_DIRTY)
+        self.assertEqual(text.dirtyFlags, LAYOUT_DIRTY)
+        self.assertEqual(self.dom.dirtyFlags, CHILD_LAYOUT_DIRTY)
+        self.dom.clearDirty()
+        self.assertEqual(text.dirtyFlags, 0)
+        self.assertEqual(self.first.dirtyFlags, 0)
+
+    def test_mutations_set_flags(self):
+        p = self.first.children[0]
+        self.first.removeChild(p)
+        self.assertEqual(self.first.dirtyFlags, LAYOUT_DIRTY | PAINT_DIRTY)
+        self.dom.clearDirty()
+
+        p.parentNode = self.second
+        self.second.appendChild(p)
+        self.assertEqual(p.dirtyFlags, DIRTY)
+        self.assertEqual(self.second.dirtyFlags & DIRTY, LAYOUT_DIRTY | PAINT_DIRTY)
+        self.assertEqual(self.dom.dirtyFlags, CHILD_STYLE_DIRTY | CHILD_LAYOUT_DIRTY | CHILD_PAINT_DIRTY)
+
+    def test_attributes_set_flags(self):
+        self.first.setAttribute("title", "a")
+        self.assertEqual(self.first.dirtyFlags, LAYOUT_DIRTY | PAINT_DIRTY)
+        self.first.setAttribute("class", "b")
+        self.assertEqual(self.first.dirtyFlags, DIRTY)
+        self.dom.clearDirty()
+
+        input = self.second.children[0]
+        input.setAttribute("value", "bc")
+        self.assertEqual(input.dirtyFlags, PAINT_DIRTY)
+        self.assertEqual(self.dom.dirtyFlags, CHILD_PAINT_DIRTY)
+
+    def test_update_style_restyles_dirty_subtrees(self):
+        p = self.first.children[0]
+        self.second.style["marker"] = "kept"
+        self.first.setAttribute("class", "b")
+        update_style(self.dom, RULES)
+
+        self.assertEqual(self.first.style["color"], "blue")
+        self.assertEqual(p.style["color"], "blue")
+        self.assertEqual(self.second.style["marker"], "kept")
+        self.assertFalse(self.dom.dirtyFlags & (STYLE_DIRTY | CHILD_STYLE_DIRTY))
+        self.assertEqual(self.first.dirtyFlags, LAYOUT_DIRTY | PAINT_DIRTY)
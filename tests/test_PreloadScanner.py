@@ -0,0 +1,33 @@
+from unittest import TestCase
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+
+class TestPreloadScanner(TestCase):
+
+    def setUp(self):
+        self.subresources = []
+
+    def preload(self, url, destination):
+        self.subresources.append((url, destination))
+
+    def test_subresources_are_reported_in_document_order(self):
+        parser = HTMLDocumentParser(
+            "<html><head><link rel=\"stylesheet\" href=\"a.css\"><link rel=\"icon\" href=\"b.ico\">"
+            "<script src=\"c.js\"></script><script>var d;</script></head>"
+            "<body><img src=\"e.png\"><img srcset=\"f.png 1x, g.png 2x\"></body></html>",
+            preload_cb=self.preload)
+        parser.run(lambda document: None)
+
+        self.assertEqual(self.subresources, [
+            ("a.css", "style"),
+            ("c.js", "script"),
+            ("e.png", "image"),
+            ("f.png", "image"),
+        ])
+
+    def test_subresources_are_reported_before_document_is_closed(self):
+        parser = HTMLDocumentParser(preload_cb=self.preload)
+        parser.feed("<html><head><link rel=\"stylesheet\" href=\"a.css\"><link rel=\"stylesheet\" href=\"a.css\">")
+        self.assertEqual(self.subresources, [("a.css", "style")])
+        parser.feed("</head><body><img src=\"b.png\">")
+        self.assertEqual(self.subresources, [("a.css", "style"), ("b.png", "image")])
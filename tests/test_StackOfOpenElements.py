@@ -0,0 +1,59 @@
+import unittest
+from web.dom.Document import Document
+from web.dom.elements.Element import Element
+from web.html.parser.HTMLToken import HTMLTag, HTMLToken
+from web.html.parser.StackOfOpenElements import StackOfOpenElements
+
+
+def create_element(name: str, document: Document) -> Element:
+    token = HTMLTag(HTMLToken.TokenType.StartTag)
+    token.name = name
+    return Element(token, None, document)
+
+
+class TestStackOfOpenElements(unittest.TestCase):
+    def setUp(self):
+        self.document = Document()
+        self.stack = StackOfOpenElements()
+
+    def push(self, *names: str) -> None:
+        for name in names:
+            self.stack.push(create_element(name, self.document))
+
+    def test_has_in_scope(self):
+        self.push("html", "body", "p", "table", "tr", "td", "span")
+        self.assertTrue(self.stack.has_in_scope("span"))
+        self.assertTrue(self.stack.has_in_scope("td"))
+        self.assertFalse(self.stack.has_in_scope("p"))
+        self.assertTrue(self.stack.has_in_table_scope("tr"))
+        self.assertFalse(self.stack.has_in_scope("div"))
+
+        self.stack.pop()
+        self.stack.pop()
+        self.assertTrue(self.stack.has_in_scope("tr"))
+        self.assertFalse(self.stack.has_in_scope("p"))
+        self.stack.pop_until_element_with_tag_name_has_been_popped("table")
+        self.assertTrue(self.stack.has_in_scope("p"))
+
+    def test_has_in_button_and_list_item_scope(self):
+        self.push("html", "body", "p", "button", "ul", "li")
+        self.assertTrue(self.stack.has_in_scope("p"))
+        self.assertFalse(self.stack.has_in_button_scope("p"))
+        self.assertTrue(self.stack.has_in_list_item_scope("li"))
+        self.assertFalse(self.stack.has_in_list_item_scope("button"))
+
+    def test_contains(self):
+        self.push("html", "body", "div", "div")
+        div = self.stack.last()
+        self.assertTrue(self.stack.contains("div"))
+        self.assertTrue(self.stack.contains_element(div))
+        self.assertEqual(self.stack.last_element_with_tag_name("div").index, 3)
+
+        self.stack.pop()
+        self.assertTrue(self.stack.contains("div"))
+        self.assertFalse(self.stack.contains_element(div))
+        self.assertEqual(self.stack.last_element_with_tag_name("div").index, 2)
+
+        self.stack.pop_all_elements()
+        self.assertFalse(self.stack.contains("html"))
+        self.assertIsNone(self.stack.last_element_with_tag_name("div"))
@@ -0,0 +1,51 @@
+import contextlib
+import io
+from unittest import TestCase
+from browser.utils.dom import FILTER_ACCEPT, FILTER_REJECT, FILTER_SKIP, nodes_of_type, post_order, pre_order
+from web.dom.elements import HTMLLiElement, Text
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+HTML = "<!DOCTYPE html><html><head></head><body><ul><li>1</li><li>2</li></ul><p>3</p></body></html>"
+
+
+class TestTreeWalkers(TestCase):
+
+    def setUp(self):
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(HTML).run(documents.append)
+        self.dom = documents[0]
+
+    @staticmethod
+    def _names(nodes):
+        return [node.name or node.data for node in nodes]
+
+    def test_pre_order(self):
+        self.assertEqual(self._names(pre_order(self.dom)),
+                         ["html", "html", "head", "body", "ul", "li", "1", "li", "2", "p", "3"])
+
+    def test_post_order(self):
+        self.assertEqual(self._names(post_order(self.dom)),
+                         ["head", "1", "li", "2", "li", "ul", "3", "p", "body", "html", "html"])
+
+    def test_filters_skip_nodes_or_subtrees(self):
+        def node_filter(node):
+            if node.name == "ul":
+                return FILTER_REJECT
+            return FILTER_SKIP if node.name in ("html", "head", "body") else FILTER_ACCEPT
+
+        self.assertEqual(self._names(pre_order(self.dom, node_filter)), ["p", "3"])
+        self.assertEqual(self._names(post_order(self.dom, node_filter)), ["3", "p"])
+        self.assertEqual(list(pre_order(self.dom, lambda node: FILTER_REJECT)), [])
+
+    def test_nodes_of_type(self):
+        self.assertEqual(self._names(nodes_of_type(self.dom, HTMLLiElement)), ["li", "li"])
+        self.assertEqual(self._names(nodes_of_type(self.dom, Text, lambda node: node.data != "2")), ["1", "3"])
+
+    def test_deep_trees(self):
+        html = "<!DOCTYPE html><html><head></head><body>" + "<div>" * 2000 + "</body></html>"
+        documents = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            HTMLDocumentParser(html).run(documents.append)
+        self.assertEqual(sum(1 for _ in pre_order(documents[0])), 2004)
+        self.assertEqual(sum(1 for _ in post_order(documents[0])), 2004)
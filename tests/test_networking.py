@@ -0,0 +1,80 @@
+import contextlib
+import io
+import tempfile
+from concurrent.futures import Future
+from unittest import TestCase
+from unittest.mock import patch
+from browser.utils import networking
+from browser.utils.dom_cache import DOMCache
+from browser.utils.networking import DOCUMENT_SOURCES, PRELOADS, cached_source, cancel_preloads, stream
+from web.html.parser.HTMLDocumentParser import HTMLDocumentParser
+
+URL = "https://example.com/page.html"
+CHUNKS = ["<!DOCTYPE html><html><head></head>", "<body><p>Streamed</p></body></html>"]
+
+
+class FakeResponse:
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.encoding = None
+
+    def iter_content(self, chunk_size, decode_unicode):
+        return iter(CHUNKS)
+
+
+class TestNetworking(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        DOCUMENT_SOURCES.pop(URL, None)
+        self.directory.cleanup()
+
+    def test_streamed_page_is_restored_from_cache(self):
+        cache = DOMCache(self.directory.name)
+        with patch.object(networking.requests, "get", return_value=FakeResponse()) as get:
+            documents = []
+            parser = HTMLDocumentParser(cb=documents.append)
+            with contextlib.redirect_stdout(io.StringIO()):
+                for chunk in stream(URL):
+                    parser.append_input(chunk)
+                parser.close_input()
+                while not parser.finished:
+                    parser.parse_slice(1000, 1)
+            self.assertEqual(cached_source(URL), "".join(CHUNKS))
+            cache.store(cached_source(URL), documents[0])
+
+            # Loading the page again needs neither the network nor the parser.
+            self.assertEqual(list(stream(URL)), ["".join(CHUNKS)])
+            self.assertEqual(get.call_count, 1)
+        restored = cache.load(cached_source(URL))
+        self.assertIsNotNone(restored)
+        self.assertEqual(str(restored), str(documents[0]))
+
+    def test_unfinished_or_failed_streams_are_not_cached(self):
+        with patch.object(networking.requests, "get", return_value=FakeResponse()):
+            next(stream(URL))
+        self.assertIsNone(cached_source(URL))
+        with patch.object(networking.requests, "get", return_value=FakeResponse(404)):
+            list(stream(URL))
+        self.assertIsNone(cached_source(URL))
+
+    def test_navigation_drops_pending_preloads(self):
+        pending = Future()
+        PRELOADS["https://example.com/image.png"] = pending
+        cancel_preloads()
+        self.assertTrue(pending.cancelled())
+        self.assertEqual(PRELOADS, {})
+
+    def test_least_recently_streamed_sources_are_dropped(self):
+        other = "https://example.com/other.html"
+        with patch.object(networking, "DOCUMENT_SOURCES_SIZE", len("".join(CHUNKS)) * 3 // 2), \
+                patch.object(networking.requests, "get", return_value=FakeResponse()):
+            list(stream(URL))
+            list(stream(other))
+        self.assertIsNone(cached_source(URL))
+        self.assertEqual(cached_source(other), "".join(CHUNKS))
+        DOCUMENT_SOURCES.pop(other, None)
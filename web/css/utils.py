@@ -1,4 +1,6 @@
+from browser.utils.dom import FILTER_ACCEPT, FILTER_REJECT, FILTER_SKIP, pre_order
 from web.css.CSSParser import CSSParser
+from web.dom.Node import CHILD_STYLE_DIRTY, LAYOUT_DIRTY, PAINT_DIRTY, STYLE_DIRTY, Node
 from web.dom.elements.Element import Element
 from typing import List, Optional
 from web.css.CSSParser import Rule
@@ -35,6 +37,33 @@ def computed_style(node: Element, property: str, value: str) -> Optional[str]:
 
 
 def style(node: Element, rules: List[Rule]):
+    """
+    Styles the node and its descendants, parents are styled before their children inherit from them.
+    """
+    for descendant in pre_order(node):
+        style_node(descendant, rules)
+    node.clearDirty(STYLE_DIRTY)
+
+
+def update_style(node: Node, rules: List[Rule]):
+    """
+    Restyles only the subtrees of style dirty nodes, descendants inherit so they are restyled too.
+    Restyled nodes are marked for layout and paint.
+    """
+    for dirty in pre_order(node, _style_dirty):
+        # Clears the dirty flags of the subtree, so the walk does not descend into it.
+        style(dirty, rules)
+        dirty.markDirty(LAYOUT_DIRTY | PAINT_DIRTY)
+    node.clearDirty(STYLE_DIRTY)
+
+
+def _style_dirty(node: Node) -> int:
+    if node.dirtyFlags & STYLE_DIRTY:
+        return FILTER_ACCEPT
+    return FILTER_SKIP if node.dirtyFlags & CHILD_STYLE_DIRTY else FILTER_REJECT
+
+
+def style_node(node: Element, rules: List[Rule]):
     node.style = {}
     for property, default_value in INHERITED_PROPERTIES.items():
         if node.parentNode:
@@ -56,5 +85,3 @@ def style(node: Element, rules: List[Rule]):
             computed_value = computed_style(node, property, value)
             if not computed_value: continue
             node.style[property] = computed_value
-    for child in node.children:
-        style(child, rules)
@@ -1,32 +1,54 @@
+import io
+from typing import List, Optional
 from web.dom.Document import Document
-from web.dom.Node import Node
+from web.dom.MutationObserver import MutationObserver
+from web.dom.Node import LAYOUT_DIRTY, PAINT_DIRTY, Node
 from web.html.parser.utils import char_is_whitespace
 
 
 class CharacterData(Node):
+    __slots__ = ("__data", "__pendingData", "__length")
 
     def __init__(self, data: str, parent: Node, document: Document):
         super(CharacterData, self).__init__(parent, document)
         self.__data = data
-        self.length = len(data)
+        # Appended data not joined into __data yet, so building data piece by piece stays linear.
+        # None until something is appended, most nodes never get more data.
+        self.__pendingData: Optional[List[str]] = None
+        self.__length = len(data)
 
     def __str__(self) -> str:
-        return f"<TEXT>{self.__data}</TEXT>"
+        return f"<TEXT>{self.data}</TEXT>"
 
     def __updateLength(self) -> None:
-        self.length = len(self.__data)
+        self.__length = len(self.data)
+
+    @property
+    def length(self) -> int:
+        return self.__length
 
     @property
     def data(self) -> str:
+        if self.__pendingData is not None:
+            self.__pendingData.insert(0, self.__data)
+            self.__data = "".join(self.__pendingData)
+            self.__pendingData = None
         return self.__data
 
     def substringData(self, offset: int, count: int) -> str:
         lastIndex = offset + count
-        return self.__data[offset:lastIndex]
+        return self.data[offset:lastIndex]
 
     def appendData(self, data: str) -> None:
-        self.__data += data
-        self.__updateLength()
+        if MutationObserver.hasObservers():
+            # Joining the pending data for every append would make building data quadratic again.
+            MutationObserver.queueRecord("characterData", self, oldValue=lambda: self.data)
+        if self.__pendingData is None:
+            self.__pendingData = [data]
+        else:
+            self.__pendingData.append(data)
+        self.__length += len(data)
+        self.markDirty(LAYOUT_DIRTY | PAINT_DIRTY)
 
     def insertData(self, offset: int, data: str) -> None:
         self.__updateLength()
@@ -47,17 +69,13 @@ class CharacterData(Node):
         pass
 
     def printTree(self, depth: int) -> str:
-        indentation = ""
-
-        for _ in range(depth):
-            indentation += "\t"
-        if not self.__data.isspace():
-            return f"{indentation}" + f"<TEXT>{self.__data}</TEXT>" + "\n"
-        else:
-            return ""
+        from web.html.serializer.HTMLSerializer import HTMLSerializer
+        stream = io.StringIO()
+        HTMLSerializer(stream).write_tree(self, depth)
+        return stream.getvalue()
 
     def get_contents(self) -> str:
-        if not self.__data.isspace():
-            return f"<TEXT>{self.__data.strip()}</TEXT>" + "\n"
-        else:
-            return ""
+        from web.html.serializer.HTMLSerializer import HTMLSerializer
+        stream = io.StringIO()
+        HTMLSerializer(stream).write_contents(self)
+        return stream.getvalue()
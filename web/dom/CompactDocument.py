@@ -0,0 +1,409 @@
+from array import array
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Type, cast
+from web.dom.Document import Document
+from web.dom.DocumentType import DocumentType
+from web.dom.Node import DIRTY, Node
+from web.dom.TagNames import TAG_NAMES
+from web.dom.elements.Comment import Comment
+from web.dom.elements.Element import Element
+from web.dom.elements.Text import Text
+from web.dom.events.EventTarget import EventTarget, ListenersByType
+from web.dom.exceptions.ReadOnlyError import ReadOnlyError
+
+# Tag name ids of rows which are not elements, elements have indexes of CompactDocument._tagNames.
+DOCUMENT_TYPE, TEXT, COMMENT = -1, -2, -3
+NO_NODE = -1
+NO_ATTRIBUTES: Dict[str, str] = cast(Dict[str, str], MappingProxyType({}))
+
+
+class CompactDocument(Document):
+    """
+    Read-mostly document which keeps its tree in flat columns instead of a graph of node objects,
+    for documents with millions of nodes. Row of a node in the columns is its id, the document
+    type is row 0. Nodes returned by getNodeById() and by their children and parentNode are thin
+    views over the columns with the usual Node API, so they are created again on every access.
+    Structure of the tree can not be changed once built.
+    """
+
+    def __init__(self, name: str = "", publicId: str = "", systemId: str = "") -> None:
+        super(CompactDocument, self).__init__()
+        self._parents = array("i")
+        self._firstChildren = array("i")
+        self._nextSiblings = array("i")
+        self._lastChildren = array("i")
+        self._tagNameIds = array("i")
+        self._textOffsets = array("i")
+        self._textLengths = array("i")
+        self._tagNames: List[str] = []
+        self.__tagNameIdsByName: Dict[str, int] = {}
+        # View classes of elements by tag name id.
+        self.__views: List[Type[Node]] = []
+        # Data of text and comment rows is kept in one string, joined once it is read.
+        self.__text = ""
+        self.__pendingText: List[str] = []
+        self.__textLength = 0
+        # Sparse columns, most nodes have no attributes and only rendered documents have style.
+        self._attributes: Dict[int, Dict[str, str]] = {}
+        self._styles: Dict[int, Dict] = {}
+        self._eventListeners: Dict[int, ListenersByType] = {}
+        self.__indexes: Optional[Tuple[Dict[str, List[int]], Dict[str, List[int]], Dict[str, List[int]]]] = None
+        self.doctype = (name, publicId, systemId)
+        self.__append(NO_NODE, DOCUMENT_TYPE)
+
+    @staticmethod
+    def fromTree(dom: DocumentType) -> DocumentType:
+        """
+        Copies the tree of the document type node to a new CompactDocument and returns its document type.
+        """
+        document = CompactDocument(cast(str, dom.name), dom.publicId, dom.systemId)
+        stack = [(child, 0) for child in reversed(dom.children)]
+        while stack:
+            node, parentId = stack.pop()
+            if isinstance(node, Element):
+                nodeId = document.appendElement(parentId, cast(str, node.name), node.attributes)
+                stack.extend((child, nodeId) for child in reversed(node.children))
+            elif isinstance(node, Comment):
+                document.appendComment(parentId, node.data)
+            else:
+                document.appendText(parentId, cast(Text, node).data)
+        document.__joinText()
+        return cast(DocumentType, document.documentType)
+
+    @property
+    def documentType(self) -> Optional[Node]:
+        return self.getNodeById(0)
+
+    @documentType.setter
+    def documentType(self, node: Node) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    @property
+    def nodeCount(self) -> int:
+        return len(self._parents)
+
+    def appendElement(self, parentId: int, name: str, attributes: Dict[str, str]) -> int:
+        tagNameId = self.__tagNameIdsByName.get(name)
+        if tagNameId is None:
+            tagNameId = self.__tagNameIdsByName[name] = len(self._tagNames)
+            self._tagNames.append(name)
+            self.__views.append(_element_view(cast(Type[Element], TAG_NAMES.get(name, Element))))
+        nodeId = self.__append(parentId, tagNameId)
+        if attributes:
+            self._attributes[nodeId] = attributes
+        return nodeId
+
+    def appendText(self, parentId: int, data: str) -> int:
+        return self.__append(parentId, TEXT, data)
+
+    def appendComment(self, parentId: int, data: str) -> int:
+        return self.__append(parentId, COMMENT, data)
+
+    def __append(self, parentId: int, tagNameId: int, data: str = "") -> int:
+        nodeId = len(self._parents)
+        self.__indexes = None
+        self._parents.append(parentId)
+        self._firstChildren.append(NO_NODE)
+        self._nextSiblings.append(NO_NODE)
+        self._lastChildren.append(NO_NODE)
+        self._tagNameIds.append(tagNameId)
+        self._textOffsets.append(self.__textLength)
+        self._textLengths.append(len(data))
+        if data:
+            self.__pendingText.append(data)
+            self.__textLength += len(data)
+        if parentId != NO_NODE:
+            lastChild = self._lastChildren[parentId]
+            if lastChild == NO_NODE:
+                self._firstChildren[parentId] = nodeId
+            else:
+                self._nextSiblings[lastChild] = nodeId
+            self._lastChildren[parentId] = nodeId
+        return nodeId
+
+    def __joinText(self) -> None:
+        if self.__pendingText:
+            self.__pendingText.insert(0, self.__text)
+            self.__text = "".join(self.__pendingText)
+            self.__pendingText = []
+
+    def textOf(self, nodeId: int) -> str:
+        self.__joinText()
+        offset = self._textOffsets[nodeId]
+        return self.__text[offset:offset + self._textLengths[nodeId]]
+
+    def descendantIds(self, nodeId: int = 0) -> Iterator[int]:
+        """
+        Ids of the node and its descendants in tree order. Walks the columns without creating views,
+        so batch workloads like text extraction can use it instead of children.
+        """
+        parents, firstChildren, nextSiblings = self._parents, self._firstChildren, self._nextSiblings
+        yield nodeId
+        child = firstChildren[nodeId]
+        while child != NO_NODE:
+            yield child
+            if firstChildren[child] != NO_NODE:
+                child = firstChildren[child]
+                continue
+            while nextSiblings[child] == NO_NODE:
+                child = parents[child]
+                if child == nodeId:
+                    return
+            child = nextSiblings[child]
+
+    def registerNode(self, node: Node) -> int:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    def nodeInserted(self, parent: Node, node: Node) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    def nodeRemoved(self, parent: Node, node: Node) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    def getNodeById(self, nodeId: int) -> Optional[Node]:
+        if not 0 <= nodeId < len(self._parents):
+            return None
+        tagNameId = self._tagNameIds[nodeId]
+        view = self.__views[tagNameId] if tagNameId >= 0 else _NON_ELEMENT_VIEWS[tagNameId]
+        node = view.__new__(view)
+        node.id = nodeId
+        node.document = self
+        return node
+
+    def getElementById(self, elementId: str) -> Optional[Element]:
+        nodeIds = self.__findIndexes()[0].get(elementId)
+        return cast(Element, self.getNodeById(nodeIds[0])) if nodeIds else None
+
+    def getElementsByTagName(self, qualifiedName: str) -> List[Element]:
+        if qualifiedName == "*":
+            nodeIds = [nodeId for nodeId in self.descendantIds() if self._tagNameIds[nodeId] >= 0]
+        else:
+            nodeIds = self.__findIndexes()[1].get(qualifiedName.lower(), [])
+        return [cast(Element, self.getNodeById(nodeId)) for nodeId in nodeIds]
+
+    def getElementsByClassName(self, classNames: str) -> List[Element]:
+        classes = classNames.split()
+        if not classes:
+            return []
+        classIndex = self.__findIndexes()[2]
+        nodeIds = min((classIndex.get(name, []) for name in classes), key=len)
+        return [cast(Element, self.getNodeById(nodeId)) for nodeId in nodeIds
+                if all(name in self._attributes[nodeId].get("class", "").split() for name in classes)]
+
+    def __findIndexes(self) -> Tuple[Dict[str, List[int]], Dict[str, List[int]], Dict[str, List[int]]]:
+        """
+        Ids of elements by id attribute, tag name and class in tree order. Built on the first
+        lookup, the tree can not change afterwards.
+        """
+        if self.__indexes is None:
+            byId: Dict[str, List[int]] = {}
+            byTagName: Dict[str, List[int]] = {}
+            byClassName: Dict[str, List[int]] = {}
+            for nodeId in self.descendantIds():
+                tagNameId = self._tagNameIds[nodeId]
+                if tagNameId < 0:
+                    continue
+                byTagName.setdefault(self._tagNames[tagNameId], []).append(nodeId)
+                attributes = self._attributes.get(nodeId)
+                if attributes:
+                    if attributes.get("id"):
+                        byId.setdefault(attributes["id"], []).append(nodeId)
+                    for name in attributes.get("class", "").split():
+                        byClassName.setdefault(name, []).append(nodeId)
+            self.__indexes = (byId, byTagName, byClassName)
+        return self.__indexes
+
+
+class _NodeView:
+    """
+    Node API of a row of CompactDocument, id of the view is the row. Views are made on every access,
+    so views of the same node are equal but not the same object, e.g. a.firstChild is not
+    a.firstChild. Compare them with ==.
+    """
+    __slots__ = ()
+    if TYPE_CHECKING:
+        # Set by CompactDocument.getNodeById(), stored in the slots of Node.
+        id: int
+        document: Optional[Document]
+
+    @property
+    def parentNode(self) -> Optional[Node]:
+        document = cast(CompactDocument, self.document)
+        return document.getNodeById(document._parents[self.id])
+
+    @property
+    def isConnected(self) -> bool:
+        return True
+
+    @property
+    def children(self) -> List[Node]:
+        document = cast(CompactDocument, self.document)
+        children: List[Node] = []
+        child = document._firstChildren[self.id]
+        while child != NO_NODE:
+            children.append(cast(Node, document.getNodeById(child)))
+            child = document._nextSiblings[child]
+        return children
+
+    @property
+    def firstChild(self) -> Optional[Node]:
+        document = cast(CompactDocument, self.document)
+        return document.getNodeById(document._firstChildren[self.id])
+
+    @property
+    def lastChild(self) -> Optional[Node]:
+        document = cast(CompactDocument, self.document)
+        return document.getNodeById(document._lastChildren[self.id])
+
+    @property
+    def previousSibling(self) -> Optional[Node]:
+        # Previous siblings are not stored, they are found from the first child of the parent.
+        document = cast(CompactDocument, self.document)
+        parent = document._parents[self.id]
+        if parent == NO_NODE:
+            return None
+        previous, child = NO_NODE, document._firstChildren[parent]
+        while child != self.id:
+            previous, child = child, document._nextSiblings[child]
+        return document.getNodeById(previous)
+
+    @property
+    def nextSibling(self) -> Optional[Node]:
+        document = cast(CompactDocument, self.document)
+        return document.getNodeById(document._nextSiblings[self.id])
+
+    @property
+    def style(self) -> Optional[Dict]:
+        return cast(CompactDocument, self.document)._styles.get(self.id)
+
+    @style.setter
+    def style(self, style: Dict) -> None:
+        cast(CompactDocument, self.document)._styles[self.id] = style
+
+    # Views are made on every access, so their paths are not cached and listeners are kept by the document.
+    def event_path(self) -> Tuple[EventTarget, ...]:
+        return EventTarget.event_path(cast(EventTarget, self))
+
+    @property
+    def _event_listeners(self) -> Optional[ListenersByType]:
+        return cast(CompactDocument, self.document)._eventListeners.get(self.id)
+
+    @_event_listeners.setter
+    def _event_listeners(self, listeners: Optional[ListenersByType]) -> None:
+        eventListeners = cast(CompactDocument, self.document)._eventListeners
+        if listeners is None:
+            eventListeners.pop(self.id, None)
+        else:
+            eventListeners[self.id] = listeners
+
+    # Structure and data can not change, only styles are set and they are not tracked.
+    @property
+    def dirtyFlags(self) -> int:
+        return 0
+
+    def markDirty(self, flags: int) -> None:
+        pass
+
+    def clearDirty(self, flags: int = DIRTY) -> None:
+        pass
+
+    def appendChild(self, node: Node) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    def appendChildBeforeElement(self, node: Node, insertBefore: Node) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    def removeChild(self, node: Node) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    def replaceChildren(self, *nodes: Node) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    # Views of the same row are different objects.
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _NodeView) and other.id == self.id and other.document is self.document
+
+    def __hash__(self) -> int:
+        return hash((id(self.document), self.id))
+
+
+class _ElementView(_NodeView):
+    __slots__ = ()
+
+    @property
+    def name(self) -> str:
+        document = cast(CompactDocument, self.document)
+        return document._tagNames[document._tagNameIds[self.id]]
+
+    @property
+    def attributes(self) -> Dict[str, str]:
+        return cast(CompactDocument, self.document)._attributes.get(self.id, NO_ATTRIBUTES)
+
+    @property
+    def namespace(self) -> str:
+        return ""
+
+
+class _CharacterDataView(_NodeView):
+    __slots__ = ()
+
+    @property
+    def name(self) -> None:
+        return None
+
+    @property
+    def data(self) -> str:
+        return cast(CompactDocument, self.document).textOf(self.id)
+
+    @property
+    def length(self) -> int:
+        return cast(CompactDocument, self.document)._textLengths[self.id]
+
+    def appendData(self, data: str) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+
+class CompactText(_CharacterDataView, Text):
+    __slots__ = ()
+
+
+class CompactComment(_CharacterDataView, Comment):
+    __slots__ = ()
+
+
+class CompactDocumentType(_NodeView, DocumentType):
+    __slots__ = ()
+
+    @property
+    def name(self) -> Optional[str]:
+        return cast(CompactDocument, self.document).doctype[0]
+
+    @name.setter
+    def name(self, name: str) -> None:
+        raise ReadOnlyError("CompactDocument is read-only")
+
+    @property
+    def publicId(self) -> str:
+        return cast(CompactDocument, self.document).doctype[1]
+
+    @property
+    def systemId(self) -> str:
+        return cast(CompactDocument, self.document).doctype[2]
+
+
+_NON_ELEMENT_VIEWS: Dict[int, Type[Node]] = {
+    DOCUMENT_TYPE: CompactDocumentType,
+    TEXT: CompactText,
+    COMMENT: CompactComment,
+}
+_ELEMENT_VIEWS: Dict[Type[Element], Type[Element]] = {}
+
+
+def _element_view(element: Type[Element]) -> Type[Element]:
+    """
+    Views of elements are instances of the element classes, so isinstance() checks keep working.
+    """
+    view = _ELEMENT_VIEWS.get(element)
+    if view is None:
+        view = _ELEMENT_VIEWS[element] = type(element.__name__, (_ElementView, element), {"__slots__": ()})
+    return view
@@ -1,7 +1,9 @@
-from typing import Union
+from typing import Dict, List, Optional, Set, Tuple, Union, cast
 from typing import TYPE_CHECKING
+import weakref
 
 if TYPE_CHECKING:
+    from web.dom.Node import Node
     from web.dom.elements.Element import Element
 
 
@@ -10,6 +12,211 @@ class Document:
         self.__head: Union['Element', None] = None
         self.__forms: Union['Element', None] = None
         self.__title: Union[str, None] = None
+        self.__nextNodeId: int = 0
+        # Nodes by their id, removed ones are dropped once nothing else references them.
+        self.__nodesById: 'weakref.WeakValueDictionary[int, Node]' = weakref.WeakValueDictionary()
+        self.__documentType: Optional['Node'] = None
+        # Connected elements by index ("id", "tag" or "class") and key, in tree order unless the
+        # (index, key) pair is in __unorderedKeys. Dicts are used as insertion ordered sets.
+        self.__indexes: Dict[str, Dict[str, Dict['Element', None]]] = {"id": {}, "tag": {}, "class": {}}
+        self.__unorderedKeys: Set[Tuple[str, str]] = set()
+        # Document type and elements from it down to the last element in tree order with their
+        # positions. Appending to one of them keeps indexes in tree order without walking up the
+        # tree, which is what the parser does. None when it has to be found again.
+        self.__lastElementPath: Optional[List['Node']] = None
+        self.__lastElementPathPositions: Dict['Node', int] = {}
+
+    def registerNode(self, node: 'Node') -> int:
+        """
+        Gives the node an id unique within this document.
+        """
+        nodeId = self.__nextNodeId
+        self.__nextNodeId += 1
+        self.__nodesById[nodeId] = node
+        return nodeId
+
+    def getNodeById(self, nodeId: int) -> Optional['Node']:
+        return self.__nodesById.get(nodeId)
+
+    @property
+    def documentType(self) -> Optional['Node']:
+        """
+        Root of the document tree, nodes are connected when their root is this node.
+        """
+        return self.__documentType
+
+    @documentType.setter
+    def documentType(self, node: 'Node') -> None:
+        self.__documentType = node
+
+    def getElementById(self, elementId: str) -> Optional['Element']:
+        elements = self.__lookup("id", elementId)
+        return elements[0] if elements else None
+
+    def getElementsByTagName(self, qualifiedName: str) -> List['Element']:
+        if qualifiedName == "*":
+            return self.__inTreeOrder({element: None for elements in self.__indexes["tag"].values()
+                                       for element in elements})
+        return self.__lookup("tag", qualifiedName.lower())
+
+    def getElementsByClassName(self, classNames: str) -> List['Element']:
+        """
+        Elements which have all of the space separated classes.
+        """
+        classes = classNames.split()
+        if not classes:
+            return []
+        elements = min((self.__lookup("class", name) for name in classes), key=len)
+        return [element for element in elements
+                if all(name in element.attributes.get("class", "").split() for name in classes)]
+
+    def nodeInserted(self, parent: 'Node', node: 'Node') -> None:
+        """
+        Called by parent after node was inserted to its children, indexes the elements of a connected subtree.
+        """
+        from web.dom.elements.Element import Element
+        if node.firstChild is None and not isinstance(node, Element):
+            return
+        path = self.__findLastElementPath()
+        position = self.__lastElementPathPositions.get(parent)
+        # Subtree appended after the last element keeps indexes in tree order.
+        inTreeOrder = position is not None and parent.lastChild is node
+        if inTreeOrder:
+            for removed in path[position + 1:]:
+                del self.__lastElementPathPositions[removed]
+            del path[position + 1:]
+            self.__extendLastElementPath(node)
+        elif not parent.isConnected:
+            return
+        if node.firstChild is None:
+            self.__index(cast('Element', node), inTreeOrder)
+            return
+        for element in self.__subtreeElements(node):
+            self.__index(element, inTreeOrder)
+
+    def nodeRemoved(self, parent: 'Node', node: 'Node') -> None:
+        """
+        Called by parent after node was removed from its children.
+        """
+        if not parent.isConnected:
+            return
+        elements = self.__subtreeElements(node)
+        if elements:
+            self.__lastElementPath = None
+        for element in elements:
+            for index, key in self.__indexKeys(element):
+                self.__unindex(index, key, element)
+
+    def attributeChanged(self, element: 'Element', name: str, oldValue: Optional[str]) -> None:
+        """
+        Called by element after its attribute was set or removed.
+        """
+        if name not in ("id", "class") or not element.isConnected:
+            return
+        index = "id" if name == "id" else "class"
+        oldKeys = ([oldValue] if name == "id" else oldValue.split()) if oldValue else []
+        for key in oldKeys:
+            self.__unindex(index, key, element)
+        newValue = element.attributes.get(name)
+        newKeys = ([newValue] if name == "id" else newValue.split()) if newValue else []
+        for key in newKeys:
+            self.__add(index, key, element, False)
+
+    def __findLastElementPath(self) -> List['Node']:
+        if self.__lastElementPath is None:
+            self.__lastElementPath = []
+            self.__lastElementPathPositions = {}
+            if self.__documentType is not None:
+                self.__extendLastElementPath(self.__documentType)
+        return self.__lastElementPath
+
+    def __extendLastElementPath(self, node: 'Node') -> None:
+        """
+        Appends node and its last element descendants to the path.
+        """
+        from web.dom.elements.Element import Element
+        path = cast(List['Node'], self.__lastElementPath)
+        current: Optional['Node'] = node
+        while current is not None:
+            self.__lastElementPathPositions[current] = len(path)
+            path.append(current)
+            current = current.lastChild
+            while current is not None and not isinstance(current, Element):
+                current = current.previousSibling
+
+    @staticmethod
+    def __subtreeElements(node: 'Node') -> List['Element']:
+        from web.dom.elements.Element import Element
+        elements = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Element):
+                elements.append(node)
+            child = node.lastChild
+            while child is not None:
+                stack.append(child)
+                child = child.previousSibling
+        return elements
+
+    def __index(self, element: 'Element', inTreeOrder: bool) -> None:
+        self.__add("tag", cast(str, element.name), element, inTreeOrder)
+        attributes = element.attributes
+        if attributes:
+            if attributes.get("id"):
+                self.__add("id", attributes["id"], element, inTreeOrder)
+            for name in attributes.get("class", "").split():
+                self.__add("class", name, element, inTreeOrder)
+
+    def __add(self, index: str, key: str, element: 'Element', inTreeOrder: bool) -> None:
+        elements = self.__indexes[index].get(key)
+        if elements is None:
+            self.__indexes[index][key] = {element: None}
+            return
+        elements[element] = None
+        if not inTreeOrder:
+            self.__unorderedKeys.add((index, key))
+
+    @staticmethod
+    def __indexKeys(element: 'Element') -> List[Tuple[str, str]]:
+        keys = [("tag", element.name)]
+        if element.attributes.get("id"):
+            keys.append(("id", element.attributes["id"]))
+        keys.extend(("class", name) for name in element.attributes.get("class", "").split())
+        return keys
+
+    def __unindex(self, index: str, key: str, element: 'Element') -> None:
+        elements = self.__indexes[index].get(key)
+        if elements is not None:
+            elements.pop(element, None)
+            if not elements:
+                del self.__indexes[index][key]
+                self.__unorderedKeys.discard((index, key))
+
+    def __lookup(self, index: str, key: str) -> List['Element']:
+        elements = self.__indexes[index].get(key)
+        if not elements:
+            return []
+        if (index, key) in self.__unorderedKeys:
+            self.__indexes[index][key] = elements = dict.fromkeys(self.__inTreeOrder(elements))
+            self.__unorderedKeys.discard((index, key))
+        return list(elements)
+
+    def __inTreeOrder(self, elements: Dict['Element', None]) -> List['Element']:
+        """
+        Sorts elements by walking the whole document, only needed after out of order insertions.
+        """
+        ordered = []
+        stack = [self.__documentType]
+        while stack:
+            node = stack.pop()
+            if node in elements:
+                ordered.append(node)
+            child = node.lastChild
+            while child is not None:
+                stack.append(child)
+                child = child.previousSibling
+        return ordered
 
     @property
     def head(self) -> Union['Element', None]:
@@ -7,9 +7,20 @@ if TYPE_CHECKING:
 
 
 class DocumentType(Node):
+	__slots__ = ("__publicId", "__systemId", "__forcedQuircks")
+
 	def __init__(self, documentToken: 'HTMLDoctype', document: 'Document'):
 		super(DocumentType, self).__init__(None, document)
-		self.name: str = documentToken.name if documentToken.name is not None else ""
+		self.name = documentToken.name if documentToken.name is not None else ""
 		self.__publicId: str = documentToken.publicIdentifier if documentToken.publicIdentifier is not None else ""
 		self.__systemId: str = documentToken.systemPublicIdentidier if documentToken.systemPublicIdentidier is not None else ""
-		self.__forcedQuircks: bool = False
\ No newline at end of file
+		self.__forcedQuircks: bool = False
+		document.documentType = self
+
+	@property
+	def publicId(self) -> str:
+		return self.__publicId
+
+	@property
+	def systemId(self) -> str:
+		return self.__systemId
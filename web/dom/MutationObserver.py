@@ -0,0 +1,157 @@
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Union
+from weakref import WeakKeyDictionary, WeakSet
+from browser.utils.logging import log
+
+if TYPE_CHECKING:
+    from web.dom.Node import Node
+
+
+@dataclass
+class MutationObserverInit:
+    childList: bool = False
+    # None is the same as True if attributeOldValue or attributeFilter is given, otherwise False.
+    attributes: Optional[bool] = None
+    # None is the same as True if characterDataOldValue is given, otherwise False.
+    characterData: Optional[bool] = None
+    subtree: bool = False
+    attributeOldValue: bool = False
+    characterDataOldValue: bool = False
+    attributeFilter: Optional[Sequence[str]] = None
+
+
+@dataclass
+class MutationRecord:
+    type: str
+    target: 'Node'
+    addedNodes: List['Node'] = field(default_factory=list)
+    removedNodes: List['Node'] = field(default_factory=list)
+    previousSibling: Optional['Node'] = None
+    nextSibling: Optional['Node'] = None
+    attributeName: Optional[str] = None
+    oldValue: Optional[str] = None
+
+
+MutationCallback = Callable[[List[MutationRecord], 'MutationObserver'], None]
+
+
+class MutationObserver:
+    """
+    Queues records of childList, attributes and characterData mutations of observed nodes and
+    delivers them to the callback in batches, as in https://dom.spec.whatwg.org/#mutation-observers.
+    Queued records are delivered by notify(), which is passed to the scheduler once records are
+    queued, e.g. to run it after the current event.
+    """
+    # Options of registered observers by observed node.
+    __registrations: 'WeakKeyDictionary[Node, Dict[MutationObserver, MutationObserverInit]]' = WeakKeyDictionary()
+    # Observers with queued records, in the order they got their first one.
+    __pending: List['MutationObserver'] = []
+    __scheduler: Optional[Callable[[Callable[[], None]], None]] = None
+    __notifyScheduled = False
+
+    def __init__(self, callback: MutationCallback) -> None:
+        self.__callback = callback
+        self.__records: List[MutationRecord] = []
+        self.__nodes: 'WeakSet[Node]' = WeakSet()
+
+    def observe(self, target: 'Node', options: Optional[MutationObserverInit] = None) -> None:
+        options = replace(options) if options is not None else MutationObserverInit()
+        if options.attributes is None:
+            options.attributes = options.attributeOldValue or options.attributeFilter is not None
+        if options.characterData is None:
+            options.characterData = options.characterDataOldValue
+        if not (options.childList or options.attributes or options.characterData):
+            raise TypeError("One of childList, attributes and characterData must be true")
+        if (options.attributeOldValue or options.attributeFilter is not None) and not options.attributes:
+            raise TypeError("attributeOldValue and attributeFilter need attributes")
+        if options.characterDataOldValue and not options.characterData:
+            raise TypeError("characterDataOldValue needs characterData")
+        # Observing the same node again replaces its options.
+        MutationObserver.__registrations.setdefault(target, {})[self] = options
+        self.__nodes.add(target)
+
+    def disconnect(self) -> None:
+        for node in list(self.__nodes):
+            registrations = MutationObserver.__registrations.get(node)
+            if registrations is not None:
+                registrations.pop(self, None)
+                if not registrations:
+                    del MutationObserver.__registrations[node]
+        self.__nodes.clear()
+        self.__records = []
+
+    def takeRecords(self) -> List[MutationRecord]:
+        records, self.__records = self.__records, []
+        return records
+
+    @staticmethod
+    def hasObservers() -> bool:
+        """
+        Mutations check this before building records, so they cost nothing while nothing is observed.
+        """
+        return bool(MutationObserver.__registrations)
+
+    @staticmethod
+    def setScheduler(scheduler: Optional[Callable[[Callable[[], None]], None]]) -> None:
+        """
+        Sets the function which is called with notify() once records are queued. Without one,
+        records are delivered when notify() is called.
+        """
+        MutationObserver.__scheduler = scheduler
+
+    @staticmethod
+    def queueRecord(type: str, target: 'Node', attributeName: Optional[str] = None,
+                    oldValue: Union[str, Callable[[], str], None] = None, addedNodes: Sequence['Node'] = (), removedNodes: Sequence['Node'] = (),
+                    previousSibling: Optional['Node'] = None, nextSibling: Optional['Node'] = None) -> None:
+        """
+        Queues a record for every observer of target or of its ancestors with subtree which is
+        interested in the mutation, https://dom.spec.whatwg.org/#queueing-a-mutation-record
+        oldValue can be a function, which is only called if an observer asks for old values.
+        """
+        interested: Dict[MutationObserver, Optional[str]] = {}
+        node: Optional['Node'] = target
+        while node is not None:
+            for observer, options in MutationObserver.__registrations.get(node, {}).items():
+                if node is not target and not options.subtree:
+                    continue
+                if type == "attributes" and (not options.attributes or (
+                        options.attributeFilter is not None and attributeName not in options.attributeFilter)):
+                    continue
+                if type == "characterData" and not options.characterData:
+                    continue
+                if type == "childList" and not options.childList:
+                    continue
+                if observer not in interested:
+                    interested[observer] = None
+                if (type == "attributes" and options.attributeOldValue) or \
+                        (type == "characterData" and options.characterDataOldValue):
+                    if callable(oldValue):
+                        oldValue = oldValue()
+                    interested[observer] = oldValue
+            node = node.parentNode
+        for observer, observerOldValue in interested.items():
+            observer.__records.append(MutationRecord(type, target, list(addedNodes), list(removedNodes),
+                                                     previousSibling, nextSibling, attributeName, observerOldValue))
+            if observer not in MutationObserver.__pending:
+                MutationObserver.__pending.append(observer)
+        if interested and not MutationObserver.__notifyScheduled and MutationObserver.__scheduler is not None:
+            MutationObserver.__notifyScheduled = True
+            MutationObserver.__scheduler(MutationObserver.notify)
+
+    @staticmethod
+    def notify() -> None:
+        """
+        Delivers queued records to callbacks, also the ones queued by the callbacks.
+        https://dom.spec.whatwg.org/#notify-mutation-observers
+        """
+        MutationObserver.__notifyScheduled = False
+        while MutationObserver.__pending:
+            pending, MutationObserver.__pending = MutationObserver.__pending, []
+            for observer in pending:
+                records = observer.takeRecords()
+                if not records:
+                    continue
+                try:
+                    observer.__callback(records, observer)
+                except Exception as e:
+                    log("Mutation observer callback failed", e)
@@ -1,25 +1,47 @@
-from typing import List, Union
+from typing import List, Tuple, Union
 from web.dom.Document import Document
-from web.dom.events.EventTarget import EventTarget
-import uuid
+from web.dom.MutationObserver import MutationObserver
+from web.dom.events.EventTarget import EventTarget, ListenersByType
+
+# Dirty flags of nodes, set by mutations and cleared once style, layout and paint have caught up with them.
+STYLE_DIRTY = 1
+LAYOUT_DIRTY = 2
+PAINT_DIRTY = 4
+# Set on ancestors of dirty nodes so clean subtrees can be skipped, child flag of a flag is the flag << 3.
+CHILD_STYLE_DIRTY = STYLE_DIRTY << 3
+CHILD_LAYOUT_DIRTY = LAYOUT_DIRTY << 3
+CHILD_PAINT_DIRTY = PAINT_DIRTY << 3
+DIRTY = STYLE_DIRTY | LAYOUT_DIRTY | PAINT_DIRTY
 
 
 class Node(EventTarget):
+    # Slots instead of per instance dicts, pages can have hundreds of thousands of nodes.
+    # style is the computed style, set by web.css.utils.style().
+    # Children are a linked list, so inserting and removing them takes constant time on wide parents.
+    __slots__ = ("id", "style", "__parentNode", "__firstChild", "__lastChild", "__previousSibling", "__nextSibling",
+                 "__children", "__dirty", "__nodeName", "__document", "__eventListeners", "__eventPath", "__weakref__")
+    # Changed with any parent, cached event paths built before are rebuilt.
+    __treeVersion = 0
 
     def __init__(self, parent: Union['Node', None], document: Document):
-        self.id = uuid.uuid4()
+        self.id: int = document.registerNode(self) if document is not None else -1
         self.__parentNode: Union[Node, None] = parent
-        self.__children: List[Node] = []
+        self.__firstChild: Union[Node, None] = None
+        self.__lastChild: Union[Node, None] = None
+        self.__previousSibling: Union[Node, None] = None
+        self.__nextSibling: Union[Node, None] = None
+        # List of children built on access, dropped when children change.
+        self.__children: Union[List[Node], None] = None
+        # New nodes have not been styled, laid out or painted yet.
+        self.__dirty = DIRTY
         self.__nodeName: Union[str, None] = None
         self.__document: Union[Document, None] = document
+        self.__eventListeners: Union[ListenersByType, None] = None
+        # Tree version and event path built then.
+        self.__eventPath: Union[Tuple[int, Tuple[EventTarget, ...]], None] = None
 
     def __str__(self) -> str:
-        treeString = "*Document*\n"
-
-        for node in self.children:
-            treeString += node.__str__()
-
-        return treeString
+        return "*Document*\n" + "".join(str(node) for node in self.children)
 
     @property
     def name(self) -> Union[str, None]:
@@ -36,21 +58,194 @@ class Node(EventTarget):
     @parentNode.setter
     def parentNode(self, parent: 'Node') -> None:
         self.__parentNode = parent
+        # Event paths only depend on parents.
+        Node.__treeVersion += 1
+
+    def get_the_parent(self) -> Union['Node', None]:
+        return self.parentNode
+
+    def event_path(self) -> Tuple[EventTarget, ...]:
+        cached = self.__eventPath
+        if cached is None or cached[0] != Node.__treeVersion:
+            cached = self.__eventPath = (Node.__treeVersion, super().event_path())
+        return cached[1]
+
+    @property
+    def _event_listeners(self) -> Union[ListenersByType, None]:
+        return self.__eventListeners
+
+    @_event_listeners.setter
+    def _event_listeners(self, listeners: Union[ListenersByType, None]) -> None:
+        self.__eventListeners = listeners
+
+    @property
+    def isConnected(self) -> bool:
+        root = self
+        while root.parentNode is not None:
+            root = root.parentNode
+        return self.__document is not None and root is self.__document.documentType
 
     def appendChild(self, node: 'Node') -> None:
-        self.__children.append(node)
+        self.__adopt(node)
+        node.__previousSibling = self.__lastChild
+        node.__nextSibling = None
+        if self.__lastChild is None:
+            self.__firstChild = node
+        else:
+            self.__lastChild.__nextSibling = node
+        self.__lastChild = node
+        self.__children = None
+        self.__childInserted(node)
+
+    def __childInserted(self, node: 'Node') -> None:
+        node.markDirty(DIRTY)
+        self.markDirty(LAYOUT_DIRTY | PAINT_DIRTY)
+        if MutationObserver.hasObservers():
+            MutationObserver.queueRecord("childList", self, addedNodes=[node],
+                                         previousSibling=node.__previousSibling, nextSibling=node.__nextSibling)
+        if self.__document is not None:
+            self.__document.nodeInserted(self, node)
 
     def appendChildBeforeElement(self, node: 'Node', insertBefore: 'Node') -> None:
-        index = self.__children.index(insertBefore)
-        self.__children.insert(index, node)
+        self.__checkChild(insertBefore)
+        if insertBefore is node:
+            # Inserting a node before itself keeps it where it is.
+            return
+        self.__adopt(node)
+        previous = insertBefore.__previousSibling
+        node.__previousSibling = previous
+        node.__nextSibling = insertBefore
+        insertBefore.__previousSibling = node
+        if previous is None:
+            self.__firstChild = node
+        else:
+            previous.__nextSibling = node
+        self.__children = None
+        self.__childInserted(node)
 
     def removeChild(self, node: 'Node') -> None:
-        self.__children.remove(node)
+        self.__checkChild(node)
+        if MutationObserver.hasObservers():
+            MutationObserver.queueRecord("childList", self, removedNodes=[node],
+                                         previousSibling=node.__previousSibling, nextSibling=node.__nextSibling)
+        if node.__previousSibling is None:
+            self.__firstChild = node.__nextSibling
+        else:
+            node.__previousSibling.__nextSibling = node.__nextSibling
+        if node.__nextSibling is None:
+            self.__lastChild = node.__previousSibling
+        else:
+            node.__nextSibling.__previousSibling = node.__previousSibling
+        node.__previousSibling = node.__nextSibling = None
+        node.parentNode = None
+        self.__children = None
+        self.markDirty(LAYOUT_DIRTY | PAINT_DIRTY)
+        if self.__document is not None:
+            self.__document.nodeRemoved(self, node)
+
+    def __checkChild(self, node: 'Node') -> None:
+        if node.parentNode is not self or not self.__isLinked(node):
+            raise ValueError("Node is not a child of this node")
+
+    def __isLinked(self, node: 'Node') -> bool:
+        # New nodes get their parent before they are appended to it, only linked ones are among its children.
+        return node.__previousSibling is not None or self.__firstChild is node
+
+    def __adopt(self, node: 'Node') -> None:
+        """
+        Removes node from the children it is linked in, if any, and makes this node its parent.
+        """
+        parent = node.parentNode
+        if parent is not None and parent.__isLinked(node):
+            parent.removeChild(node)
+        if node.parentNode is not self:
+            node.parentNode = self
+
+    def replaceChildren(self, *nodes: 'Node') -> None:
+        """
+        Replaces all children with the given nodes, e.g. the ones returned by
+        HTMLDocumentParser.parse_fragment().
+        """
+        child = self.__firstChild
+        if child is not None and MutationObserver.hasObservers():
+            MutationObserver.queueRecord("childList", self, removedNodes=self.children)
+        self.__firstChild = self.__lastChild = self.__children = None
+        self.markDirty(LAYOUT_DIRTY | PAINT_DIRTY)
+        while child is not None:
+            nextSibling = child.__nextSibling
+            child.__previousSibling = child.__nextSibling = None
+            if self.__document is not None:
+                self.__document.nodeRemoved(self, child)
+            child.parentNode = None
+            child = nextSibling
+        for node in nodes:
+            self.appendChild(node)
 
     @property
     def children(self) -> List['Node']:
+        """
+        Children in order. The list is cached until children change and must not be modified.
+        """
+        if self.__children is None:
+            children = []
+            child = self.__firstChild
+            while child is not None:
+                children.append(child)
+                child = child.__nextSibling
+            if not children:
+                return children
+            self.__children = children
         return self.__children
 
+    @property
+    def dirtyFlags(self) -> int:
+        return self.__dirty
+
+    def markDirty(self, flags: int) -> None:
+        """
+        Sets the dirty flags of the node and the matching child flags of its ancestors. Marking
+        stops at the first ancestor which already has them, so repeated marks take constant time.
+        """
+        self.__dirty |= flags
+        childFlags = (flags & DIRTY) << 3
+        node = self.__parentNode
+        while node is not None and node.__dirty & childFlags != childFlags:
+            node.__dirty |= childFlags
+            node = node.__parentNode
+
+    def clearDirty(self, flags: int = DIRTY) -> None:
+        """
+        Clears the dirty flags and their child flags from the node and its descendants. Only
+        descendants reachable through child flags are visited, the other ones are clean already.
+        """
+        childFlags = (flags & DIRTY) << 3
+        stack: List[Node] = [self]
+        while stack:
+            node = stack.pop()
+            dirty = node.__dirty
+            node.__dirty = dirty & ~(flags | childFlags)
+            if dirty & childFlags:
+                child = node.__firstChild
+                while child is not None:
+                    stack.append(child)
+                    child = child.__nextSibling
+
+    @property
+    def firstChild(self) -> Union['Node', None]:
+        return self.__firstChild
+
+    @property
+    def lastChild(self) -> Union['Node', None]:
+        return self.__lastChild
+
+    @property
+    def previousSibling(self) -> Union['Node', None]:
+        return self.__previousSibling
+
+    @property
+    def nextSibling(self) -> Union['Node', None]:
+        return self.__nextSibling
+
     @property
     def document(self) -> Union[Document, None]:
         return self.__document
@@ -3,4 +3,4 @@ from web.dom.Node import Node
 from web.dom.CharacterData import CharacterData
 
 class Comment(CharacterData):
-	pass
\ No newline at end of file
+	__slots__ = ()
\ No newline at end of file
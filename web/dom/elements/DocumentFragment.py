@@ -3,5 +3,7 @@ from web.dom.Node import Node
 
 
 class DocumentFragment(Node):
+    __slots__ = ()
+
     def __init__(self, *args: str, **kwargs: int) -> None:
         super(DocumentFragment, self).__init__(*args, **kwargs)
\ No newline at end of file
@@ -1,10 +1,14 @@
+import io
 from typing import Dict, Union, Optional
 from web.dom.Document import Document
 from web.html.parser.HTMLToken import HTMLCommentOrCharacter, HTMLDoctype, HTMLTag, HTMLToken
-from web.dom.Node import Node
+from web.dom.MutationObserver import MutationObserver
+from web.dom.Node import DIRTY, LAYOUT_DIRTY, PAINT_DIRTY, Node
 
 
 class Element(Node):
+    __slots__ = ("__localName", "__id", "__attributes", "__namespace")
+
     def __init__(self, token: HTMLTag, parent: Node, document: Document, namespace: str = "") -> None:
         super(Element, self).__init__(parent, document)
         self.__localName: Optional[str] = token.name
@@ -20,34 +24,26 @@ class Element(Node):
         return self.get_contents()
 
     def get_contents(self) -> str:
+        from web.html.serializer.HTMLSerializer import HTMLSerializer
+        stream = io.StringIO()
+        HTMLSerializer(stream).write_contents(self)
+        return stream.getvalue()
 
-        treeString = f"<{self.name} {self.attributes}>"
-        for node in self.children:
-            treeString += node.get_contents()
-
-        if self.children:
-            treeString += f"</{self.name}>"
-        else:
-            treeString += f"</{self.name}>"
+    def printTree(self, depth: int = 0) -> str:
+        from web.html.serializer.HTMLSerializer import HTMLSerializer
+        stream = io.StringIO()
+        HTMLSerializer(stream).write_tree(self, depth)
+        return stream.getvalue()
 
-        return treeString
+    @property
+    def outerHTML(self) -> str:
+        from web.html.serializer.HTMLSerializer import HTMLSerializer
+        return HTMLSerializer.outer_html(self)
 
-    def printTree(self, depth: int = 0) -> str:
-        indentation = ""
-        for _ in range(depth):
-            indentation += "\t"
-        depth += 1
-        treeString = f"{indentation}<{self.name} {self.attributes}>"
-        for node in self.children:
-            treeString += "\n"
-            treeString += node.printTree(depth)
-
-        if self.children:
-            treeString += f"{indentation}</{self.name}>\n"
-        else:
-            treeString += f"</{self.name}>\n"
-
-        return treeString
+    @property
+    def innerHTML(self) -> str:
+        from web.html.serializer.HTMLSerializer import HTMLSerializer
+        return HTMLSerializer.inner_html(self)
 
     @property
     def namespace(self) -> str:
@@ -60,3 +56,37 @@ class Element(Node):
     @property
     def attributes(self) -> Dict[str, str]:
         return self.__attributes
+
+    def getAttribute(self, name: str) -> Optional[str]:
+        return self.attributes.get(name)
+
+    def setAttribute(self, name: str, value: str) -> None:
+        """
+        Sets the attribute and updates indexes of the document, unlike assigning to attributes directly.
+        """
+        oldValue = self.attributes.get(name)
+        if MutationObserver.hasObservers():
+            MutationObserver.queueRecord("attributes", self, attributeName=name, oldValue=oldValue)
+        self.attributes[name] = value
+        self.markDirty(self.attributeDirtyFlags(name))
+        if self.document is not None:
+            self.document.attributeChanged(self, name, oldValue)
+
+    def removeAttribute(self, name: str) -> None:
+        oldValue = self.attributes.pop(name, None)
+        if oldValue is None:
+            return
+        if MutationObserver.hasObservers():
+            MutationObserver.queueRecord("attributes", self, attributeName=name, oldValue=oldValue)
+        self.markDirty(self.attributeDirtyFlags(name))
+        if self.document is not None:
+            self.document.attributeChanged(self, name, oldValue)
+
+    def attributeDirtyFlags(self, name: str) -> int:
+        """
+        Dirty flags set when the attribute changes. Selectors match ids and classes and the
+        style attribute is styled directly, other attributes are only read by layout and paint.
+        """
+        if name in ("id", "class", "style"):
+            return DIRTY
+        return LAYOUT_DIRTY | PAINT_DIRTY
@@ -1,4 +1,4 @@
 from web.dom.elements.Element import Element
 
 class HTMLCircleElement(Element):
-		pass #TODO: Implement missing properties and functions.
+		__slots__ = () #TODO: Implement missing properties and functions.
@@ -1,5 +1,5 @@
 from web.dom.elements.Element import Element
 
 class HTMLElement(Element):
-	pass #TODO: Implement missing properties and functions.
+	__slots__ = () #TODO: Implement missing properties and functions.
 		
\ No newline at end of file
@@ -1,4 +1,11 @@
+from web.dom.Node import PAINT_DIRTY
 from web.dom.elements.Element import Element
 
 class HTMLInputElement(Element):
-		pass #TODO: Implement missing properties and functions.
\ No newline at end of file
+		__slots__ = () #TODO: Implement missing properties and functions.
+
+		def attributeDirtyFlags(self, name: str) -> int:
+			# Only submit buttons are sized by their value, other inputs just paint it.
+			if name == "value" and self.attributes.get("type") != "submit":
+				return PAINT_DIRTY
+			return super(HTMLInputElement, self).attributeDirtyFlags(name)
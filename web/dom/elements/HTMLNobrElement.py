@@ -1,4 +1,4 @@
 from web.dom.elements.Element import Element
 
 class HTMLNobrElement(Element):
-		pass #TODO: Implement missing properties and functions.
\ No newline at end of file
+		__slots__ = () #TODO: Implement missing properties and functions.
\ No newline at end of file
@@ -3,6 +3,8 @@ from web.dom.Document import Document
 from web.dom.elements.Element import Element
 
 class HTMLScriptElement(Element):
+	__slots__ = ("__parserDocument", "__isNonBlocking")
+
 	def __init__(self, *args: str, **kwargs: int) -> None:
 		super(HTMLScriptElement, self).__init__(*args, **kwargs)
 		self.__parserDocument: Union[Document, None] = None
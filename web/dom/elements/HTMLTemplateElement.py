@@ -3,6 +3,8 @@ from web.dom.elements.Element import Element
 
 
 class HTMLTemplateElement(Element):
+    __slots__ = ("__content",)
+
     def __init__(self, *args: str, **kwargs: int) -> None:
         super(HTMLTemplateElement, self).__init__(*args, **kwargs)
         self.__content: DocumentFragment = DocumentFragment(*args[1:])
@@ -4,6 +4,7 @@ from web.dom.CharacterData import CharacterData
 
 
 class Text(CharacterData):
+	__slots__ = ()
 
 	def __init__(self, document: Document, parent: Node, data: str = "") -> None:
 		super(Text, self).__init__(data, parent, document)
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Tuple
 
 from web.dom.events.EventTarget import EventTarget
 from web.dom.types import DOMString
@@ -7,12 +7,17 @@ from web.dom.types import DOMString
 
 @dataclass
 class EventInit:
-    bubbles: bool = False,
-    cancelable: bool = False,
+    bubbles: bool = False
+    cancelable: bool = False
     composed: bool = False
 
 
 class Event:
+    # Values of event_phase.
+    NONE = 0
+    CAPTURING_PHASE = 1
+    AT_TARGET = 2
+    BUBBLING_PHASE = 3
 
     def __init__(self, event_type: DOMString, event_init_dict: EventInit = EventInit()) -> None:
         self.__event_type = event_type
@@ -22,6 +27,15 @@ class Event:
 
         self.__target: Optional[EventTarget] = None
         self.__current_target: Optional[EventTarget] = None
+        self.__path: Tuple[EventTarget, ...] = ()
+        self.__event_phase = Event.NONE
+        self.__propagation_stopped = False
+        self.__immediate_propagation_stopped = False
+        self.__default_prevented = False
+
+    @property
+    def type(self) -> DOMString:
+        return self.__event_type
 
     @property
     def bubbles(self) -> bool:
@@ -46,3 +60,52 @@ class Event:
     @property
     def current_target(self) -> Optional[EventTarget]:
         return self.__current_target
+
+    @current_target.setter
+    def current_target(self, current_target: Optional[EventTarget]) -> None:
+        self.__current_target = current_target
+
+    @property
+    def event_phase(self) -> int:
+        return self.__event_phase
+
+    @event_phase.setter
+    def event_phase(self, event_phase: int) -> None:
+        self.__event_phase = event_phase
+
+    @property
+    def path(self) -> Tuple[EventTarget, ...]:
+        return self.__path
+
+    @path.setter
+    def path(self, path: Tuple[EventTarget, ...]) -> None:
+        self.__path = path
+
+    def composed_path(self) -> Tuple[EventTarget, ...]:
+        """
+        The target and its ancestors while the event is dispatched, shared with the target so it is not copied.
+        """
+        return self.__path
+
+    @property
+    def propagation_stopped(self) -> bool:
+        return self.__propagation_stopped
+
+    @property
+    def immediate_propagation_stopped(self) -> bool:
+        return self.__immediate_propagation_stopped
+
+    def stop_propagation(self) -> None:
+        self.__propagation_stopped = True
+
+    def stop_immediate_propagation(self) -> None:
+        self.__propagation_stopped = True
+        self.__immediate_propagation_stopped = True
+
+    @property
+    def default_prevented(self) -> bool:
+        return self.__default_prevented
+
+    def prevent_default(self) -> None:
+        if self.__cancelable:
+            self.__default_prevented = True
@@ -1,14 +1,153 @@
-from typing import Optional, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union, cast
+from browser.utils.logging import log
 from web.dom.types import DOMString
 
+if TYPE_CHECKING:
+    from web.dom.events.Event import Event
+    from web.dom.events.EventListener import EventListener
+
+# Functions taking the event or objects with handle_event, like EventListener.
+EventCallback = Union[Callable[['Event'], None], 'EventListener']
+
+
+@dataclass
+class _Listener:
+    callback: Any
+    capture: bool
+    once: bool
+    # Set when removed during a dispatch which still iterates the list holding it.
+    removed: bool = False
+
+
+ListenersByType = Dict[str, List[_Listener]]
+
 
 class EventTarget:
     """
     An EventTarget object represents a target to which an event can be dispatched when something has occurred.
+    Events are dispatched as in https://dom.spec.whatwg.org/#concept-event-dispatch, through the capture,
+    target and bubble phases of the path from the target to the root. Listener lists are replaced
+    instead of changed, so dispatches iterate them without copying.
     """
+    __slots__ = ()
 
     def __init__(self) -> None:
         pass
 
-    def add_event_listener(self, event_type: DOMString, event_listener: Optional[Callable]) -> None:
+    def add_event_listener(self, event_type: DOMString, event_listener: Optional[EventCallback],
+                           capture: bool = False, once: bool = False) -> None:
+        if event_listener is None:
+            return
+        listeners_by_type = self._event_listeners
+        if listeners_by_type is None:
+            listeners_by_type = self._event_listeners = {}
+        listeners = listeners_by_type.get(event_type, [])
+        if any(listener.callback == event_listener and listener.capture == capture for listener in listeners):
+            return
+        listeners_by_type[event_type] = listeners + [_Listener(event_listener, capture, once)]
+
+    def remove_event_listener(self, event_type: DOMString, event_listener: Optional[EventCallback],
+                              capture: bool = False) -> None:
+        listeners_by_type = self._event_listeners
+        if listeners_by_type is None or event_type not in listeners_by_type:
+            return
+        self.__remove_listeners(event_type, [listener for listener in listeners_by_type[event_type]
+                                             if listener.callback == event_listener and listener.capture == capture])
+
+    def __remove_listeners(self, event_type: str, removed: List[_Listener]) -> None:
+        if not removed:
+            return
+        listeners_by_type = cast(ListenersByType, self._event_listeners)
+        for listener in removed:
+            listener.removed = True
+        listeners = [listener for listener in listeners_by_type[event_type] if not listener.removed]
+        if listeners:
+            listeners_by_type[event_type] = listeners
+        else:
+            del listeners_by_type[event_type]
+            if not listeners_by_type:
+                self._event_listeners = None
+
+    @property
+    def _event_listeners(self) -> Optional[ListenersByType]:
+        """
+        Listeners by event type, None while there are none. Subclasses keep them, so they are
+        dropped together with the target.
+        """
+        raise NotImplementedError
+
+    @_event_listeners.setter
+    def _event_listeners(self, listeners: Optional[ListenersByType]) -> None:
         raise NotImplementedError
+
+    def get_the_parent(self) -> Optional['EventTarget']:
+        """
+        Next target of the propagation path, https://dom.spec.whatwg.org/#get-the-parent
+        """
+        return None
+
+    def event_path(self) -> Tuple['EventTarget', ...]:
+        """
+        The target followed by its ancestors. Nodes reuse it until a tree changes.
+        """
+        targets: List[EventTarget] = []
+        target: Optional[EventTarget] = self
+        while target is not None:
+            targets.append(target)
+            target = target.get_the_parent()
+        return tuple(targets)
+
+    def dispatch_event(self, event: 'Event') -> bool:
+        """
+        Dispatches the event to listeners of the target and its ancestors. Returns False if a listener
+        canceled the event.
+        """
+        from web.dom.events.Event import Event
+        if event.event_phase != Event.NONE:
+            raise ValueError("Event is already being dispatched")
+        path = self.event_path()
+        event.target = self
+        event.path = path
+        event.event_phase = Event.CAPTURING_PHASE
+        for target in reversed(path[1:]):
+            if event.propagation_stopped:
+                break
+            target.__invoke(event, True)
+        if not event.propagation_stopped:
+            event.event_phase = Event.AT_TARGET
+            self.__invoke(event, True)
+            if not event.propagation_stopped:
+                self.__invoke(event, False)
+        if event.bubbles:
+            event.event_phase = Event.BUBBLING_PHASE
+            for target in path[1:]:
+                if event.propagation_stopped:
+                    break
+                target.__invoke(event, False)
+        event.event_phase = Event.NONE
+        event.current_target = None
+        event.path = ()
+        return not event.default_prevented
+
+    def __invoke(self, event: 'Event', capture: bool) -> None:
+        listeners_by_type = self._event_listeners
+        listeners = listeners_by_type.get(event.type) if listeners_by_type is not None else None
+        if not listeners:
+            return
+        event.current_target = self
+        for listener in listeners:
+            if listener.removed or listener.capture != capture:
+                continue
+            if listener.once:
+                self.__remove_listeners(event.type, [listener])
+            try:
+                if callable(listener.callback):
+                    listener.callback(event)
+                else:
+                    listener.callback.handle_event(event)
+            except Exception as e:
+                # Exceptions are reported and do not stop the dispatch.
+                log("Event listener failed", e)
+            if event.immediate_propagation_stopped:
+                break
@@ -0,0 +1,23 @@
+from dataclasses import dataclass
+
+from web.dom.events.Event import Event, EventInit
+from web.dom.types import DOMString
+
+
+@dataclass
+class KeyboardEventInit(EventInit):
+    key: str = ""
+
+
+class KeyboardEvent(Event):
+
+    def __init__(self, event_type: DOMString, event_init_dict: KeyboardEventInit = KeyboardEventInit()) -> None:
+        super().__init__(event_type, event_init_dict)
+        self.__key = event_init_dict.key
+
+    @property
+    def key(self) -> str:
+        """
+        The character of the key, or its name like "Backspace", https://w3c.github.io/uievents-key/
+        """
+        return self.__key
@@ -0,0 +1,5 @@
+class ReadOnlyError(TypeError):
+    """
+    Raised when changing a node or document which can not be changed, like the DOM
+    NoModificationAllowedError.
+    """
@@ -1,4 +1,4 @@
-from typing import Dict, List, Union, cast
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 singleCodePointEntities: Dict[str, int] = {
     "AElig;": 0x000C6,
@@ -2238,19 +2238,53 @@ doubleCodePointEntities: Dict[str, List[int]] = {
 }
 
 
-def getNamedCharFromTable(namedChar: str) -> Union[List[int], None]:
+# Key under which the code points of a complete entity name are stored in the trie. Entity names
+# never contain an empty string, so it can not collide with a character edge.
+_TERMINAL = ""
+
+
+def _buildEntityTrie() -> Dict[str, Any]:
     """
-    Returns value for named char if one is found.
+    Builds a character trie of all named character references so that the longest
+    matching name can be found in time proportional to the length of the name.
     """
-    for key in singleCodePointEntities.keys():
-        if key.lower() == namedChar.lower():
-            return [cast(int, singleCodePointEntities.get(key))]
+    root: Dict[str, Any] = {}
+    for name, codePoint in singleCodePointEntities.items():
+        node = root
+        for char in name:
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = [codePoint]
+
+    for name, codePoints in doubleCodePointEntities.items():
+        node = root
+        for char in name:
+            node = node.setdefault(char, {})
+        node[_TERMINAL] = codePoints
 
-    for key in doubleCodePointEntities.keys():
-        if key.lower() == namedChar.lower():
-            return doubleCodePointEntities.get(key)
+    return root
 
-    return None
+
+entityTrie: Dict[str, Any] = _buildEntityTrie()
+
+
+def _findTrieNode(namedChar: str) -> Optional[Dict[str, Any]]:
+    node = entityTrie
+    for char in namedChar:
+        child = node.get(char)
+        if child is None:
+            return None
+        node = child
+    return node
+
+
+def getNamedCharFromTable(namedChar: str) -> Union[List[int], None]:
+    """
+    Returns value for named char if one is found. Names are case-sensitive.
+    """
+    node = _findTrieNode(namedChar)
+    if node is None:
+        return None
+    return cast(Optional[List[int]], node.get(_TERMINAL))
 
 
 def atLeastOneNameStartsWith(namedChar: str) -> bool:
@@ -2258,12 +2292,29 @@ def atLeastOneNameStartsWith(namedChar: str) -> bool:
     Returns boolean based on if any key in named character 
     reference table starts with given string.
     """
-    for key in singleCodePointEntities.keys():
-        if key.lower().startswith(namedChar.lower()):
-            return True
+    return _findTrieNode(namedChar) is not None
 
-    for key in doubleCodePointEntities.keys():
-        if key.lower().startswith(namedChar.lower()):
-            return True
 
-    return False
+def longestNamedCharMatch(text: str, start: int = 0) -> Tuple[int, Union[List[int], None], bool]:
+    """
+    Returns length and value of the longest named character reference found
+    at the start index of the text, or (0, None) if no name matches. The last item
+    tells if the text ended while a longer name could still match.
+    """
+    node = entityTrie
+    matchLength = 0
+    match: Union[List[int], None] = None
+    index = start
+    textLength = len(text)
+    while index < textLength:
+        child = node.get(text[index])
+        if child is None:
+            return matchLength, match, False
+        node = child
+        index += 1
+        value = node.get(_TERMINAL)
+        if value is not None:
+            matchLength = index - start
+            match = value
+
+    return matchLength, match, any(key != _TERMINAL for key in node)
@@ -6,17 +6,23 @@ from web.dom.elements.HTMLTemplateElement import HTMLTemplateElement
 from web.html.parser.ListOfActiveElements import ListOfActiveElements
 from web.html.parser.StackOfOpenElements import StackOfOpenElements
 from web.dom.elements.Comment import Comment
-from web.html.parser.utils import tag_is_special
+from web.html.parser.utils import tag_is_special, BLOCK_LEVEL_ELEMENTS, WHITESPACE_PRESERVING_ELEMENTS
 from web.dom.elements.Element import Element
 from web.dom.Document import Document
 from web.dom.Node import Node
 from web.dom.elements.Text import Text
 from web.dom.DocumentType import DocumentType
-from web.html.parser.HTMLToken import HTMLToken, HTMLDoctype, HTMLTag, HTMLCommentOrCharacter
+from web.html.parser.HTMLToken import HTMLToken, HTMLDoctype, HTMLTag, HTMLCommentOrCharacter, PARSER_WHITESPACE
 from web.html.parser.HTMLTokenizerRefactored import HTMLTokenizer, DEBUG
+from web.html.parser.PreloadScanner import PreloadScanner
 from web.dom.ElementFactory import ElementFactory
 from dataclasses import dataclass
 from browser.utils.logging import log
+import time
+
+# Bump whenever the trees built for the same input change, so DOMs cached by older versions are not restored.
+PARSER_VERSION = 1
+
 
 class HTMLDocumentParser:
     @dataclass
@@ -49,11 +55,33 @@ class HTMLDocumentParser:
         AfterAfterBody = auto()
         AfterAfterFrameset = auto()
 
-    def __init__(self, html: str) -> None:
+    # Modes which treat leading whitespace of character token differently from the rest of the data.
+    _WHITESPACE_SENSITIVE_MODES = frozenset({
+        _Mode.BeforeHead,
+        _Mode.InHead,
+        _Mode.InHeadNoscript,
+        _Mode.AfterHead,
+    })
+
+    def __init__(self,
+                 html: str = "",
+                 cb: Optional[Callable] = None,
+                 preload_cb: Optional[Callable[[str, str], None]] = None,
+                 progress_cb: Optional[Callable] = None,
+                 progress_interval: Optional[float] = None,
+                 progress_characters: Optional[int] = None,
+                 elide_whitespace: bool = False) -> None:
+        """
+        preload_cb is called with URL and destination of subresources as soon as their start tags
+        are tokenized, see PreloadScanner.
+        progress_cb is called with the partially parsed document node whenever progress_interval
+        seconds passed or progress_characters more characters were parsed since the last call.
+        elide_whitespace skips whitespace-only text nodes which can not affect rendering.
+        """
         self._current_insertion_mode = self._Mode.Initial
         self._original_insertion_mode: Union[HTMLDocumentParser._Mode, None] = None
         self._open_elements = StackOfOpenElements()
-        self._tokenizer = HTMLTokenizer(html)
+        self._tokenizer = HTMLTokenizer(html, incremental=True)
         self._document = Document()
         self._document_node = None
         self._scripting: bool = False
@@ -63,7 +91,16 @@ class HTMLDocumentParser:
         self.parsing_fragment: bool = False
         self.invokef_while_document_write: bool = False
         self._form_element: Union[Element, None] = None
-        self._notify_cb: Union[Callable, None] = None
+        self._context_element: Optional[Element] = None
+        self._notify_cb: Union[Callable, None] = cb
+        self._preload_scanner = PreloadScanner(preload_cb) if preload_cb is not None else None
+        self._finished: bool = False
+        self._progress_cb = progress_cb
+        self._progress_interval = progress_interval
+        self._progress_characters = progress_characters
+        self._last_progress_time = time.perf_counter()
+        self._last_progress_characters = 0
+        self._elide_whitespace = elide_whitespace
 
     @property
     def _current_element(self) -> Node:
@@ -73,11 +110,136 @@ class HTMLDocumentParser:
         return self._document_node if self._open_elements.is_empty() else self._open_elements.last()
 
     def run(self, cb: Callable) -> None:
+        """
+        Parses rest of the document and notifies cb with the document node.
+        """
         self._notify_cb = cb
+        self.close()
+
+    @staticmethod
+    def parse_fragment(context_element: Element, html: str, elide_whitespace: bool = False) -> List[Node]:
+        """
+        Parses html as contents of the context element, like setting its innerHTML. Returned nodes
+        have no parent, so they can be spliced into the context element or anywhere else in its document.
+        """
+        document = context_element.document if context_element.document is not None else Document()
+        parser = HTMLDocumentParser(html, elide_whitespace=elide_whitespace)
+        parser.parsing_fragment = True
+        parser._context_element = context_element
+        parser._document = document
+
+        tokenizer = parser._tokenizer
+        if context_element.name in ["title", "textarea"]:
+            tokenizer.switch_state_to(tokenizer.State.RCDATA)
+        elif context_element.name in ["style", "xmp", "iframe", "noembed", "noframes"]:
+            tokenizer.switch_state_to(tokenizer.State.RAWTEXT)
+        elif context_element.name == "script":
+            tokenizer.switch_state_to(tokenizer.State.ScriptData)
+        elif context_element.name == "noscript" and parser._scripting:
+            tokenizer.switch_state_to(tokenizer.State.RAWTEXT)
+        elif context_element.name == "plaintext":
+            tokenizer.switch_state_to(tokenizer.State.PLAINTEXT)
+
+        token = HTMLTag(HTMLToken.TokenType.StartTag)
+        token.name = "html"
+        root = cast(Element, ElementFactory.create_element(token, None, document))
+        parser._document_node = root
+        parser._open_elements.push(root)
+        parser._reset_insertion_mode_appropriately()
+
+        node: Optional[Node] = context_element
+        while node is not None and node.name != "form":
+            node = node.parentNode
+        parser._form_element = cast(Optional[Element], node)
+
+        parser.close()
+        nodes = list(root.children)
+        for node in nodes:
+            root.removeChild(node)
+            node.parentNode = None
+        return nodes
+
+    def feed(self, chunk: str) -> None:
+        """
+        Parses chunk of the document as far as possible, e.g. as it arrives from the network.
+        """
+        self.append_input(chunk)
+        self.parse_slice()
+
+    def close(self) -> None:
+        """
+        Marks end of the document and finishes parsing.
+        """
+        self.close_input()
+        self.parse_slice()
+
+    def append_input(self, chunk: str) -> None:
+        """
+        Adds chunk of the document to the input without parsing it, see parse_slice().
+        """
+        self._tokenizer.feed(chunk)
+
+    def close_input(self) -> None:
+        """
+        Marks end of the document without parsing the rest of the input, see parse_slice().
+        """
+        self._tokenizer.close()
+
+    def parse_slice(self, max_tokens: Optional[int] = None, max_time: Optional[float] = None) -> bool:
+        """
+        Processes tokens from the input until max_tokens were processed or max_time seconds passed.
+        Returns True if parsing stopped because of the limits, False if the input is exhausted
+        or the document is finished.
+        """
+        deadline = time.perf_counter() + max_time if max_time is not None else None
+        processed_tokens = 0
+        limited = False
         token = self._tokenizer.next_token()
         while token:
+            if self._preload_scanner is not None:
+                self._preload_scanner.scan(token)
             self._token_handler(token)
+            processed_tokens += 1
+            # Checking the clock on every token would dominate small tokens.
+            if processed_tokens % 64 == 0:
+                self._notify_progress_if_due()
+                if deadline is not None and time.perf_counter() >= deadline:
+                    limited = True
+                    break
+            if max_tokens is not None and processed_tokens >= max_tokens:
+                limited = True
+                break
             token = self._tokenizer.next_token()
+        self._notify_progress_if_due()
+        return limited and not self._finished
+
+    def _notify_progress_if_due(self) -> None:
+        if self._progress_cb is None or self._finished or self._document_node is None:
+            return
+        now = time.perf_counter()
+        consumed_characters = self._tokenizer.consumed_characters
+        if ((self._progress_interval is not None and now - self._last_progress_time >= self._progress_interval)
+                or (self._progress_characters is not None
+                    and consumed_characters - self._last_progress_characters >= self._progress_characters)):
+            self._last_progress_time = now
+            self._last_progress_characters = consumed_characters
+            self._progress_cb(self._document_node)
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    @property
+    def progress(self) -> float:
+        """
+        Part of the input received so far which was already parsed, from 0 to 1.
+        """
+        if self._finished:
+            return 1.0
+        received_characters = self._tokenizer.received_characters
+        if received_characters == 0:
+            return 0.0
+        return min(self._tokenizer.consumed_characters / received_characters, 1.0)
 
     def _token_handler(self, token: Union[HTMLToken, HTMLDoctype, HTMLTag, HTMLCommentOrCharacter]) -> None:
 
@@ -87,11 +249,10 @@ class HTMLDocumentParser:
             log("self._open_elements")
             log("Elements: ", self._open_elements.elements())
 
-        switcher = self._get_mode_switcher()
-        if switcher is not None:
-            switcher(token)
+        self._process_token(token)
 
         if token.type == HTMLToken.TokenType.EOF:
+            self._finished = True
             if self._notify_cb:
                 self._notify_cb(self._document_node)
 
@@ -111,10 +272,32 @@ class HTMLDocumentParser:
         Switch state without consuming next character.
         """
         self._current_insertion_mode = new_mode
+        self._process_token(token)
+
+    def _process_token(self, token: Union[HTMLToken, HTMLDoctype, HTMLTag, HTMLCommentOrCharacter]) -> None:
+        """
+        Processes token using the rules of the current insertion mode. Character tokens
+        may contain a run of characters, so leading whitespace is split off and processed
+        separately in modes where whitespace is handled differently.
+        """
+        if (token.type == HTMLToken.TokenType.Character
+                and self._current_insertion_mode in self._WHITESPACE_SENSITIVE_MODES):
+            token = cast(HTMLCommentOrCharacter, token)
+            whitespace, rest = token.split_leading_whitespace()
+            if whitespace and rest:
+                self._process_token(self._create_character_token(whitespace))
+                token = self._create_character_token(rest)
+
         switcher = self._get_mode_switcher()
         if switcher is not None:
             switcher(token)
 
+    @staticmethod
+    def _create_character_token(data: str) -> HTMLCommentOrCharacter:
+        token = HTMLCommentOrCharacter(HTMLToken.TokenType.Character)
+        token.data = data
+        return token
+
     def _create_element(self, token: HTMLTag) -> Element:
         """
         Creates element based on given token and sets parent for it.
@@ -136,19 +319,36 @@ class HTMLDocumentParser:
         if adjusted_location.insert_before_sibling is None:
             element.parentNode.appendChild(element)
         else:
-            element.parentNode.appendChildBeforeElement(adjusted_location.insert_before_sibling)
+            element.parentNode.appendChildBeforeElement(element, adjusted_location.insert_before_sibling)
 
         return element
 
     def _insert_character(self, token: HTMLCommentOrCharacter) -> None:
-        if type(self._current_element) is Document:
+        current_element = self._current_element
+        if type(current_element) is Document:
+            return
+        last_child = current_element.lastChild
+        if type(last_child) is Text:
+            # Text node buffers appended data until it is read.
+            cast(Text, last_child).appendData(token.data)
+        elif self._elide_whitespace and self._is_insignificant_whitespace(token, current_element):
             return
-        elif len(self._current_element.children) > 0 and type(self._current_element.children[-1]) is Text:
-            cast(Text, self._current_element.children[-1]).appendData(token.data)
         else:
-            text_node = Text(self._document, self._current_element, token.data)
-            text_node.parentNode = self._current_element
-            self._current_element.appendChild(text_node)
+            text_node = Text(self._document, current_element, token.data)
+            text_node.parentNode = current_element
+            current_element.appendChild(text_node)
+
+    def _is_insignificant_whitespace(self, token: HTMLCommentOrCharacter, parent: Node) -> bool:
+        """
+        Whitespace-only text at the start of a block-level element or right after its block-level
+        child is collapsed away by rendering, unless whitespace is preserved.
+        """
+        if parent.name not in BLOCK_LEVEL_ELEMENTS or token.data.strip(PARSER_WHITESPACE):
+            return False
+        if any(self._open_elements.contains(name) for name in WHITESPACE_PRESERVING_ELEMENTS):
+            return False
+        last_child = parent.lastChild
+        return last_child is None or type(last_child) is Comment or last_child.name in BLOCK_LEVEL_ELEMENTS
 
     def _insert_comment(self, token: HTMLCommentOrCharacter) -> None:
         comment = Comment(token.data, self._current_element, self._document)
@@ -240,6 +440,9 @@ class HTMLDocumentParser:
 
         if not last:
             return
+        if self._context_element is not None and last is self._open_elements.first():
+            # Root of a fragment stands for its context element.
+            last = self._context_element
 
         if last.name == "select":
             self._switchModeTo(self._Mode.InSelect)
@@ -840,8 +1043,8 @@ class HTMLDocumentParser:
             for node in self._open_elements.elements():
                 if node.name not in ["dd", "dt", "li", "optgroup", "option", "p", "rb", "rp", "rt", "rtc", "tbody",
                                      "td", "tfoot", "th", "thead", "tr", "body", "html"]:
-                    # TODO: Handle parse error.
-                    raise NotImplementedError()
+                    # TODO: Handle parse error, e.g. fragments often end with unclosed elements.
+                    break
 
             # TODO: This is a hack, check if valid
             self._open_elements.pop_until_element_with_tag_name_has_been_popped("body")
@@ -1,9 +1,13 @@
 from enum import Enum, auto
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass, field
 
+PARSER_WHITESPACE = "\t\n\u000C\r "
+
 
 class HTMLToken:
+    __slots__ = ("__type",)
+
     class TokenType(Enum):
         DOCTYPE = auto()
         StartTag = auto()
@@ -24,6 +28,7 @@ class HTMLToken:
 
 
 class HTMLDoctype(HTMLToken):
+    __slots__ = ("name", "publicIdentifier", "systemPublicIdentidier", "forcedQuircks")
 
     def __init__(self) -> None:
         super(HTMLDoctype, self).__init__(HTMLToken.TokenType.DOCTYPE)
@@ -40,6 +45,7 @@ class HTMLDoctype(HTMLToken):
 
 
 class HTMLCommentOrCharacter(HTMLToken):
+    __slots__ = ("data",)
 
     def __init__(self, tokenType: HTMLToken.TokenType) -> None:
         super(HTMLCommentOrCharacter, self).__init__(tokenType)
@@ -51,35 +57,64 @@ class HTMLCommentOrCharacter(HTMLToken):
     def is_parser_white_space(self):
         return self.data.isspace()
 
+    def split_leading_whitespace(self) -> Tuple[str, str]:
+        """
+        Splits data into leading parser whitespace and the rest of the data.
+        """
+        data = self.data if self.data is not None else ""
+        rest = data.lstrip(PARSER_WHITESPACE)
+        return data[:len(data) - len(rest)], rest
+
 
 class HTMLTag(HTMLToken):
+    __slots__ = ("name", "selfClosing", "attributes", "__attribute_name", "__attribute_value")
 
     def __init__(self, tokenType: HTMLToken.TokenType) -> None:
         super(HTMLTag, self).__init__(tokenType)
-        self.activeAttributeName: Optional[str] = None
         self.name: Optional[str] = None
         self.selfClosing: bool = False
         self.attributes: Dict[str, str] = {}
+        # Attribute being built, None when there is none.
+        self.__attribute_name: Optional[List[str]] = None
+        self.__attribute_value: List[str] = []
 
     def __str__(self) -> str:
         return f"type: {self.type}, name: {self.name}, attributes: {self.attributes}"
 
+    @property
+    def activeAttributeName(self) -> Optional[str]:
+        if self.__attribute_name is None:
+            return None
+        return "".join(self.__attribute_name)
+
     def create_new_attribute(self) -> None:
-        self.attributes[""] = ""
-        self.activeAttributeName = ""
+        self.commit_attribute()
+        self.__attribute_name = []
+        self.__attribute_value = []
 
     def add_char_to_attribute_name(self, char: str) -> None:
-        if self.activeAttributeName is None:
+        if self.__attribute_name is None:
             return
-        self.attributes[self.activeAttributeName + char] = self.attributes[self.activeAttributeName]
-        del self.attributes[self.activeAttributeName]
-        self.activeAttributeName += char
+        self.__attribute_name.append(char)
 
     def add_char_to_attribute_value(self, char: str) -> None:
-        if self.activeAttributeName is None:
+        if self.__attribute_name is None:
             return
-
-        self.attributes[self.activeAttributeName] = self.attributes[self.activeAttributeName] + char
+        self.__attribute_value.append(char)
+
+    def commit_attribute(self) -> None:
+        """
+        Adds the attribute being built to attributes. An attribute whose name is already
+        present is dropped together with its value, the first occurrence wins.
+        """
+        if self.__attribute_name is None:
+            return
+        name = "".join(self.__attribute_name)
+        if name not in self.attributes:
+            self.attributes[name] = "".join(self.__attribute_value)
+        # TODO: Handle duplicate-attribute parse error.
+        self.__attribute_name = None
+        self.__attribute_value = []
 
     def append_char_to_token_name(self, char: str) -> None:
         if self.name is None:
@@ -1,61 +1,115 @@
-from dataclasses import dataclass
+from collections import deque
 from enum import Enum, auto
-from typing import Union, Callable, Any, cast, List, Optional
+import re
+from typing import Union, Callable, Any, cast, Deque, Dict, List, Optional, Pattern
 from .HTMLToken import HTMLToken, HTMLDoctype, HTMLTag, HTMLCommentOrCharacter
 from .utils import char_is_alpha, char_is_control, char_is_noncharacter, char_is_whitespace, char_is_uppercase_alpha, \
     char_is_lowercase_alpha, char_is_surrogate
-from .Entities import getNamedCharFromTable, atLeastOneNameStartsWith
+from .Entities import longestNamedCharMatch
 import string
 from browser.utils.logging import log
 
 DEBUG = False
 
-@dataclass
-class Emit:
-    token: HTMLTag
+# Actions returned by the state handlers to the tokenizer loop.
+EMIT = 0  # Token in HTMLTokenizer._emitted_token is ready.
+SWITCH_TO = 1  # Consume next input character in the current state.
+RECONSUME = 2  # Reprocess current input character in the current state.
+RECONSUME_IN_RETURN_STATE = 3  # Reprocess current input character in the return state.
+CONTINUE = 4  # Consume next input character in the current state.
+SUSPEND = 5  # Wait for more input, then reprocess current input character.
 
-@dataclass
-class SwitchTo:
-    pass
+TokenizerState = int
 
-@dataclass
-class ReConsume:
-    input_character: str
 
-@dataclass
-class ReprocessQueue:
-    pass
+def _character_run(delimiters: str) -> Pattern[str]:
+    """
+    Compiles pattern matching a run of characters up to, but not including, any of the delimiters.
+    """
+    return re.compile("[^" + re.escape(delimiters) + "]*")
 
-@dataclass
-class Continue:
-    pass
 
-TokenizerState = Union[Emit, SwitchTo, ReConsume, ReprocessQueue, Continue]
+DATA_RUN = _character_run("&<\0")
+RAWTEXT_RUN = _character_run("<\0")
+SCRIPT_DATA_ESCAPED_RUN = _character_run("-<\0")
+ATTRIBUTE_VALUE_DOUBLE_QUOTED_RUN = _character_run('"&')
+ATTRIBUTE_VALUE_SINGLE_QUOTED_RUN = _character_run("'&")
+ATTRIBUTE_VALUE_UNQUOTED_RUN = _character_run("\t\n\u000C\r &>")
+COMMENT_RUN = _character_run("<-")
 
 class HTMLTokenizer:
 
-    def __init__(self, html = ""):
+    def __init__(self, html = "", incremental: bool = False, reuse_tokens: bool = False):
+        """
+        With reuse_tokens the consumer promises not to keep Character and Comment tokens
+        past the next call of next_token(), so a single instance of each is recycled.
+        """
+        self._state_handlers = self._build_state_handlers()
         self.state = self.State.Data
         self._html = html
         self._cursor = 0
+        self._discarded_characters = 0
+        self._input_closed = not incremental
+        self._reusable_tokens: Dict[HTMLToken.TokenType, HTMLCommentOrCharacter] = {
+            HTMLToken.TokenType.Character: HTMLCommentOrCharacter(HTMLToken.TokenType.Character),
+            HTMLToken.TokenType.Comment: HTMLCommentOrCharacter(HTMLToken.TokenType.Comment),
+        } if reuse_tokens else {}
         self._current_input_char: str = ""  # TODO: Basically initially is None, fix
         self._return_state: Union[Any, None] = None
         self._current_token: Union[HTMLToken, HTMLDoctype, HTMLTag, HTMLCommentOrCharacter, None] = None
         self._temporary_buffer: List[str] = []
         self._character_reference_code: int = 0
         self._last_emitted_start_tag_name: Optional[str] = None
-        self.queued_tokens: List[HTMLToken] = []
+        self.queued_tokens: Deque[HTMLToken] = deque()
+        self._emitted_token: Optional[HTMLToken] = None
+
+    def feed(self, chunk: str) -> None:
+        """
+        Appends chunk of the document to the input stream. Tokens are produced by next_token()
+        as far as the input allows, the rest waits for the next chunk or close().
+        """
+        if self._input_closed:
+            raise ValueError("Can not feed tokenizer after its input was closed.")
+        # Drop already consumed input, but keep the current input character for lookahead.
+        consumed = max(self._cursor - 1, 0)
+        self._html = self._html[consumed:] + chunk
+        self._cursor -= consumed
+        self._discarded_characters += consumed
+
+    def close(self) -> None:
+        """
+        Marks the end of the input stream, next_token() reaches EOF after the remaining input.
+        """
+        self._input_closed = True
+
+    @property
+    def consumed_characters(self) -> int:
+        return self._discarded_characters + self._cursor
+
+    @property
+    def received_characters(self) -> int:
+        return self._discarded_characters + len(self._html)
 
-    def _emit_current_token(self) -> Optional[Emit]:
+    def _waiting_for_input(self, count: int) -> bool:
+        """
+        Check if less than count characters follow the _cursor and more of them may still arrive.
+        """
+        return not self._input_closed and len(self._html) - self._cursor < count
+
+    def _emit_current_token(self) -> Optional[TokenizerState]:
         if self._current_token is not None:
             self._current_token = cast(HTMLTag, self._current_token)
             if self._current_token.type == HTMLToken.TokenType.StartTag:
                 self._last_emitted_start_tag_name = self._current_token.name
+                self._current_token.commit_attribute()
+            elif self._current_token.type == HTMLToken.TokenType.EndTag:
+                self._current_token.commit_attribute()
             if DEBUG:
                 log("Current state: ", self.state)
-            token = self._current_token
+            self._emitted_token = self._current_token
             self._current_token = None
-            return Emit(token)
+            return EMIT
+        return None
 
     def _append_token_to_queue(self):
         if self._current_token:
@@ -77,6 +131,17 @@ class HTMLTokenizer:
             token = HTMLToken(token_type)
         return token
 
+    def _create_reusable_token(self, token_type: HTMLToken.TokenType) -> HTMLCommentOrCharacter:
+        """
+        Creates Character or Comment token which is emitted rather than queued,
+        so it can be recycled in the token reuse mode.
+        """
+        token = self._reusable_tokens.get(token_type)
+        if token is None:
+            return HTMLCommentOrCharacter(token_type)
+        token.data = None
+        return token
+
     class State(Enum):
         Data = auto()
         RCDATA = auto()
@@ -159,43 +224,46 @@ class HTMLTokenizer:
         DecimalCharacterReference = auto()
         NumericCharacterReferenceEnd = auto()
 
-    def _continue_in(self, state: State) -> SwitchTo:
+    @property
+    def state(self) -> State:
+        return self._state
+
+    @state.setter
+    def state(self, new_state: State) -> None:
+        self._state = new_state
+        self._state_handler = self._state_handlers[new_state.value]
+
+    def _continue_in(self, state: State) -> TokenizerState:
         return self.switch_state_to(state)
 
-    def _ignore_character_and_continue_to(self, new_state: State) -> SwitchTo:
+    def _ignore_character_and_continue_to(self, new_state: State) -> TokenizerState:
         return self.switch_state_to(new_state)
 
-    def switch_state_to(self, new_state: State) -> SwitchTo:
+    def switch_state_to(self, new_state: State) -> TokenizerState:
         """
         Switch state and consume next character.
         """
         self.state = new_state
-        return SwitchTo()
+        return SWITCH_TO
 
-    def _reconsume_in(self, new_state: State) -> ReConsume:
+    def _reconsume_in(self, new_state: State) -> TokenizerState:
         """
         Switch state without consuming next character.
         """
         self.state = new_state
-        return ReConsume(self._current_input_char)
+        return RECONSUME
 
-    def _reconsume_in_return_state(self) -> ReprocessQueue:
-        self.state = self._return_state
-        return ReprocessQueue()
+    def _reconsume_in_return_state(self) -> TokenizerState:
+        self.state = cast(HTMLTokenizer.State, self._return_state)
+        return RECONSUME_IN_RETURN_STATE
 
 
     def _next_characters_are(self, characters: str) -> bool:
         """
         Check if given characters follow the current _cursor position in _html.
         """
-        for index in range(len(characters)):
-            if self._cursor >= len(self._html):
-                return False
-            char = self._html[self._cursor + index]
-            if char.lower() != characters[index].lower():
-                return False
-
-        return True
+        following = self._html[self._cursor:self._cursor + len(characters)]
+        return following.lower() == characters.lower()
 
     def _consume_characters(self, characters: str) -> None:
         self._cursor += len(characters)
@@ -207,15 +275,31 @@ class HTMLTokenizer:
         self._cursor += 1
         return char
 
+    def _consume_character_run(self, run: Pattern[str]) -> str:
+        """
+        Consumes characters following the current input character as long as they match the run
+        pattern and returns the whole run starting from the current input character.
+        """
+        start = self._cursor - 1
+        self._cursor = cast(re.Match, run.match(self._html, self._cursor)).end()
+        return self._html[start:self._cursor]
+
+    def _emit_character_token(self, data: str) -> Optional[TokenizerState]:
+        self._current_token = self._create_reusable_token(HTMLToken.TokenType.Character)
+        self._current_token.data = data
+        return self._emit_current_token()
+
+    def _queue_character_token(self, data: str) -> None:
+        self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
+        self._current_token.data = data
+        self._append_token_to_queue()
+
     def _flush_temporary_buffer(self) -> None:
         if self._current_token is not None:
             self._current_token = cast(HTMLTag, self._current_token)
             self._current_token.add_char_to_attribute_value("".join(self._temporary_buffer))
-        else:
-            for char in self._temporary_buffer:
-                self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-                self._current_token.data = char
-                self._append_token_to_queue()
+        elif self._temporary_buffer:
+            self._queue_character_token("".join(self._temporary_buffer))
         self._temporary_buffer = []
 
     # 13.2.5.1 https://html.spec.whatwg.org/multipage/parsing.html#data-state
@@ -229,13 +313,9 @@ class HTMLTokenizer:
             self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
             return self._emit_current_token()
         elif ord(self._current_input_char) == 0:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "\uFFFD"
-            return self._emit_current_token()
+            return self._emit_character_token("\uFFFD")
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = self._current_input_char
-            return self._emit_current_token()
+            return self._emit_character_token(self._consume_character_run(DATA_RUN))
 
     def handle_RCDATA(self) -> TokenizerState:
         if self._current_input_char == "&":
@@ -246,10 +326,10 @@ class HTMLTokenizer:
         elif self._current_input_char is None:
             self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
             return self._emit_current_token()
+        elif ord(self._current_input_char) == 0:
+            return self._emit_character_token("\uFFFD")
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = self._current_input_char
-            return self._emit_current_token()
+            return self._emit_character_token(self._consume_character_run(DATA_RUN))
 
     def handle_RAWTEXT(self) -> TokenizerState:
         if self._current_input_char == "<":
@@ -257,10 +337,10 @@ class HTMLTokenizer:
         elif self._current_input_char is None:
             self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
             return self._emit_current_token()
+        elif ord(self._current_input_char) == 0:
+            return self._emit_character_token("\uFFFD")
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = self._current_input_char
-            return self._emit_current_token()
+            return self._emit_character_token(self._consume_character_run(RAWTEXT_RUN))
 
     def handle_script_data(self) -> TokenizerState:
         if self._current_input_char == "<":
@@ -268,10 +348,10 @@ class HTMLTokenizer:
         elif self._current_input_char is None:
             self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
             return self._emit_current_token()
+        elif ord(self._current_input_char) == 0:
+            return self._emit_character_token("\uFFFD")
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = self._current_input_char
-            return self._emit_current_token()
+            return self._emit_character_token(self._consume_character_run(RAWTEXT_RUN))
 
     def handle_PLAINTEXT(self) -> None:
         raise NotImplementedError
@@ -279,10 +359,8 @@ class HTMLTokenizer:
     # 13.2.5.6 https://html.spec.whatwg.org/multipage/parsing.html#tag-open-state
     def handle_tag_open(self) -> TokenizerState:
         if self._current_input_char is None:
+            self._queue_character_token("<")
             self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
             return self._emit_current_token()
 
         if self._current_input_char == "!":
@@ -296,9 +374,7 @@ class HTMLTokenizer:
             self._current_token = cast(HTMLTag, self._create_new_token(HTMLToken.TokenType.Comment))
             return self._reconsume_in(self.State.BogusComment)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
+            self._queue_character_token("<")
             return self._reconsume_in(self.State.Data)
 
     def handle_end_tag_open(self) -> TokenizerState:
@@ -329,9 +405,7 @@ class HTMLTokenizer:
             self._temporary_buffer = []
             return self.switch_state_to(self.State.RCDATAEndTagOpen)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
+            self._queue_character_token("<")
             return self._reconsume_in(self.State.RCDATA)
 
     def handle_RCDATA_end_tag_open(self) -> TokenizerState:
@@ -341,30 +415,14 @@ class HTMLTokenizer:
             self._current_token.name = ""
             return self._reconsume_in(self.State.RCDATAEndTagName)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
+            self._queue_character_token("</")
             return self._reconsume_in(self.State.RCDATA)
 
     def handle_RCDATA_end_tag_name(self) -> TokenizerState:
         self._current_token = cast(HTMLTag, self._current_token)
 
         def else_case() -> TokenizerState:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
-
-            for char in self._temporary_buffer:
-                self._current_token = cast(HTMLCommentOrCharacter,
-                                            self._create_new_token(HTMLToken.TokenType.Character))
-                self._current_token.data = char
-                self._append_token_to_queue()
+            self._queue_character_token("</" + "".join(self._temporary_buffer))
             return self._reconsume_in(self.State.RCDATA)
 
         if char_is_whitespace(self._current_input_char):
@@ -386,11 +444,11 @@ class HTMLTokenizer:
         elif char_is_uppercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char.lower())
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         elif char_is_lowercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char)
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         else:
             return else_case()
 
@@ -399,9 +457,7 @@ class HTMLTokenizer:
             self._temporary_buffer = []
             return self.switch_state_to(self.State.RAWTEXTEndTagOpen)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
+            self._queue_character_token("<")
             return self._reconsume_in(self.State.RAWTEXT)
 
     def handle_RAWTEXT_end_tag_open(self) -> TokenizerState:
@@ -411,30 +467,14 @@ class HTMLTokenizer:
             self._current_token.name = ""
             return self._reconsume_in(self.State.RAWTEXTEndTagName)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
+            self._queue_character_token("</")
             return self._reconsume_in(self.State.RAWTEXT)
 
     def handle_RAWTEXT_end_tag_name(self) -> TokenizerState:
         self._current_token = cast(HTMLTag, self._current_token)
 
         def else_case() -> TokenizerState:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
-
-            for char in self._temporary_buffer:
-                self._current_token = cast(HTMLCommentOrCharacter,
-                                            self._create_new_token(HTMLToken.TokenType.Character))
-                self._current_token.data = char
-                self._append_token_to_queue()
+            self._queue_character_token("</" + "".join(self._temporary_buffer))
             return self._reconsume_in(self.State.RAWTEXT)
 
         if char_is_whitespace(self._current_input_char):
@@ -456,11 +496,11 @@ class HTMLTokenizer:
         elif char_is_uppercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char.lower())
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         elif char_is_lowercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char)
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         else:
             return else_case()
 
@@ -469,17 +509,10 @@ class HTMLTokenizer:
             self._temporary_buffer = []
             return self.switch_state_to(self.State.ScriptDataEndTagOpen)
         elif self._current_input_char == "!":
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "!"
-            self._append_token_to_queue()
+            self._queue_character_token("<!")
             return self.switch_state_to(self.State.ScriptDataEscapeStart)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
+            self._queue_character_token("<")
             return self._reconsume_in(self.State.ScriptData)
 
     def handle_script_data_end_tag_open(self) -> TokenizerState:
@@ -488,29 +521,14 @@ class HTMLTokenizer:
             self._current_token.name = ""
             return self._reconsume_in(self.State.ScriptDataEndTagName)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
+            self._queue_character_token("</")
             return self._reconsume_in(self.State.ScriptData)
 
     def handle_script_data_end_tag_name(self) -> TokenizerState:
         self._current_token = cast(HTMLTag, self._current_token)
 
         def else_case() -> TokenizerState:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
-            for char in self._temporary_buffer:
-                self._current_token = cast(HTMLCommentOrCharacter,
-                                            self._create_new_token(HTMLToken.TokenType.Character))
-                self._current_token.data = char
-                self._append_token_to_queue()
+            self._queue_character_token("</" + "".join(self._temporary_buffer))
             return self._reconsume_in(self.State.ScriptData)
 
         if char_is_whitespace(self._current_input_char):
@@ -532,11 +550,11 @@ class HTMLTokenizer:
         elif char_is_uppercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char.lower())
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         elif char_is_lowercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char)
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         else:
             return else_case()
 
@@ -569,10 +587,10 @@ class HTMLTokenizer:
         elif self._current_input_char is None:
             self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
             return self._emit_current_token()
+        elif ord(self._current_input_char) == 0:
+            return self._emit_character_token("\uFFFD")
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = self._current_input_char
-            return self._emit_current_token()
+            return self._emit_character_token(self._consume_character_run(SCRIPT_DATA_ESCAPED_RUN))
 
     def handle_script_data_escaped_dash(self) -> TokenizerState:
         if self._current_input_char == "-":
@@ -618,14 +636,10 @@ class HTMLTokenizer:
             return self.switch_state_to(self.State.ScriptDataEscapedEndTagOpen)
         elif char_is_alpha(self._current_input_char):
             self._temporary_buffer = []
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
+            self._queue_character_token("<")
             return self._reconsume_in(self.State.ScriptDataDoubleEscapeStart)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
+            self._queue_character_token("<")
             return self._reconsume_in(self.State.ScriptDataEscaped)
 
     def handle_script_data_escaped_end_tag_open(self) -> TokenizerState:
@@ -635,12 +649,7 @@ class HTMLTokenizer:
             self._current_token.name = ""
             return self._reconsume_in(self.State.ScriptDataEscapedEndTagName)
         else:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
+            self._queue_character_token("</")
             return self._reconsume_in(self.State.ScriptDataEscaped)
 
     def handle_script_data_escaped_end_tag_name(self) -> TokenizerState:
@@ -648,17 +657,7 @@ class HTMLTokenizer:
         self._current_token = cast(HTMLTag, self._current_token)
 
         def else_case() -> TokenizerState:
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "<"
-            self._append_token_to_queue()
-            self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-            self._current_token.data = "/"
-            self._append_token_to_queue()
-            for char in self._temporary_buffer:
-                self._current_token = cast(HTMLCommentOrCharacter, self._create_new_token(HTMLToken.TokenType.Character))
-                self._current_token.data = char
-                self._append_token_to_queue()
-
+            self._queue_character_token("</" + "".join(self._temporary_buffer))
             return self._reconsume_in(self.State.ScriptDataEscaped)
 
 
@@ -683,11 +682,11 @@ class HTMLTokenizer:
         elif char_is_uppercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char.lower())
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         elif char_is_lowercase_alpha(self._current_input_char):
             self._current_token.append_char_to_token_name(self._current_input_char)
             self._temporary_buffer.append(self._current_input_char)
-            return Continue()
+            return CONTINUE
         else:
             return else_case()
 
@@ -755,7 +754,7 @@ class HTMLTokenizer:
             return self.switch_state_to(self.State.BeforeAttributeValue)
         elif self._current_input_char.isupper() and self._current_input_char.isalpha():
             self._current_token.add_char_to_attribute_name(self._current_input_char.lower())
-            return Continue()
+            return CONTINUE
         else:
             self._current_token.add_char_to_attribute_name(self._current_input_char)
             return self._continue_in(self.State.AttributeName)
@@ -764,7 +763,7 @@ class HTMLTokenizer:
         self._current_token = cast(HTMLTag, self._current_token)
 
         if char_is_whitespace(self._current_input_char):
-            return Continue()
+            return CONTINUE
         elif self._current_input_char == "/":
             return self.switch_state_to(self.State.SelfClosingStartTag)
         elif self._current_input_char == "=":
@@ -802,7 +801,8 @@ class HTMLTokenizer:
             self._return_state = self.State.AttributeValueDoubleQuoted
             return self.switch_state_to(self.State.CharacterReference)
         else:
-            self._current_token.add_char_to_attribute_value(self._current_input_char)
+            self._current_token.add_char_to_attribute_value(
+                self._consume_character_run(ATTRIBUTE_VALUE_DOUBLE_QUOTED_RUN))
             return self._continue_in(self.State.AttributeValueDoubleQuoted)
 
     def handle_attribute_value_single_quoted(self) -> TokenizerState:
@@ -816,7 +816,8 @@ class HTMLTokenizer:
             self._return_state = self.State.AttributeValueSingleQuoted
             return self.switch_state_to(self.State.CharacterReference)
         else:
-            self._current_token.add_char_to_attribute_value(self._current_input_char)
+            self._current_token.add_char_to_attribute_value(
+                self._consume_character_run(ATTRIBUTE_VALUE_SINGLE_QUOTED_RUN))
             return self._continue_in(self.State.AttributeValueSingleQuoted)
 
     def handle_attribute_value_unquoted(self) -> TokenizerState:
@@ -833,7 +834,8 @@ class HTMLTokenizer:
             self.switch_state_to(self.State.Data)
             return self._emit_current_token()
         else:
-            self._current_token.add_char_to_attribute_value(self._current_input_char)
+            self._current_token.add_char_to_attribute_value(
+                self._consume_character_run(ATTRIBUTE_VALUE_UNQUOTED_RUN))
             return self._continue_in(self.State.AttributeValueUnquoted)
 
     def handle_after_attribute_value_quoted(self) -> TokenizerState:
@@ -873,19 +875,21 @@ class HTMLTokenizer:
                 self._current_token.data = "\uFFFD"
             else:
                 self._current_token.data += "\uFFFD"
-            return Continue()
+            return CONTINUE
         else:
             if self._current_token.data is None:
                 self._current_token.data = self._current_input_char
             else:
                 self._current_token.data += self._current_input_char
-            return Continue()
+            return CONTINUE
 
 
     def handle_markup_declaration_open(self) -> TokenizerState:
+        if self._waiting_for_input(len("DOCTYPE")):
+            return SUSPEND
         if self._next_characters_are("--"):
             self._consume_characters("--")
-            self._current_token = self._create_new_token(HTMLToken.TokenType.Comment)
+            self._current_token = self._create_reusable_token(HTMLToken.TokenType.Comment)
             return self.switch_state_to(self.State.CommentStart)
         elif self._next_characters_are("DOCTYPE"):
             self._consume_characters("DOCTYPE")
@@ -895,8 +899,8 @@ class HTMLTokenizer:
         if self._current_input_char == "-":
             return self.switch_state_to(self.State.CommentStartDash)
         elif self._current_input_char == ">":
-            self._append_token_to_queue()
-            return self.switch_state_to(self.State.Data)
+            self.switch_state_to(self.State.Data)
+            return self._emit_current_token()
         else:
             return self._reconsume_in(self.State.Comment)
 
@@ -933,10 +937,11 @@ class HTMLTokenizer:
             self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
             return self._emit_current_token()
         else:
+            data = self._consume_character_run(COMMENT_RUN)
             if self._current_token.data is not None:
-                self._current_token.data += self._current_input_char
+                self._current_token.data += data
             else:
-                self._current_token.data = self._current_input_char
+                self._current_token.data = data
             return self._continue_in(self.State.Comment)
 
     def handle_comment_less_than_sign(self) -> TokenizerState:
@@ -946,7 +951,7 @@ class HTMLTokenizer:
             return self.switch_state_to(self.State.CommentLessThanSignBang)
         elif self._current_input_char == "<":
             self._current_token.data += self._current_input_char
-            return Continue()
+            return CONTINUE
         else:
             return self._reconsume_in(self.State.Comment)
 
@@ -1095,8 +1100,6 @@ class HTMLTokenizer:
             return self._reconsume_in_return_state()
 
         if self._current_input_char is None:
-            self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
-            self._append_token_to_queue()
             return else_case()
 
         if self._current_input_char.isalnum():
@@ -1109,40 +1112,37 @@ class HTMLTokenizer:
 
     def handle_named_character_reference(self) -> TokenizerState:
         self._return_state = cast(HTMLTokenizer.State, self._return_state)
-        consumed_characters: List[str] = [self._current_input_char]
-        while atLeastOneNameStartsWith("".join(consumed_characters)):
-            next_char = self._next_code_point()
-            if next_char is not None:
-                self._current_input_char = next_char
-                consumed_characters.append(next_char)
-                if next_char == ";":
-                    break
-        match = getNamedCharFromTable("".join(consumed_characters))
-        if match is not None:
-            # TODO: Implement case.
-            if self._current_token is not None:
-                self._current_token = cast(HTMLTag, self._current_token)
-                for match_item in match:
-                    self._current_token.add_char_to_attribute_value(chr(match_item))
-            else:
-                self._current_token = cast(HTMLCommentOrCharacter,
-                                            self._create_new_token(HTMLToken.TokenType.Character))
-                for match_item in match:
-                    self._current_token.data = self._current_token.data + chr(match_item)\
-                                                if self._current_token.data is not None else chr(match_item)
-                return self._emit_current_token()
-            return self.switch_state_to(self._return_state)
-        else:
-            self._temporary_buffer.extend(consumed_characters)
+        start = self._cursor - 1
+        match_length, match, reached_end = longestNamedCharMatch(self._html, start)
+        if reached_end and not self._input_closed:
+            # Longer name may still be completed by the next chunk.
+            return SUSPEND
+        if match is None:
             self._flush_temporary_buffer()
             return self._reconsume_in(self.State.AmbiguousAmpersand)
 
+        name = self._html[start:start + match_length]
+        self._cursor = start + match_length
+        consumed_as_part_of_attribute = self._current_token is not None
+        if consumed_as_part_of_attribute and not name.endswith(";") and self._waiting_for_input(1):
+            return SUSPEND
+        next_char = self._html[self._cursor] if self._cursor < len(self._html) else None
+        if (consumed_as_part_of_attribute and not name.endswith(";") and next_char is not None
+                and (next_char == "=" or next_char.isalnum())):
+            # For historical reasons references without semicolon are left as is inside attributes.
+            self._temporary_buffer.append(name)
+        else:
+            # TODO: Handle parse error if name does not end with semicolon.
+            self._temporary_buffer = [chr(code_point) for code_point in match]
+        self._flush_temporary_buffer()
+        return self.switch_state_to(self._return_state)
+
     def handle_ambiguous_ampersand(self) -> TokenizerState:
         self._return_state = cast(HTMLTokenizer.State, self._return_state)
         if self._current_input_char.isalnum():
             self._temporary_buffer.append(self._current_input_char)
             self._flush_temporary_buffer()
-            return Continue()
+            return CONTINUE
         elif self._current_input_char == ";":
             return self._reconsume_in_return_state()
         else:
@@ -1185,13 +1185,13 @@ class HTMLTokenizer:
         else:
             # TODO: Handle parse error.
             return self._reconsume_in(self.State.NumericCharacterReferenceEnd)
-        return Continue()
+        return CONTINUE
 
     def handle_decimal_character_reference(self) -> TokenizerState:
         if self._current_input_char.isdigit():
             self._character_reference_code *= 10
             self._character_reference_code += ord(self._current_input_char) - 0x0030
-            return Continue()
+            return CONTINUE
         elif self._current_input_char == ";":
             return self.switch_state_to(self.State.NumericCharacterReferenceEnd)
         else:
@@ -1253,11 +1253,13 @@ class HTMLTokenizer:
         self._flush_temporary_buffer()
         if self._return_state is not None:
             return self._reconsume_in_return_state()
-        return Continue()
-
-    def _get_state_switcher(self) -> Callable[[], Union[TokenizerState]]:
+        return CONTINUE
 
-        switcher = {
+    def _build_state_handlers(self) -> List[Callable[[], TokenizerState]]:
+        """
+        Builds list of bound state handlers indexed by the value of the state.
+        """
+        handlers = {
             HTMLTokenizer.State.Data: self.handle_data,
             HTMLTokenizer.State.RCDATA: self.handle_RCDATA,
             HTMLTokenizer.State.RAWTEXT: self.handle_RAWTEXT,
@@ -1340,61 +1342,77 @@ class HTMLTokenizer:
             HTMLTokenizer.State.NumericCharacterReferenceEnd: self.handle_numeric_character_reference_end,
         }
 
-        return switcher.get(self.state, None)
+
+        state_handlers: List[Callable[[], TokenizerState]] = [self.handle_data] * (len(HTMLTokenizer.State) + 1)
+        for state, handler in handlers.items():
+            state_handlers[state.value] = handler
+        return state_handlers
 
     def run(self) -> None:
         while self._cursor < len(self._html):
             token_point = self._next_code_point()
             if token_point is None:
                 self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
-                return self._emit_current_token()
+                self._emit_current_token()
+                return
             self._current_input_char = cast(str, token_point)
-            switcher = self._get_state_switcher()
-            if switcher is not None:
-                switcher()
+            self._state_handler()
 
         self._current_token = self._create_new_token(HTMLToken.TokenType.EOF)
-        return self._emit_current_token()
+        self._emit_current_token()
 
     def process_queue(self) -> Optional[HTMLToken]:
         try:
-            token = self.queued_tokens.pop()
+            token = self.queued_tokens.popleft()
         except IndexError:
             return None
         else:
             return token
 
     def next_token(self) -> Optional[HTMLToken]:
-        maybe_token = self.process_queue()
-        if maybe_token:
-            return maybe_token
+        """
+        Returns next token, or None once EOF was emitted or when incremental input
+        is exhausted before close(). In the latter case tokenizer resumes after feed().
+        """
+        if self.queued_tokens:
+            return self.queued_tokens.popleft()
 
         if self._current_input_char is None:
             return None
 
-        token_point = self._next_code_point()
-        self._current_input_char = cast(str, token_point)
+        html = self._html
+        cursor = self._cursor
+        if cursor < len(html):
+            self._current_input_char = html[cursor]
+            self._cursor = cursor + 1
+        elif self._input_closed:
+            self._current_input_char = None
+        else:
+            return None
 
         while True:
-            switcher = self._get_state_switcher()
-            result = switcher()
-            if type(result) == Emit:
-                return result.token
-            elif type(result) == SwitchTo:
-                token_point = self._next_code_point()
-                self._current_input_char = cast(str, token_point)
-                continue
-            elif type(result) == ReConsume:
+            action = self._state_handler()
+            if action == EMIT:
+                token = cast(HTMLToken, self._emitted_token)
+                self._emitted_token = None
+                if self.queued_tokens:
+                    # Tokens queued earlier precede the emitted one.
+                    self.queued_tokens.append(token)
+                    return self.queued_tokens.popleft()
+                return token
+            elif action == RECONSUME or action == RECONSUME_IN_RETURN_STATE:
+                # Queued tokens are returned before the next emitted token.
                 continue
-            elif type(result) == Continue:
-                token_point = self._next_code_point()
-                self._current_input_char = cast(str, token_point)
-                continue
-            elif type(result) == ReprocessQueue:
-                maybe_token = self.process_queue()
-                if maybe_token:
-                    return maybe_token
-
-                token_point = self._next_code_point()
-                self._current_input_char = cast(str, token_point)
-
+            elif action == SUSPEND:
+                # Current input character is read again once more input arrives.
+                self._cursor -= 1
+                return self.process_queue()
+            else:
+                cursor = self._cursor
+                if cursor < len(html):
+                    self._current_input_char = html[cursor]
+                    self._cursor = cursor + 1
+                elif self._input_closed:
+                    self._current_input_char = None
+                else:
+                    return self.process_queue()
@@ -0,0 +1,50 @@
+from typing import Callable, Optional, Set, cast
+from web.html.parser.HTMLToken import HTMLToken, HTMLTag
+
+
+class PreloadScanner:
+    """
+    Looks at start tags as they are tokenized and reports URLs of subresources,
+    so they can be fetched while the rest of the document is still being parsed.
+    """
+
+    def __init__(self, cb: Callable[[str, str], None]) -> None:
+        """
+        cb is called with URL and destination ("style", "script" or "image") of every subresource found.
+        """
+        self.__cb = cb
+        self.__seen_urls: Set[str] = set()
+
+    def scan(self, token: HTMLToken) -> None:
+        if token.type != HTMLToken.TokenType.StartTag:
+            return
+        token = cast(HTMLTag, token)
+        destination = self.__destination(token)
+        if destination is None:
+            return
+        url = self.__url(token)
+        if url and url not in self.__seen_urls:
+            self.__seen_urls.add(url)
+            self.__cb(url, destination)
+
+    @staticmethod
+    def __destination(tag: HTMLTag) -> Optional[str]:
+        if tag.name == "link" and tag.attributes.get("rel") == "stylesheet":
+            return "style"
+        elif tag.name == "script":
+            return "script"
+        elif tag.name == "img":
+            return "image"
+        return None
+
+    @staticmethod
+    def __url(tag: HTMLTag) -> Optional[str]:
+        if tag.name == "link":
+            return tag.attributes.get("href")
+        src = tag.attributes.get("src")
+        if not src and tag.name == "img":
+            # Same candidate as ImageLayout picks.
+            srcset = tag.attributes.get("srcset")
+            if srcset:
+                src = srcset.split(",")[0].split(" ")[0]
+        return src
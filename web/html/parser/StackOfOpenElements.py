@@ -1,8 +1,16 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, FrozenSet, List, Optional
 from web.dom.elements.Element import Element
 from web.html.parser.ParserUtils import ParserUtils
 
+# Element types which limit the particular scopes.
+SCOPE: FrozenSet[str] = frozenset({"applet", "caption", "html", "table", "td", "th", "marquee", "object", "template"})
+BUTTON_SCOPE: FrozenSet[str] = SCOPE | {"button"}
+LIST_ITEM_SCOPE: FrozenSet[str] = SCOPE | {"ol", "ul"}
+TABLE_SCOPE: FrozenSet[str] = frozenset({"html", "table", "template"})
+SELECT_SCOPE: FrozenSet[str] = frozenset({"option", "optgroup"})
+SCOPES = (SCOPE, BUTTON_SCOPE, LIST_ITEM_SCOPE, TABLE_SCOPE, SELECT_SCOPE)
+
 
 class StackOfOpenElements:
 
@@ -13,20 +21,26 @@ class StackOfOpenElements:
 
     def __init__(self) -> None:
         self.__open_elements: List[Element] = []
-        self.__scope_base_list: List[str] = ["applet", "caption", "html", "table", "td", "th", "marquee", "object",
-                                           "template"]
-
-    def __has_in_scope_impl(self, target_node_name: str, tag_name_list: List[str]) -> bool:
-        for node in reversed(self.__open_elements):
-            if node.name == target_node_name:
-                return True
-            if node.name in tag_name_list:
-                return False
-        return False
+        # Indexes of open elements by tag name, and of elements limiting each scope, in stack order.
+        self.__tag_indexes: Dict[str, List[int]] = {}
+        self.__scope_limit_indexes: Dict[FrozenSet[str], List[int]] = {scope: [] for scope in SCOPES}
+
+    def __has_in_scope_impl(self, target_node_name: str, scope: FrozenSet[str]) -> bool:
+        """
+        Target is in scope if the topmost element with its name is above the topmost
+        element limiting the scope, or is that element itself.
+        """
+        tag_indexes = self.__tag_indexes.get(target_node_name)
+        if not tag_indexes:
+            return False
+        scope_limit_indexes = self.__scope_limit_indexes[scope]
+        return not scope_limit_indexes or tag_indexes[-1] >= scope_limit_indexes[-1]
 
     def pop_all_elements(self) -> None:
-        while not self.is_empty():
-            self.__open_elements.pop()
+        self.__open_elements.clear()
+        self.__tag_indexes.clear()
+        for scope_limit_indexes in self.__scope_limit_indexes.values():
+            scope_limit_indexes.clear()
 
     def is_empty(self) -> bool:
         return len(self.__open_elements) == 0
@@ -42,47 +56,55 @@ class StackOfOpenElements:
         return None
 
     def push(self, element: Element) -> None:
+        index = len(self.__open_elements)
         self.__open_elements.append(element)
+        name = element.name
+        tag_indexes = self.__tag_indexes.get(name)
+        if tag_indexes is None:
+            self.__tag_indexes[name] = [index]
+        else:
+            tag_indexes.append(index)
+        for scope, scope_limit_indexes in self.__scope_limit_indexes.items():
+            if name in scope:
+                scope_limit_indexes.append(index)
 
     def pop(self) -> Optional[Element]:
-        if not self.is_empty():
-            return self.__open_elements.pop()
-        return None
+        if self.is_empty():
+            return None
+        element = self.__open_elements.pop()
+        name = element.name
+        self.__tag_indexes[name].pop()
+        for scope, scope_limit_indexes in self.__scope_limit_indexes.items():
+            if name in scope:
+                scope_limit_indexes.pop()
+        return element
 
     def current_node(self) -> Optional[Element]:
         return self.last()
 
     def has_in_scope(self, tag_name: str) -> bool:
-        return self.__has_in_scope_impl(tag_name, self.__scope_base_list)
+        return self.__has_in_scope_impl(tag_name, SCOPE)
 
     def has_in_button_scope(self, tag_name: str) -> bool:
-        scope_list = self.__scope_base_list.copy()
-        scope_list.append("button")
-        return self.__has_in_scope_impl(tag_name, scope_list)
+        return self.__has_in_scope_impl(tag_name, BUTTON_SCOPE)
 
     def has_in_table_scope(self, tag_name: str) -> bool:
-        scope_list = ["html", "table", "template"]
-        return self.__has_in_scope_impl(tag_name, scope_list)
+        return self.__has_in_scope_impl(tag_name, TABLE_SCOPE)
 
     def has_in_list_item_scope(self, tag_name: str) -> bool:
-        scope_list = self.__scope_base_list.copy()
-        scope_list.append("ol")
-        scope_list.append("ul")
-        return self.__has_in_scope_impl(tag_name, scope_list)
+        return self.__has_in_scope_impl(tag_name, LIST_ITEM_SCOPE)
 
     def has_in_select_scope(self, tag_name: str) -> bool:
-        scope_list = ["option", "optgroup"]
-        return self.__has_in_scope_impl(tag_name, scope_list)
+        return self.__has_in_scope_impl(tag_name, SELECT_SCOPE)
 
     def contains(self, element_name: str) -> bool:
-        for element in self.__open_elements:
-            if element.name == element_name:
-                return True
-
-        return False
+        return bool(self.__tag_indexes.get(element_name))
 
     def contains_element(self, element: Element) -> bool:
-        return element in self.__open_elements
+        for index in self.__tag_indexes.get(element.name, []):
+            if self.__open_elements[index] is element:
+                return True
+        return False
 
     def elements(self) -> List[Element]:
         return self.__open_elements
@@ -107,13 +129,10 @@ class StackOfOpenElements:
         return result
 
     def last_element_with_tag_name(self, tag_name: str) -> Optional[Result]:
-        for index, element in reversed(list(enumerate(self.elements()))):
-            if element.name == tag_name:
-                result = self.Result()
-                result.index = index
-                result.element = element
-                return result
-        return None
+        tag_indexes = self.__tag_indexes.get(tag_name)
+        if not tag_indexes:
+            return None
+        return self.Result(tag_indexes[-1], self.__open_elements[tag_indexes[-1]])
 
     def element_before(self, target_element: Element) -> Optional[Element]:
         found_target = False
@@ -1,5 +1,18 @@
 import re
 
+# Elements rendered as blocks by default, whitespace-only text between them does not render.
+BLOCK_LEVEL_ELEMENTS = frozenset({
+    "html", "head", "body", "article", "section", "nav", "aside",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hgroup", "header",
+    "footer", "address", "p", "hr", "pre", "blockquote",
+    "ol", "ul", "menu", "li", "dl", "dt", "dd", "figure",
+    "figcaption", "main", "div", "table", "caption", "colgroup", "thead", "tbody", "tfoot", "tr", "td", "th",
+    "form", "fieldset", "legend", "details", "summary"
+})
+
+# Elements which preserve whitespace of their contents.
+WHITESPACE_PRESERVING_ELEMENTS = ("pre", "textarea", "listing", "plaintext")
+
 
 def char_is_whitespace(char: str) -> bool:
     return char.isspace()
@@ -0,0 +1,145 @@
+import io
+from typing import Callable, Iterable, Iterator, List, Optional, TextIO, Tuple, cast
+from web.dom.CharacterData import CharacterData
+from web.dom.DocumentType import DocumentType
+from web.dom.Node import Node
+from web.dom.elements.Comment import Comment
+from web.dom.elements.Element import Element
+from web.dom.elements.HTMLTemplateElement import HTMLTemplateElement
+
+# Elements which serialize as void, their children and end tags are not written.
+VOID_ELEMENTS = {"area", "base", "basefont", "bgsound", "br", "col", "embed", "frame", "hr", "img", "input", "keygen",
+                 "link", "meta", "param", "source", "track", "wbr"}
+# Text in these elements is written as is.
+RAW_TEXT_ELEMENTS = {"style", "script", "xmp", "iframe", "noembed", "noframes", "plaintext"}
+TEXT_ESCAPES = str.maketrans({"&": "&amp;", "\u00a0": "&nbsp;", "<": "&lt;", ">": "&gt;"})
+ATTRIBUTE_ESCAPES = str.maketrans({"&": "&amp;", "\u00a0": "&nbsp;", "\"": "&quot;", "<": "&lt;", ">": "&gt;"})
+
+
+class HTMLSerializer:
+    """
+    Serializes nodes as in https://html.spec.whatwg.org/multipage/parsing.html#serialising-html-fragments
+    and writes the debug dumps of nodes. Output is written to the stream piece by piece while walking
+    the tree without recursion, so it takes linear time for documents of any size and depth.
+    """
+
+    def __init__(self, stream: TextIO, scripting: bool = False) -> None:
+        self.__stream = stream
+        self.__scripting = scripting
+
+    @staticmethod
+    def outer_html(node: Node) -> str:
+        stream = io.StringIO()
+        HTMLSerializer(stream).serialize(node)
+        return stream.getvalue()
+
+    @staticmethod
+    def inner_html(node: Node) -> str:
+        stream = io.StringIO()
+        HTMLSerializer(stream).serialize_children(node)
+        return stream.getvalue()
+
+    def serialize(self, node: Node) -> None:
+        """
+        Writes the node and its descendants. Document type nodes stand for the document in this tree,
+        so their children are written after the doctype.
+        """
+        self.__write_nodes([node])
+
+    def serialize_children(self, node: Node) -> None:
+        self.__write_nodes(self.__children_of(node))
+
+    def __write_nodes(self, nodes: Iterable[Node]) -> None:
+        write = self.__stream.write
+        for node, _, entering in _walk(nodes, self.__children_of):
+            if isinstance(node, Element):
+                if not entering:
+                    if node.name not in VOID_ELEMENTS:
+                        write(f"</{node.name}>")
+                    continue
+                write(f"<{node.name}")
+                for name, value in node.attributes.items():
+                    write(f" {name}=\"{value.translate(ATTRIBUTE_ESCAPES)}\"")
+                write(">")
+            elif not entering:
+                continue
+            elif isinstance(node, Comment):
+                write(f"<!--{node.data}-->")
+            elif isinstance(node, CharacterData):
+                parent = node.parentNode
+                if parent is not None and self.__is_raw_text(parent):
+                    write(node.data)
+                else:
+                    write(node.data.translate(TEXT_ESCAPES))
+            elif isinstance(node, DocumentType):
+                write(f"<!DOCTYPE {node.name}>")
+
+    @staticmethod
+    def __children_of(node: Node) -> List[Node]:
+        if isinstance(node, Element):
+            if node.name in VOID_ELEMENTS:
+                return []
+            if isinstance(node, HTMLTemplateElement):
+                return node.content.children
+        return node.children
+
+    def __is_raw_text(self, parent: Node) -> bool:
+        if not isinstance(parent, Element):
+            return False
+        return parent.name in RAW_TEXT_ELEMENTS or (parent.name == "noscript" and self.__scripting)
+
+    def write_tree(self, node: Node, depth: int = 0) -> None:
+        """
+        Writes the indented debug dump of the node, one node per line.
+        """
+        write = self.__stream.write
+        for descendant, descendant_depth, entering in _walk([node], _children):
+            if entering and descendant is not node:
+                write("\n")
+            indentation = "\t" * (depth + descendant_depth)
+            if isinstance(descendant, CharacterData):
+                if entering and not descendant.data.isspace():
+                    write(f"{indentation}<TEXT>{descendant.data}</TEXT>\n")
+            elif entering:
+                # Dumps are written for elements and text, other nodes are not dumped.
+                write(f"{indentation}<{descendant.name} {cast(Element, descendant).attributes}>")
+            elif descendant.children:
+                write(f"{indentation}</{descendant.name}>\n")
+            else:
+                write(f"</{descendant.name}>\n")
+
+    def write_contents(self, node: Node) -> None:
+        """
+        Writes the debug dump of the node without indentation, skipping whitespace only text.
+        """
+        write = self.__stream.write
+        for descendant, _, entering in _walk([node], _children):
+            if isinstance(descendant, CharacterData):
+                if entering and not descendant.data.isspace():
+                    write(f"<TEXT>{descendant.data.strip()}</TEXT>\n")
+            elif entering:
+                write(f"<{descendant.name} {cast(Element, descendant).attributes}>")
+            else:
+                write(f"</{descendant.name}>")
+
+
+def _children(node: Node) -> List[Node]:
+    return node.children
+
+
+def _walk(nodes: Iterable[Node], children_of: Callable[[Node], List[Node]]) -> Iterator[Tuple[Node, int, bool]]:
+    """
+    Yields (node, depth, True) before the descendants of each node and (node, depth, False) after them,
+    in tree order. Depth of the given nodes is 0.
+    """
+    stack: List[Tuple[Optional[Node], Iterator[Node]]] = [(None, iter(nodes))]
+    while stack:
+        parent, children = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            if parent is not None:
+                yield parent, len(stack) - 1, False
+            continue
+        yield node, len(stack) - 1, True
+        stack.append((node, iter(children_of(node))))